@@ -0,0 +1,10 @@
+import pytest
+from django.test import override_settings
+
+from core.testing import TEST_SETTINGS
+
+
+@pytest.fixture(scope='session', autouse=True)
+def test_settings():
+    with override_settings(**TEST_SETTINGS):
+        yield
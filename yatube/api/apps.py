@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+
+
+class ApiConfig(AppConfig):
+    """
+    Регистрация приложения api.
+    JSON API только для чтения: ленты и посты
+    для мобильного клиента.
+    """
+
+    name = 'api'
+    verbose_name = 'API'
@@ -0,0 +1,87 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from core.benchmarks import random_text, rolled_back
+from posts.bulk import create_posts
+from posts.models import Group, Post, User
+
+# Кэш страниц отключен, чтобы сравнивать работу view, а не чтение кэша.
+NO_CACHE: dict = {
+    'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+    'feed_versions': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    },
+}
+
+
+class Command(BaseCommand):
+    """
+    Сравнивает пропускную способность HTML-страниц и JSON API
+    для главной, группы, профиля и поста. Запросы выполняются
+    тестовым клиентом без кэша страниц; посты создаются
+    в транзакции, которая откатывается после замера.
+    """
+
+    help = 'Сравнивает запросы в секунду HTML-страниц и JSON API'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--requests', type=int, default=200)
+
+    def handle(self, *args: tuple, **options: dict) -> None:
+        rng = random.Random(0)
+        with rolled_back(), override_settings(CACHES=NO_CACHE):
+            author = User.objects.create(username='bench_api_author')
+            group = Group.objects.create(
+                title='bench', slug='bench_api_group', description='bench',
+            )
+            for start in range(0, options['posts'], 10000):
+                create_posts([
+                    Post(text=random_text(rng), author=author, group=group)
+                    for _ in range(min(10000, options['posts'] - start))
+                ])
+            post_id = Post.objects.values_list('pk', flat=True).first()
+            pairs = (
+                ('index', reverse('posts:index'), reverse('api:post_list')),
+                (
+                    'group',
+                    reverse('posts:group_list', args=(group.slug,)),
+                    reverse('api:group_posts', args=(group.slug,)),
+                ),
+                (
+                    'profile',
+                    reverse('posts:profile', args=(author.username,)),
+                    reverse('api:profile_posts', args=(author.username,)),
+                ),
+                (
+                    'post',
+                    reverse('posts:post_detail', args=(post_id,)),
+                    reverse('api:post_detail', args=(post_id,)),
+                ),
+            )
+            client = Client()
+            self.stdout.write('view\thtml, rps\tapi, rps\thtml, KB\tapi, KB')
+            for name, html_url, api_url in pairs:
+                html_rps, html_size = self.measure(
+                    client, html_url, options['requests'],
+                )
+                api_rps, api_size = self.measure(
+                    client, api_url, options['requests'],
+                )
+                self.stdout.write(
+                    f'{name}\t{html_rps:.0f}\t{api_rps:.0f}'
+                    f'\t{html_size / 1024:.1f}\t{api_size / 1024:.1f}',
+                )
+
+    @staticmethod
+    def measure(client: Client, url: str, requests: int) -> tuple:
+        """Запросы в секунду и размер ответа."""
+        size = len(client.get(url).content)
+        started = time.perf_counter()
+        for _ in range(requests):
+            client.get(url)
+        return requests / (time.perf_counter() - started), size
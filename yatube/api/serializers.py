@@ -0,0 +1,53 @@
+import typing
+
+from django.db.models import QuerySet
+
+# Поля строки .values(), из которых собирается пост в ответе API.
+POST_FIELDS: tuple = (
+    'id', 'text', 'pub_date', 'author__username', 'group__slug',
+)
+DETAIL_FIELDS: tuple = (
+    *POST_FIELDS, 'group__title', 'author__profile__post_count',
+)
+
+
+def post_rows(posts: QuerySet) -> QuerySet:
+    """Посты ленты как словари: без создания объектов моделей."""
+    return posts.values(*POST_FIELDS)
+
+
+def detail_rows(posts: QuerySet) -> QuerySet:
+    """Пост со страницы post_detail: название группы и счетчик автора."""
+    return posts.values(*DETAIL_FIELDS)
+
+
+def serialize_post(row: dict) -> dict:
+    """Компактное представление поста из строки .values()."""
+    return {
+        'id': row['id'],
+        'text': row['text'],
+        'pub_date': row['pub_date'].isoformat(),
+        'author': row['author__username'],
+        'group': row['group__slug'],
+    }
+
+
+def serialize_detail(row: dict) -> dict:
+    """Пост вместе с названием группы и числом постов автора."""
+    return {
+        **serialize_post(row),
+        'group_title': row['group__title'],
+        'author_post_count': row['author__profile__post_count'],
+    }
+
+
+def serialize_page(
+    rows: typing.Iterable[dict],
+    next_url: typing.Optional[str],
+    previous_url: typing.Optional[str],
+) -> dict:
+    return {
+        'results': [serialize_post(row) for row in rows],
+        'next': next_url,
+        'previous': previous_url,
+    }
@@ -0,0 +1,102 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.bulk import create_posts
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class ApiViewsTests(TestCase):
+    """
+    Проверка JSON API лент и постов.
+    """
+
+    POSTS_COUNT: int = settings.LIMIT_POSTS + 3
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='test_author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test_slug',
+            description='Тестовое описание',
+        )
+        cls.empty_group = Group.objects.create(
+            title='Пустая группа', slug='empty_slug',
+            description='Тестовое описание',
+        )
+        create_posts([
+            Post(text=f'Пост {i}', author=cls.user, group=cls.group)
+            for i in range(cls.POSTS_COUNT)
+        ])
+        cls.post = Post.objects.first()
+
+    def test_feeds_walk_pages_by_cursor(self):
+        """Ленты листаются по ссылкам next и previous без повторов."""
+        urls = (
+            reverse('api:post_list'),
+            reverse('api:group_posts', args=(self.group.slug,)),
+            reverse('api:profile_posts', args=(self.user.username,)),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                first = self.client.get(url).json()
+                self.assertIsNone(first['previous'])
+                second = self.client.get(first['next']).json()
+                self.assertIsNone(second['next'])
+                ids = [post['id'] for post in
+                       first['results'] + second['results']]
+                self.assertEqual(
+                    ids,
+                    list(Post.objects.values_list('pk', flat=True)),
+                )
+                back = self.client.get(second['previous']).json()
+                self.assertEqual(back['results'], first['results'])
+
+    def test_post_fields(self):
+        """Пост отдается компактным словарем."""
+        post = self.client.get(reverse('api:post_list')).json()['results'][0]
+        self.assertEqual(post, {
+            'id': self.post.pk,
+            'text': self.post.text,
+            'pub_date': self.post.pub_date.isoformat(),
+            'author': self.user.username,
+            'group': self.group.slug,
+        })
+        detail = self.client.get(
+            reverse('api:post_detail', args=(self.post.pk,)),
+        ).json()
+        self.assertEqual(detail['group_title'], self.group.title)
+        self.assertEqual(detail['author_post_count'], self.POSTS_COUNT)
+
+    def test_missing_objects(self):
+        """Несуществующие группа, автор и пост - 404, пустая группа - 200."""
+        for url in (
+            reverse('api:group_posts', args=('missing',)),
+            reverse('api:profile_posts', args=('missing',)),
+            reverse('api:post_detail', args=(0,)),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
+        response = self.client.get(
+            reverse('api:group_posts', args=(self.empty_group.slug,)),
+        )
+        self.assertEqual(response.json()['results'], [])
+
+    def test_etag(self):
+        """Повторный запрос с ETag получает 304."""
+        url = reverse('api:post_detail', args=(self.post.pk,))
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_feed_queries(self):
+        """Страница ленты - запрос валидаторов и запрос строк."""
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(reverse('api:post_list'))
+        self.assertEqual(len(context), 2)
@@ -0,0 +1,19 @@
+from django.urls import path
+
+from api import views
+from api.apps import ApiConfig
+
+app_name = ApiConfig.name
+
+urlpatterns = [
+    path('posts/', views.post_list, name='post_list'),
+    path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    path(
+        'groups/<slug:slug>/posts/', views.group_posts, name='group_posts',
+    ),
+    path(
+        'profile/<str:username>/posts/',
+        views.profile_posts,
+        name='profile_posts',
+    ),
+]
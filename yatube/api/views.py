@@ -0,0 +1,110 @@
+import typing
+
+from django.conf import settings
+from django.db.models import QuerySet
+from django.http import Http404, HttpRequest, JsonResponse
+from django.views.decorators.http import require_safe
+
+from api.serializers import (
+    detail_rows, post_rows, serialize_detail, serialize_page,
+)
+from core.decorators import (
+    cache_anonymous_page, conditional_page, query_budget,
+)
+from core.utils import (
+    CURSOR_AFTER, CURSOR_BEFORE, ChainedFeed, CursorPaginator,
+)
+from posts.cache import GROUP_FEED, INDEX_FEED, PROFILE_FEED
+from posts.conditional import (
+    group_state, index_state, post_state, profile_state,
+)
+from posts.models import ArchivedPost, Group, Post, User
+
+JSON_OPTIONS: dict = {'ensure_ascii': False}
+
+
+def page_url(
+    request: HttpRequest, param: str, token: typing.Optional[str],
+) -> typing.Optional[str]:
+    """Ссылка на соседнюю страницу ленты или None."""
+    return f'{request.path}?{param}={token}' if token else None
+
+
+def feed_response(
+    request: HttpRequest,
+    posts: QuerySet,
+    exists: typing.Callable[[], bool] = lambda: True,
+    archived: typing.Optional[QuerySet] = None,
+) -> JsonResponse:
+    """
+    Отдает страницу ленты по курсору (pub_date, id).
+    archived: посты архива, которыми лента продолжается
+    после постов основной таблицы.
+    Проверка существования группы или автора выполняется
+    отдельным запросом, только если страница пуста.
+    """
+    rows = post_rows(posts)
+    if archived is not None:
+        rows = ChainedFeed(rows, post_rows(archived))
+    page = CursorPaginator(rows, settings.LIMIT_POSTS).get_page(
+        request.GET.get(CURSOR_AFTER), request.GET.get(CURSOR_BEFORE),
+    )
+    if not page and not exists():
+        raise Http404
+    return JsonResponse(
+        serialize_page(
+            page,
+            page_url(request, CURSOR_AFTER, page.next_cursor),
+            page_url(request, CURSOR_BEFORE, page.previous_cursor),
+        ),
+        json_dumps_params=JSON_OPTIONS,
+    )
+
+
+@query_budget(2)
+@require_safe
+@cache_anonymous_page(INDEX_FEED)
+@conditional_page(index_state)
+def post_list(request: HttpRequest) -> JsonResponse:
+    """Лента всех постов, аналог главной страницы."""
+    return feed_response(request, Post.objects.all())
+
+
+@query_budget(4)
+@require_safe
+@cache_anonymous_page(GROUP_FEED)
+@conditional_page(group_state)
+def group_posts(request: HttpRequest, slug: str) -> JsonResponse:
+    """Лента постов группы с архивом, аналог страницы group_list."""
+    return feed_response(
+        request,
+        Post.objects.filter(group__slug=slug),
+        Group.objects.filter(slug=slug).exists,
+        ArchivedPost.objects.filter(group__slug=slug),
+    )
+
+
+@query_budget(4)
+@require_safe
+@cache_anonymous_page(PROFILE_FEED)
+@conditional_page(profile_state)
+def profile_posts(request: HttpRequest, username: str) -> JsonResponse:
+    """Лента постов автора с архивом, аналог страницы profile."""
+    return feed_response(
+        request,
+        Post.objects.filter(author__username=username),
+        User.objects.filter(username=username).exists,
+        ArchivedPost.objects.filter(author__username=username),
+    )
+
+
+@query_budget(2)
+@require_safe
+@conditional_page(post_state)
+def post_detail(request: HttpRequest, post_id: int) -> JsonResponse:
+    """Один пост, аналог страницы post_detail, в том числе из архива."""
+    model = ArchivedPost if getattr(request, 'post_archived', False) else Post
+    row = detail_rows(model.objects.filter(pk=post_id)).first()
+    if row is None:
+        raise Http404
+    return JsonResponse(serialize_detail(row), json_dumps_params=JSON_OPTIONS)
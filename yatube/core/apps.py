@@ -4,8 +4,21 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     """
     Регистрация служебного приложения core.
-    Предназначено для хранения фильтров шаблонов.
+    Предназначено для хранения фильтров шаблонов
+    и служебных инструментов: кэша, пагинации, замеров
+    и журнала медленных SQL-запросов.
     """
 
     name = 'core'
     verbose_name = 'ядро'
+
+    def ready(self) -> None:
+        from django.db.backends.signals import connection_created
+
+        from core import slowlog
+        from core.db import configure_sqlite
+        from core.timing import install_template_timing
+
+        install_template_timing()
+        connection_created.connect(configure_sqlite)
+        connection_created.connect(slowlog.install)
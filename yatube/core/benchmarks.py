@@ -0,0 +1,52 @@
+import random
+import resource
+import time
+import typing
+from contextlib import contextmanager
+
+from django.db import transaction
+
+WORDS: tuple = (
+    'кошка', 'собака', 'город', 'дорога', 'письмо', 'лето', 'зима',
+    'новости', 'погода', 'книга', 'музыка', 'работа', 'праздник',
+    'программа', 'питон', 'django', 'запрос', 'база', 'данные',
+    'вечер', 'утро', 'прогулка', 'река', 'лес', 'поезд', 'друзья',
+)
+
+
+@contextmanager
+def rolled_back() -> typing.Iterator[None]:
+    """
+    Выполняет замер в транзакции, которая откатывается в конце:
+    сгенерированные для замера данные не остаются в базе.
+    """
+    with transaction.atomic():
+        yield
+        transaction.set_rollback(True)
+
+
+def best_of(func: typing.Callable, repeat: int = 5) -> float:
+    """Лучшее время выполнения func за repeat попыток, в секундах."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def random_text(rng: random.Random, words: int = 30) -> str:
+    """Случайный текст поста из словаря WORDS."""
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+
+def current_rss() -> int:
+    """
+    Текущий объем резидентной памяти процесса в байтах (Linux).
+    На других системах - пиковый объем по getrusage.
+    """
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
@@ -0,0 +1,70 @@
+import hashlib
+import time
+import typing
+from uuid import uuid4
+
+from django.core.cache import caches
+from django.http import HttpRequest
+
+# Кэш версий лент. Он общий для всех рабочих процессов: страницы
+# лент лежат в кэше каждого процесса под ключом с версией,
+# и смена версии в одном процессе сбрасывает их во всех.
+VERSION_CACHE: str = 'feed_versions'
+
+
+def feed_version_key(feed: str) -> str:
+    """Ключ кэша с текущей версией ленты."""
+    return f'feed_version:{feed}'
+
+
+def _new_version() -> str:
+    """Новая версия ленты: время ее создания и случайная часть."""
+    return f'{time.time():.3f}-{uuid4().hex}'
+
+
+def version_age(version: str) -> float:
+    """
+    Сколько секунд назад создана версия ленты. Время в версии
+    округлено и может опережать текущее - тогда возраст 0.
+    """
+    try:
+        return max(time.time() - float(version.partition('-')[0]), 0.0)
+    except ValueError:
+        return float('inf')
+
+
+def get_feed_version(feed: str) -> str:
+    """
+    Возвращает текущую версию ленты.
+    Если версия еще не задана или вытеснена из кэша,
+    заводит новую - старые страницы при этом становятся недоступны.
+    """
+    versions = caches[VERSION_CACHE]
+    key = feed_version_key(feed)
+    version = versions.get(key)
+    if version is None:
+        version = _new_version()
+        if not versions.add(key, version, None):
+            version = versions.get(key, version)
+    return version
+
+
+def peek_feed_version(feed: str) -> str:
+    """Текущая версия ленты без создания новой; пустая, если ее нет."""
+    return caches[VERSION_CACHE].get(feed_version_key(feed), '')
+
+
+def expire_feeds(feeds: typing.Iterable[str]) -> None:
+    """
+    Сбрасывает закэшированные страницы лент сменой их версий:
+    одно обращение к кэшу на любое число лент.
+    """
+    caches[VERSION_CACHE].set_many(
+        {feed_version_key(feed): _new_version() for feed in set(feeds)}, None,
+    )
+
+
+def page_key(feed: str, version: str, request: HttpRequest) -> str:
+    """Ключ кэша страницы ленты: лента, ее версия и полный адрес."""
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'feed_page:{feed}:{version}:{path}'
@@ -0,0 +1,157 @@
+import os
+import random
+import re
+import sqlite3
+import time
+import typing
+from functools import wraps
+
+from django.conf import settings
+from django.db import DatabaseError, OperationalError, connections
+from django.db.backends.base.base import BaseDatabaseWrapper
+
+# Полный просмотр таблицы: SCAN [TABLE] имя без USING [COVERING] INDEX.
+# \b и (?!TABLE\b) не дают возвратам сократить имя таблицы
+# или принять за него слово TABLE и так обойти проверку USING.
+FULL_SCAN = re.compile(
+    r'^SCAN (?:TABLE )?(?P<table>(?!TABLE\b)\w+)\b(?! USING)',
+)
+TEMP_SORT = re.compile(r'USE TEMP B-TREE')
+LOCK_ERRORS: tuple = ('database is locked', 'database table is locked')
+
+
+def explain_query_plan(
+    connection: BaseDatabaseWrapper,
+    sql: str,
+    params: typing.Any = None,
+) -> typing.List[str]:
+    """
+    Возвращает строки EXPLAIN QUERY PLAN для запроса SQLite.
+    Запрос выполняется курсором драйвера в обход
+    connection.execute_wrapper, чтобы не попадать в счетчики запросов.
+    """
+    connection.ensure_connection()
+    cursor = connection.create_cursor()
+    try:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params or ())
+        return [row[-1] for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+
+def find_plan_problems(
+    plan: typing.Iterable[str],
+    tables: typing.Iterable[str],
+) -> typing.List[str]:
+    """
+    Возвращает шаги плана с полным просмотром одной из таблиц tables
+    или с сортировкой во временном B-дереве.
+    """
+    tables = set(tables)
+    problems = []
+    for step in plan:
+        scan = FULL_SCAN.search(step)
+        if scan and scan.group('table') in tables or TEMP_SORT.search(step):
+            problems.append(step)
+    return problems
+
+
+def estimate_row_count(
+    connection: BaseDatabaseWrapper,
+    table: str,
+) -> typing.Optional[int]:
+    """
+    Оценка числа строк таблицы по статистике sqlite_stat1,
+    которую собирает ANALYZE. Если статистики нет, возвращает None.
+    """
+    with connection.cursor() as cursor:
+        try:
+            cursor.execute(
+                'SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1',
+                (table,),
+            )
+        except DatabaseError:
+            return None
+        row = cursor.fetchone()
+    return int(row[0].split()[0]) if row else None
+
+
+def copy_database(source: str, target: str) -> None:
+    """
+    Копирует файл SQLite source в target онлайн-резервированием
+    (sqlite3 backup): копия согласована, даже если в source
+    в это время пишут. Копия собирается во временном файле
+    и подменяет target атомарно, поэтому читатели реплики
+    видят либо старую, либо новую версию целиком.
+    """
+    temporary = f'{target}.tmp'
+    primary = sqlite3.connect(source)
+    try:
+        replica = sqlite3.connect(temporary)
+        try:
+            primary.backup(replica)
+            # Реплика читается без WAL: файлы -wal и -shm прежней
+            # копии не должны примениться к подмененному файлу.
+            replica.execute('PRAGMA journal_mode = DELETE')
+        finally:
+            replica.close()
+    finally:
+        primary.close()
+    os.replace(temporary, target)
+
+
+def configure_sqlite(
+    sender: type, connection: BaseDatabaseWrapper, **kwargs: dict,
+) -> None:
+    """
+    Обработчик сигнала connection_created: применяет к новому
+    соединению SQLite профиль SQLITE_PRAGMAS. Реплики подменяются
+    файлом целиком, поэтому режим журнала у них не меняется,
+    а запись запрещена (query_only).
+    """
+    if connection.vendor != 'sqlite':
+        return
+    replica = connection.alias in settings.DATABASE_REPLICAS
+    # Соединение драйвера: прагмы не попадают в счетчики запросов.
+    raw = connection.connection
+    for name, value in settings.SQLITE_PRAGMAS.items():
+        if replica and name == 'journal_mode':
+            continue
+        raw.execute(f'PRAGMA {name} = {value}')
+    if replica:
+        raw.execute('PRAGMA query_only = 1')
+
+
+def is_lock_error(error: Exception) -> bool:
+    return any(message in str(error) for message in LOCK_ERRORS)
+
+
+def retry_on_lock(func: typing.Callable) -> typing.Callable:
+    """
+    Повторяет запись, не дождавшуюся блокировки SQLite
+    за busy_timeout: до SQLITE_LOCK_RETRIES раз с экспоненциально
+    растущей паузой со случайным разбросом. func должна быть
+    целой транзакцией: внутри внешней транзакции ошибка
+    не повторяется, а передается выше.
+    """
+    @wraps(func)
+    def wrapper(*args: tuple, **kwargs: dict) -> typing.Any:
+        retries = settings.SQLITE_LOCK_RETRIES
+        for attempt in range(retries + 1):
+            try:
+                return func(*args, **kwargs)
+            except (OperationalError, sqlite3.OperationalError) as error:
+                if (
+                    attempt == retries
+                    or not is_lock_error(error)
+                    or any(
+                        connection.in_atomic_block
+                        for connection in connections.all()
+                    )
+                ):
+                    raise
+                time.sleep(
+                    settings.SQLITE_LOCK_RETRY_DELAY
+                    * 2 ** attempt * random.uniform(0.5, 1.5),
+                )
+    return wrapper
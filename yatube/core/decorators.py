@@ -0,0 +1,119 @@
+import typing
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpRequest, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+from django.views.decorators.http import condition
+
+from core import metrics, routers
+from core.cache import get_feed_version, page_key, version_age
+
+
+def query_budget(max_queries: int) -> typing.Callable:
+    """
+    Объявляет для view-функции бюджет SQL-запросов на один запрос
+    пользователя. Бюджет проверяет core.middleware.QueryBudgetMiddleware.
+    """
+    def decorator(view_func: typing.Callable) -> typing.Callable:
+        view_func.query_budget = max_queries
+        return view_func
+    return decorator
+
+
+def cached_response(
+    request: HttpRequest,
+    content: bytes,
+    content_type: str,
+    etag: typing.Optional[str],
+    last_modified: typing.Optional[str],
+) -> HttpResponse:
+    """
+    Собирает ответ из закэшированной страницы вместе с ее валидаторами.
+    Если клиенту уже известна эта версия, возвращает 304.
+    """
+    response = HttpResponse(content, content_type=content_type)
+    if etag:
+        response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = last_modified
+    return get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=parse_http_date_safe(last_modified or ''),
+        response=response,
+    )
+
+
+def cache_anonymous_page(feed: str) -> typing.Callable:
+    """
+    Кэширует страницы ленты для неавторизованных пользователей.
+    feed: шаблон имени ленты, подставляются именованные аргументы
+    view-функции, например 'group:{slug}'. Страницы ленты
+    сбрасываются вызовом core.cache.expire_feeds с этим именем.
+    Вместе со страницей сохраняются ETag и Last-Modified,
+    поэтому условный запрос к закэшированной странице
+    получает 304 без обращения к базе данных.
+    Первые REPLICA_STICKY_SECONDS после смены версии ленты
+    страница и ее валидаторы собираются из основной базы:
+    отстающая реплика могла еще не получить запись,
+    сменившую версию, и старая страница закэшировалась бы
+    под новой версией.
+    """
+    def decorator(view_func: typing.Callable) -> typing.Callable:
+        @wraps(view_func)
+        def wrapper(
+            request: HttpRequest, *args: tuple, **kwargs: dict,
+        ) -> HttpResponse:
+            if (
+                request.method not in ('GET', 'HEAD')
+                or request.user.is_authenticated
+            ):
+                return view_func(request, *args, **kwargs)
+            name = feed.format(**kwargs)
+            version = get_feed_version(name)
+            key = page_key(name, version, request)
+            cached = cache.get(key)
+            if cached is not None:
+                metrics.record_cache('page', 1, 0)
+                return cached_response(request, *cached)
+            metrics.record_cache('page', 0, 1)
+            if version_age(version) < settings.REPLICA_STICKY_SECONDS:
+                routers.read_primary()
+            response = view_func(request, *args, **kwargs)
+            if response.status_code == 200 and not response.streaming:
+                cache.set(
+                    key,
+                    (
+                        response.content,
+                        response['Content-Type'],
+                        response.get('ETag'),
+                        response.get('Last-Modified'),
+                    ),
+                    settings.PAGE_CACHE_TIMEOUT,
+                )
+            return response
+        return wrapper
+    return decorator
+
+
+def conditional_page(state_func: typing.Callable) -> typing.Callable:
+    """
+    Отвечает на If-None-Match и If-Modified-Since кодом 304,
+    не вызывая view-функцию.
+    state_func(request, *args, **kwargs) возвращает пару
+    (дата последнего изменения, ETag) и вызывается один раз на запрос.
+    """
+    def get_state(request: HttpRequest, *args: tuple, **kwargs: dict) -> tuple:
+        if not hasattr(request, 'page_state'):
+            request.page_state = state_func(request, *args, **kwargs)
+        return request.page_state
+
+    return condition(
+        etag_func=lambda *args, **kwargs: get_state(*args, **kwargs)[1],
+        last_modified_func=(
+            lambda *args, **kwargs: get_state(*args, **kwargs)[0]
+        ),
+    )
@@ -0,0 +1,200 @@
+import math
+import time
+import typing
+from collections import Counter, defaultdict
+from contextlib import ExitStack
+from http.client import HTTPConnection, HTTPException, HTTPSConnection
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode, urlsplit
+
+from django.db import connections
+from django.test import Client
+
+from core.middleware import QueryCounter
+
+PERCENTILES: tuple = (50, 95, 99)
+
+
+def percentile(values: typing.List[float], rank: int) -> float:
+    """Перцентиль rank отсортированного списка (метод ближайшего ранга)."""
+    if not values:
+        return 0.0
+    return values[max(math.ceil(rank / 100 * len(values)) - 1, 0)]
+
+
+class RouteStats:
+    """
+    Замеры одного маршрута: задержки, ошибки и число SQL-запросов.
+    failures: причины ошибок (исключение или код ответа) и их число.
+    """
+
+    def __init__(self) -> None:
+        self.latencies = []
+        self.queries = []
+        self.errors = 0
+        self.failures = Counter()
+
+    def merge(self, other: 'RouteStats') -> None:
+        self.latencies.extend(other.latencies)
+        self.queries.extend(other.queries)
+        self.errors += other.errors
+        self.failures.update(other.failures)
+
+    def fail(self, reason: str) -> None:
+        self.errors += 1
+        self.failures[reason] += 1
+
+    def summary(self, seconds: float) -> dict:
+        latencies = sorted(self.latencies)
+        result = {
+            'requests': len(latencies),
+            'errors': self.errors,
+            'rps': round(len(latencies) / seconds, 1) if seconds else 0,
+        }
+        for rank in PERCENTILES:
+            result[f'p{rank}_ms'] = round(
+                percentile(latencies, rank) * 1000, 2,
+            )
+        result['queries'] = (
+            round(sum(self.queries) / len(self.queries), 1)
+            if self.queries else None
+        )
+        result['failures'] = dict(self.failures.most_common())
+        return result
+
+
+class Recorder:
+    """Замеры всех маршрутов одного исполнителя."""
+
+    def __init__(self) -> None:
+        self.routes = defaultdict(RouteStats)
+
+    def merge(self, other: 'Recorder') -> None:
+        for route, stats in other.routes.items():
+            self.routes[route].merge(stats)
+
+    def summary(self, seconds: float) -> typing.Dict[str, dict]:
+        return {
+            route: stats.summary(seconds)
+            for route, stats in sorted(self.routes.items())
+        }
+
+
+class InProcessTransport:
+    """
+    Выполняет запросы к WSGI-приложению в том же процессе
+    через тестовый клиент Django и считает SQL-запросы каждого.
+    """
+
+    remote: bool = False
+
+    def __init__(self, recorder: Recorder) -> None:
+        self.recorder = recorder
+        self.client = Client()
+
+    def request(
+        self,
+        route: str,
+        method: str,
+        path: str,
+        data: typing.Optional[dict] = None,
+        expected: tuple = (200, 302),
+    ) -> typing.Optional[int]:
+        counter = QueryCounter()
+        started = time.perf_counter()
+        status = None
+        failure = None
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(counter))
+            try:
+                response = getattr(self.client, method.lower())(path, data)
+                if response.streaming:
+                    for _ in response.streaming_content:
+                        pass
+                status = response.status_code
+            except Exception as error:
+                # Ошибка view (например, блокировка SQLite при записи)
+                # не прерывает нагрузку: запрос учитывается как
+                # неуспешный с причиной в отчете.
+                failure = type(error).__name__
+        stats = self.recorder.routes[route]
+        stats.latencies.append(time.perf_counter() - started)
+        stats.queries.append(counter.count)
+        if failure:
+            stats.fail(failure)
+        elif status not in expected:
+            stats.fail(f'HTTP {status}')
+        return status
+
+
+class HttpTransport:
+    """
+    Выполняет запросы к запущенному серверу (например, runserver)
+    по одному постоянному соединению на исполнителя.
+    Cookie сессии и CSRF запоминаются из ответов, CSRF-токен
+    для POST берется из cookie, полученной при GET формы.
+    Число SQL-запросов снаружи неизвестно и не замеряется.
+    """
+
+    remote: bool = True
+
+    def __init__(self, recorder: Recorder, base_url: str) -> None:
+        self.recorder = recorder
+        self.base_url = base_url.rstrip('/')
+        parts = urlsplit(self.base_url)
+        connection_class = (
+            HTTPSConnection if parts.scheme == 'https' else HTTPConnection
+        )
+        self.connection = connection_class(parts.netloc, timeout=30)
+        self.prefix = parts.path
+        self.cookies = SimpleCookie()
+
+    def request(
+        self,
+        route: str,
+        method: str,
+        path: str,
+        data: typing.Optional[dict] = None,
+        expected: tuple = (200, 302),
+    ) -> typing.Optional[int]:
+        headers = {
+            'Cookie': '; '.join(
+                f'{name}={morsel.value}'
+                for name, morsel in self.cookies.items()
+            ),
+        }
+        body = None
+        if method == 'POST':
+            csrf = self.cookies.get('csrftoken')
+            body = urlencode({
+                **(data or {}),
+                'csrfmiddlewaretoken': csrf.value if csrf else '',
+            })
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+            headers['Referer'] = self.base_url + path
+        elif data:
+            path = f'{path}?{urlencode(data)}'
+        started = time.perf_counter()
+        status = None
+        failure = None
+        try:
+            self.connection.request(
+                method, self.prefix + path, body, headers,
+            )
+            response = self.connection.getresponse()
+            response.read()
+            status = response.status
+        except (OSError, HTTPException) as error:
+            self.connection.close()
+            failure = type(error).__name__
+        stats = self.recorder.routes[route]
+        stats.latencies.append(time.perf_counter() - started)
+        if failure:
+            stats.fail(failure)
+            return None
+        for header in response.headers.get_all('Set-Cookie') or ():
+            self.cookies.load(header)
+        if status not in expected:
+            stats.fail(f'HTTP {status}')
+        return status
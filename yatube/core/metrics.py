@@ -0,0 +1,333 @@
+import fcntl
+import json
+import math
+import os
+import re
+import threading
+import time
+import typing
+
+from django.conf import settings
+
+LATENCY_BUCKETS: tuple = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+QUERY_BUCKETS: tuple = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+SQL_BUCKETS: tuple = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+
+# Описание метрик: тип, справка, имена меток и границы гистограммы.
+METRICS: typing.Dict[str, dict] = {
+    'yatube_http_requests_total': {
+        'type': 'counter',
+        'help': 'Число ответов по view, методу и коду ответа.',
+        'labels': ('view', 'method', 'status'),
+    },
+    'yatube_http_request_duration_seconds': {
+        'type': 'histogram',
+        'help': 'Время обработки запроса.',
+        'labels': ('view',),
+        'buckets': LATENCY_BUCKETS,
+    },
+    'yatube_http_requests_in_flight': {
+        'type': 'gauge',
+        'help': 'Число запросов в обработке.',
+        'labels': (),
+    },
+    'yatube_db_queries': {
+        'type': 'histogram',
+        'help': 'Число SQL-запросов на один запрос.',
+        'labels': ('view',),
+        'buckets': QUERY_BUCKETS,
+    },
+    'yatube_db_duration_seconds': {
+        'type': 'histogram',
+        'help': 'Суммарное время SQL-запросов одного запроса.',
+        'labels': ('view',),
+        'buckets': SQL_BUCKETS,
+    },
+    'yatube_cache_requests_total': {
+        'type': 'counter',
+        'help': 'Обращения к кэшу: страницы лент и карточки постов.',
+        'labels': ('cache', 'result'),
+    },
+}
+
+
+class Registry:
+    """
+    Хранилище метрик процесса. Каждый поток пишет в свой словарь,
+    поэтому запись не требует блокировок; при чтении словари
+    потоков суммируются. Блокировка берется один раз на поток -
+    при регистрации его словаря.
+    Словари завершившихся потоков сливаются в общий итог
+    при регистрации нового потока и при чтении, поэтому сервер,
+    запускающий поток на каждое соединение, хранит словари
+    только живых потоков.
+    """
+
+    def __init__(self) -> None:
+        self._local = threading.local()
+        self._shards: typing.Dict[threading.Thread, dict] = {}
+        self._retired = {}
+        self._lock = threading.Lock()
+
+    def _shard(self) -> dict:
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._retire()
+                self._shards[threading.current_thread()] = shard
+        return shard
+
+    def _retire(self) -> None:
+        """
+        Сливает словари завершившихся потоков в общий итог.
+        Вызывается под self._lock; завершившийся поток
+        в свой словарь уже не пишет.
+        """
+        for thread in [t for t in self._shards if not t.is_alive()]:
+            for key, value in self._shards.pop(thread).items():
+                self._retired[key] = _add(self._retired.get(key), value)
+
+    def inc(self, name: str, labels: tuple = (), value: float = 1) -> None:
+        """Увеличивает счетчик или измеритель (value < 0 - уменьшает)."""
+        shard = self._shard()
+        key = (name, labels)
+        shard[key] = shard.get(key, 0) + value
+
+    def observe(self, name: str, labels: tuple, value: float) -> None:
+        """
+        Добавляет наблюдение в гистограмму: счетчики корзин
+        (без накопления), затем число и сумма наблюдений.
+        """
+        buckets = METRICS[name]['buckets']
+        shard = self._shard()
+        key = (name, labels)
+        row = shard.get(key)
+        if row is None:
+            row = shard[key] = [0] * (len(buckets) + 2)
+        for index, bound in enumerate(buckets):
+            if value <= bound:
+                row[index] += 1
+                break
+        row[-2] += 1
+        row[-1] += value
+
+    def snapshot(self) -> dict:
+        """Сумма словарей всех потоков: {(name, labels): value}."""
+        with self._lock:
+            self._retire()
+            shards = [self._retired.copy(), *self._shards.values()]
+        result = {}
+        for shard in shards:
+            for key, value in shard.copy().items():
+                result[key] = _add(result.get(key), value)
+        return result
+
+
+def _add(
+    total: typing.Union[None, float, list],
+    value: typing.Union[float, list],
+) -> typing.Union[float, list]:
+    if isinstance(value, list):
+        if total is None:
+            return list(value)
+        return [a + b for a, b in zip(total, value)]
+    return (total or 0) + value
+
+
+registry = Registry()
+
+
+def record_cache(cache: str, hits: int, misses: int) -> None:
+    """Учитывает попадания и промахи кэша cache ('page', 'card')."""
+    if hits:
+        registry.inc('yatube_cache_requests_total', (cache, 'hit'), hits)
+    if misses:
+        registry.inc('yatube_cache_requests_total', (cache, 'miss'), misses)
+
+
+# Снимки процессов в METRICS_DIR; остальные файлы каталога
+# при сложении пропускаются.
+SNAPSHOT_NAME = re.compile(r'^metrics-(\d+)\.json$')
+
+# Итог счетчиков и гистограмм завершившихся процессов
+# и блокировка, под которой в него сливаются их снимки.
+RETIRED_FILENAME: str = 'metrics-retired.json'
+LOCK_FILENAME: str = 'metrics.lock'
+
+
+def _snapshot_path(pid: int) -> str:
+    return os.path.join(settings.METRICS_DIR, f'metrics-{pid}.json')
+
+
+def _dump(path: str, values: dict) -> None:
+    """Атомарно сохраняет метрики {(name, labels): value} в файл."""
+    temporary = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(temporary, 'w') as file:
+        json.dump(
+            [[name, list(labels), value]
+             for (name, labels), value in values.items()],
+            file,
+        )
+    os.replace(temporary, path)
+
+
+def _load(path: str) -> dict:
+    """Метрики из файла; пустой словарь, если его нет или он испорчен."""
+    try:
+        with open(path) as file:
+            rows = json.load(file)
+    except (OSError, ValueError):
+        return {}
+    return {
+        (name, tuple(labels)): value for name, labels, value in rows
+        if name in METRICS
+    }
+
+
+_next_flush = 0.0
+
+
+def flush(force: bool = False) -> None:
+    """
+    Сохраняет метрики процесса в METRICS_DIR не чаще раза
+    в METRICS_FLUSH_INTERVAL секунд, чтобы /metrics любого
+    процесса мог сложить метрики всех процессов.
+    Без METRICS_DIR (один процесс) ничего не делает.
+    """
+    global _next_flush
+    if not settings.METRICS_DIR:
+        return
+    now = time.monotonic()
+    if not force and now < _next_flush:
+        return
+    _next_flush = now + settings.METRICS_FLUSH_INTERVAL
+    os.makedirs(settings.METRICS_DIR, exist_ok=True)
+    _dump(_snapshot_path(os.getpid()), registry.snapshot())
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _snapshots() -> typing.Iterator[typing.Tuple[int, str]]:
+    """Пары (pid, путь) снимков процессов в METRICS_DIR."""
+    for filename in os.listdir(settings.METRICS_DIR):
+        match = SNAPSHOT_NAME.match(filename)
+        if match:
+            yield (
+                int(match.group(1)),
+                os.path.join(settings.METRICS_DIR, filename),
+            )
+
+
+def _retire_dead() -> dict:
+    """
+    Сливает снимки завершившихся процессов в RETIRED_FILENAME
+    и удаляет их, чтобы каталог не рос с каждым перезапуском
+    рабочих процессов. Измерители завершившихся процессов
+    отбрасываются. Слияние идет под блокировкой файла: снимок
+    не учитывается дважды, даже если /metrics читают
+    несколько процессов сразу. Возвращает итог.
+    """
+    retired_path = os.path.join(settings.METRICS_DIR, RETIRED_FILENAME)
+    lock_path = os.path.join(settings.METRICS_DIR, LOCK_FILENAME)
+    with open(lock_path, 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        retired = _load(retired_path)
+        dead = [path for pid, path in _snapshots() if not _alive(pid)]
+        for path in dead:
+            for key, value in _load(path).items():
+                if METRICS[key[0]]['type'] != 'gauge':
+                    retired[key] = _add(retired.get(key), value)
+        if dead:
+            _dump(retired_path, retired)
+            for path in dead:
+                os.remove(path)
+    return retired
+
+
+def collect() -> dict:
+    """
+    Метрики всех процессов: текущий процесс - из памяти,
+    остальные - из их последних снимков в METRICS_DIR,
+    завершившиеся - из общего итога (_retire_dead).
+    """
+    result = registry.snapshot()
+    if not settings.METRICS_DIR or not os.path.isdir(settings.METRICS_DIR):
+        return result
+    sources = [_retire_dead()]
+    sources.extend(
+        _load(path) for pid, path in _snapshots() if pid != os.getpid()
+    )
+    for values in sources:
+        for key, value in values.items():
+            result[key] = _add(result.get(key), value)
+    return result
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = '') -> str:
+    pairs = [
+        f'{name}="{_escape(value)}"' for name, value in zip(names, values)
+    ]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value: typing.Any) -> str:
+    return (
+        str(value).replace('\\', '\\\\').replace('"', '\\"')
+        .replace('\n', '\\n')
+    )
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, float) and math.isinf(value):
+        return '+Inf'
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def render(values: dict) -> str:
+    """Метрики в текстовом формате Prometheus 0.0.4."""
+    lines = []
+    for name, meta in METRICS.items():
+        series = sorted(
+            (labels, value) for (metric, labels), value in values.items()
+            if metric == name
+        )
+        lines.append(f'# HELP {name} {meta["help"]}')
+        lines.append(f'# TYPE {name} {meta["type"]}')
+        if meta['type'] != 'histogram':
+            if not series and not meta['labels']:
+                series = [((), 0)]
+            for labels, value in series:
+                lines.append(
+                    f'{name}{_format_labels(meta["labels"], labels)} '
+                    f'{_format_value(value)}',
+                )
+            continue
+        for labels, row in series:
+            cumulative = 0
+            for bound, count in zip(meta['buckets'], row):
+                cumulative += count
+                extra = f'le="{_format_value(float(bound))}"'
+                lines.append(
+                    f'{name}_bucket'
+                    f'{_format_labels(meta["labels"], labels, extra)} '
+                    f'{cumulative}',
+                )
+            tags = _format_labels(meta['labels'], labels, 'le="+Inf"')
+            lines.append(f'{name}_bucket{tags} {row[-2]}')
+            tags = _format_labels(meta['labels'], labels)
+            lines.append(f'{name}_sum{tags} {_format_value(row[-1])}')
+            lines.append(f'{name}_count{tags} {row[-2]}')
+    return '\n'.join(lines) + '\n'
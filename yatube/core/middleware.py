@@ -0,0 +1,275 @@
+import logging
+import random
+import time
+import typing
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import HttpRequest, HttpResponse
+
+from core import metrics, routers, slowlog, timing
+
+logger = logging.getLogger(__name__)
+timing_logger = logging.getLogger('core.timing')
+
+
+class QueryBudgetExceeded(Exception):
+    """View выполнила больше SQL-запросов, чем указано в ее бюджете."""
+
+
+class QueryCounter:
+    """
+    Обертка для connection.execute_wrapper,
+    считающая выполненные SQL-запросы.
+    """
+
+    def __init__(self) -> None:
+        self.count = 0
+
+    def __call__(
+        self,
+        execute: typing.Callable,
+        sql: str,
+        params: typing.Any,
+        many: bool,
+        context: dict,
+    ) -> typing.Any:
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class QueryBudgetMiddleware:
+    """
+    Считает SQL-запросы каждого запроса пользователя и сверяет их
+    с бюджетом, объявленным декоратором core.decorators.query_budget.
+    Работает при QUERY_BUDGETS_ENABLED (по умолчанию в DEBUG).
+    При превышении пишет предупреждение в лог, а при
+    QUERY_BUDGET_RAISE - выбрасывает QueryBudgetExceeded.
+    """
+
+    def __init__(self, get_response: typing.Callable) -> None:
+        if not settings.QUERY_BUDGETS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        counter = QueryCounter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(counter))
+            response = self.get_response(request)
+        budget = getattr(request, 'query_budget', None)
+        if budget is not None and counter.count > budget:
+            message = (
+                f'{request.resolver_match.view_name}: '
+                f'{counter.count} SQL-запросов при бюджете {budget}'
+            )
+            if settings.QUERY_BUDGET_RAISE:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
+
+    def process_view(
+        self,
+        request: HttpRequest,
+        view_func: typing.Callable,
+        view_args: tuple,
+        view_kwargs: dict,
+    ) -> None:
+        request.query_budget = getattr(view_func, 'query_budget', None)
+
+
+class ServerTimingMiddleware:
+    """
+    Замеряет выборку запросов (доля SERVER_TIMING_SAMPLE_RATE):
+    общее время, время view, время и число SQL-запросов,
+    время отрисовки шаблонов и накладные расходы middleware.
+    Замеры отдаются в заголовке Server-Timing и пишутся
+    в лог core.timing строкой key=value.
+
+    Должна стоять первой в MIDDLEWARE, а ViewTimingMiddleware -
+    последней: так время view отделяется от остальных middleware.
+    Незамеряемый запрос стоит одного вызова random().
+    """
+
+    def __init__(self, get_response: typing.Callable) -> None:
+        if not settings.SERVER_TIMING_SAMPLE_RATE:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = settings.SERVER_TIMING_SAMPLE_RATE
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if random.random() >= self.sample_rate:
+            return self.get_response(request)
+        request.timing = measured = timing.RequestTiming()
+        timing.activate(measured)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(measured))
+                response = self.get_response(request)
+        finally:
+            timing.activate(None)
+        measured.total = time.perf_counter() - measured.started
+        metrics = measured.metrics()
+        response['Server-Timing'] = ', '.join(
+            f'{name};dur={value:.2f}' + (
+                f';desc="{measured.queries} queries"' if name == 'db' else ''
+            )
+            for name, value in metrics.items()
+        )
+        match = request.resolver_match
+        timing_logger.info(
+            'view=%s method=%s status=%s queries=%s %s',
+            match.view_name if match else '-',
+            request.method,
+            response.status_code,
+            measured.queries,
+            ' '.join(
+                f'{name}_ms={value:.2f}' for name, value in metrics.items()
+            ),
+        )
+        return response
+
+
+class ViewTimingMiddleware:
+    """
+    Замыкающая часть ServerTimingMiddleware: process_view
+    вызывается непосредственно перед view, а возврат из
+    get_response - сразу после нее.
+    """
+
+    def __init__(self, get_response: typing.Callable) -> None:
+        if not settings.SERVER_TIMING_SAMPLE_RATE:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        response = self.get_response(request)
+        measured = getattr(request, 'timing', None)
+        if measured is not None and measured.view_started is not None:
+            measured.view = time.perf_counter() - measured.view_started
+        return response
+
+    def process_view(
+        self,
+        request: HttpRequest,
+        view_func: typing.Callable,
+        view_args: tuple,
+        view_kwargs: dict,
+    ) -> None:
+        measured = getattr(request, 'timing', None)
+        if measured is not None:
+            measured.view_started = time.perf_counter()
+
+
+class MetricsMiddleware:
+    """
+    Собирает метрики каждого запроса для /metrics: время ответа,
+    число и время SQL-запросов по имени URL, коды ответов
+    и число запросов в обработке.
+    Запросы, не совпавшие ни с одним URL, объединяются
+    под именем UNRESOLVED, чтобы число рядов не росло.
+    """
+
+    UNRESOLVED: str = '<unresolved>'
+
+    def __init__(self, get_response: typing.Callable) -> None:
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        registry = metrics.registry
+        registry.inc('yatube_http_requests_in_flight')
+        measured = timing.RequestTiming()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(measured))
+                response = self.get_response(request)
+        finally:
+            registry.inc('yatube_http_requests_in_flight', value=-1)
+        elapsed = time.perf_counter() - measured.started
+        match = request.resolver_match
+        view = (match.view_name if match else None) or self.UNRESOLVED
+        registry.inc(
+            'yatube_http_requests_total',
+            (view, request.method, str(response.status_code)),
+        )
+        registry.observe(
+            'yatube_http_request_duration_seconds', (view,), elapsed,
+        )
+        registry.observe('yatube_db_queries', (view,), measured.queries)
+        registry.observe('yatube_db_duration_seconds', (view,), measured.sql)
+        metrics.flush()
+        return response
+
+
+class SlowQueryMiddleware:
+    """
+    Сообщает журналу медленных запросов (core.slowlog) путь
+    view текущего запроса, например posts.views.profile.
+    """
+
+    def __init__(self, get_response: typing.Callable) -> None:
+        if settings.SLOW_QUERY_THRESHOLD_MS is None:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        try:
+            return self.get_response(request)
+        finally:
+            slowlog.activate(None)
+
+    def process_view(
+        self,
+        request: HttpRequest,
+        view_func: typing.Callable,
+        view_args: tuple,
+        view_kwargs: dict,
+    ) -> None:
+        slowlog.activate(request.resolver_match._func_path)
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Разрешает PrimaryReplicaRouter читать с реплик в запросах
+    GET и HEAD. После запроса с записью ставит cookie, и
+    REPLICA_STICKY_SECONDS секунд запросы пользователя читают
+    из основной базы: так после создания поста редирект
+    на профиль показывает этот пост, даже если реплика отстает.
+    Должна стоять до SessionMiddleware, чтобы сессии
+    тоже учитывались.
+    """
+
+    COOKIE: str = 'primary_until'
+
+    def __init__(self, get_response: typing.Callable) -> None:
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        now = time.time()
+        try:
+            sticky = float(request.COOKIES.get(self.COOKIE, 0)) > now
+        except ValueError:
+            sticky = False
+        routers.begin(request.method in ('GET', 'HEAD') and not sticky)
+        try:
+            response = self.get_response(request)
+        finally:
+            wrote = routers.end()
+        if wrote:
+            response.set_cookie(
+                self.COOKIE,
+                str(int(now + settings.REPLICA_STICKY_SECONDS)),
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
@@ -0,0 +1,68 @@
+import random
+import threading
+import typing
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Model
+
+# Состояние текущего запроса потока: можно ли читать с реплик
+# и была ли в запросе запись в основную базу.
+_local = threading.local()
+
+
+def begin(replica_reads: bool) -> None:
+    """Начало запроса: разрешает или запрещает чтение с реплик."""
+    _local.replica_reads = replica_reads
+    _local.wrote = False
+
+
+def read_primary() -> None:
+    """До конца запроса чтения идут в основную базу."""
+    _local.replica_reads = False
+
+
+def end() -> bool:
+    """Конец запроса: возвращает True, если запрос что-то записал."""
+    wrote = getattr(_local, 'wrote', False)
+    _local.replica_reads = False
+    _local.wrote = False
+    return wrote
+
+
+class PrimaryReplicaRouter:
+    """
+    Записи идут в основную базу default, чтения - в одну из реплик
+    DATABASE_REPLICAS, но только в запросах GET и HEAD, которым
+    ReplicaRoutingMiddleware разрешила чтение с реплик.
+    Запросы на изменение, запросы после записи этого же
+    пользователя (окно REPLICA_STICKY_SECONDS), чтения внутри
+    транзакции и все вне запросов (команды, задачи) читают
+    из основной базы.
+    """
+
+    def db_for_read(self, model: typing.Type[Model], **hints: dict) -> str:
+        replicas = settings.DATABASE_REPLICAS
+        if (
+            not replicas
+            or not getattr(_local, 'replica_reads', False)
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model: typing.Type[Model], **hints: dict) -> str:
+        # Чтения после записи в этом же запросе тоже идут в основную базу.
+        _local.wrote = True
+        _local.replica_reads = False
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1: Model, obj2: Model, **hints: dict) -> bool:
+        # Реплики - копии основной базы, связи между ними допустимы.
+        return True
+
+    def allow_migrate(
+        self, db: str, app_label: str, **hints: dict,
+    ) -> bool:
+        # Схема попадает на реплики вместе с данными при репликации.
+        return db == DEFAULT_DB_ALIAS
@@ -0,0 +1,162 @@
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+import typing
+from collections import Counter
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.utils import timezone
+
+from core.db import explain_query_plan
+
+logger = logging.getLogger('core.slowqueries')
+
+# View текущего запроса потока, например 'posts.views.profile'.
+_local = threading.local()
+
+UNKNOWN_VIEW: str = '-'
+
+NORMALIZE_RULES: tuple = (
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'(?<![\w."])-?\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'%s'), '?'),
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(...)'),
+    (re.compile(r'\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+'), '(...)'),
+    (re.compile(r'\s+'), ' '),
+)
+EXPLAINABLE = re.compile(r'^\s*(SELECT|WITH)\b', re.IGNORECASE)
+
+
+def activate(view: typing.Optional[str]) -> None:
+    _local.view = view
+
+
+def normalize(sql: str) -> str:
+    """
+    Приводит SQL к общему виду: значения и списки параметров
+    заменены знаками ?, лишние пробелы убраны. Запросы,
+    отличающиеся только значениями, получают один вид.
+    """
+    for pattern, replacement in NORMALIZE_RULES:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def fingerprint(normalized: str) -> str:
+    return hashlib.sha1(normalized.encode()).hexdigest()[:16]
+
+
+def params_shape(params: typing.Any, many: bool) -> typing.Any:
+    """
+    Типы параметров вместо значений, чтобы в журнал
+    не попадали данные пользователей.
+    Для executemany - число наборов и типы первого.
+    """
+    if many:
+        params = list(params or ())
+        return {
+            'rows': len(params),
+            'params': params_shape(params[0], False) if params else [],
+        }
+    if isinstance(params, dict):
+        return {key: type(value).__name__ for key, value in params.items()}
+    return [type(value).__name__ for value in params or ()]
+
+
+def explain(
+    connection: BaseDatabaseWrapper, sql: str, params: typing.Any,
+) -> typing.Optional[typing.List[str]]:
+    """
+    План медленного запроса; для других СУБД и запросов
+    кроме SELECT возвращает None.
+    """
+    if connection.vendor != 'sqlite' or not EXPLAINABLE.match(sql):
+        return None
+    try:
+        return explain_query_plan(connection, sql, params)
+    except DatabaseError as error:
+        return [f'EXPLAIN failed: {error}']
+
+
+def slow_query_logger(
+    execute: typing.Callable,
+    sql: str,
+    params: typing.Any,
+    many: bool,
+    context: dict,
+) -> typing.Any:
+    """
+    Обертка connection.execute_wrapper: запросы дольше
+    SLOW_QUERY_THRESHOLD_MS пишутся в журнал core.slowqueries
+    строкой JSON вместе с view и планом запроса.
+    """
+    threshold = settings.SLOW_QUERY_THRESHOLD_MS
+    if threshold is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    result = execute(sql, params, many, context)
+    duration = (time.perf_counter() - started) * 1000
+    if duration >= threshold:
+        connection = context['connection']
+        normalized = normalize(sql)
+        logger.warning(json.dumps({
+            'time': timezone.now().isoformat(),
+            'fingerprint': fingerprint(normalized),
+            'sql': normalized,
+            'params': params_shape(params, many),
+            'view': getattr(_local, 'view', None) or UNKNOWN_VIEW,
+            'alias': connection.alias,
+            'duration_ms': round(duration, 3),
+            'plan': None if many else explain(connection, sql, params),
+        }, ensure_ascii=False))
+    return result
+
+
+def install(connection: BaseDatabaseWrapper, **kwargs: dict) -> None:
+    """
+    Обработчик сигнала connection_created: ставит журнал
+    медленных запросов первой оберткой соединения.
+    Обертки из connection.execute_wrapper() снимаются с конца
+    списка, поэтому постоянная обертка им не мешает.
+    """
+    if slow_query_logger not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, slow_query_logger)
+
+
+def aggregate(lines: typing.Iterable[str]) -> typing.List[dict]:
+    """
+    Сводка журнала по видам запросов: число, суммарное, среднее
+    и наибольшее время, view и последний план.
+    Испорченные строки пропускаются.
+    """
+    groups = {}
+    for line in lines:
+        try:
+            entry = json.loads(line)
+            key = entry['fingerprint']
+            duration = float(entry['duration_ms'])
+        except (ValueError, TypeError, KeyError):
+            continue
+        group = groups.setdefault(key, {
+            'fingerprint': key,
+            'sql': entry.get('sql', ''),
+            'params': entry.get('params'),
+            'count': 0,
+            'total_ms': 0.0,
+            'max_ms': 0.0,
+            'views': Counter(),
+        })
+        group['count'] += 1
+        group['total_ms'] += duration
+        group['max_ms'] = max(group['max_ms'], duration)
+        group['views'][entry.get('view', UNKNOWN_VIEW)] += 1
+        if entry.get('plan'):
+            group['plan'] = entry['plan']
+    for group in groups.values():
+        group['avg_ms'] = group['total_ms'] / group['count']
+    return list(groups.values())
@@ -0,0 +1,28 @@
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+# Настройки, с которыми выполняются тесты: кэши не переносят
+# страницы из теста в тест, замеры времени запросов и журнал
+# медленных запросов выключены. Тесты кэша и замеров включают
+# их сами через override_settings.
+TEST_SETTINGS: dict = {
+    'CACHES': {
+        alias: {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}
+        for alias in ('default', 'feed_versions')
+    },
+    'SERVER_TIMING_SAMPLE_RATE': 0,
+    'SLOW_QUERY_THRESHOLD_MS': None,
+}
+
+
+class TestRunner(DiscoverRunner):
+    """Запускает manage.py test с настройками TEST_SETTINGS."""
+
+    def setup_test_environment(self, **kwargs: dict) -> None:
+        super().setup_test_environment(**kwargs)
+        self.test_settings = override_settings(**TEST_SETTINGS)
+        self.test_settings.enable()
+
+    def teardown_test_environment(self, **kwargs: dict) -> None:
+        self.test_settings.disable()
+        super().teardown_test_environment(**kwargs)
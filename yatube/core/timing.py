@@ -0,0 +1,95 @@
+import threading
+import time
+import typing
+from functools import wraps
+
+from django.template.backends.django import Template
+
+# Замеры текущего запроса потока; None, если запрос не замеряется.
+_local = threading.local()
+
+
+class RequestTiming:
+    """
+    Замеры одного запроса в секундах: весь запрос, view,
+    SQL-запросы (время и число) и отрисовка шаблонов.
+    """
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.total = 0.0
+        self.view_started = None
+        self.view = 0.0
+        self.sql = 0.0
+        self.queries = 0
+        self.template = 0.0
+        self.template_depth = 0
+
+    def __call__(
+        self,
+        execute: typing.Callable,
+        sql: str,
+        params: typing.Any,
+        many: bool,
+        context: dict,
+    ) -> typing.Any:
+        """Обертка connection.execute_wrapper: время и число SQL."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql += time.perf_counter() - started
+            self.queries += 1
+
+    @property
+    def middleware(self) -> float:
+        """Время вне view: middleware, разбор URL, обработчик."""
+        return max(self.total - self.view, 0.0)
+
+    def metrics(self) -> typing.Dict[str, float]:
+        """Замеры в миллисекундах для заголовка и лога."""
+        return {
+            'total': self.total * 1000,
+            'view': self.view * 1000,
+            'db': self.sql * 1000,
+            'tpl': self.template * 1000,
+            'mw': self.middleware * 1000,
+        }
+
+
+def activate(timing: typing.Optional[RequestTiming]) -> None:
+    _local.timing = timing
+
+
+def current() -> typing.Optional[RequestTiming]:
+    return getattr(_local, 'timing', None)
+
+
+def install_template_timing() -> None:
+    """
+    Оборачивает отрисовку шаблонов Django: время внешних вызовов
+    render (страница, карточки постов вне страницы) добавляется
+    к замерам текущего запроса. Вложенные вызовы, например
+    карточки внутри страницы, повторно не учитываются.
+    Вне замеряемого запроса обертка только читает thread-local.
+    """
+    render = Template.render
+    if getattr(render, 'timed', False):
+        return
+
+    @wraps(render)
+    def timed_render(self: Template, *args: tuple, **kwargs: dict) -> str:
+        timing = current()
+        if timing is None:
+            return render(self, *args, **kwargs)
+        timing.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return render(self, *args, **kwargs)
+        finally:
+            timing.template_depth -= 1
+            if not timing.template_depth:
+                timing.template += time.perf_counter() - started
+
+    timed_render.timed = True
+    Template.render = timed_render
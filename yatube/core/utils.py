@@ -1,13 +1,415 @@
-from django.core.paginator import Paginator
+import typing
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as DecodeError
+from collections.abc import Sequence
+
+from django.conf import settings
+from django.core.paginator import EmptyPage, Page, Paginator
+from django.db import connections
+from django.db.models import Model, Q, QuerySet
 from django.http import HttpRequest
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+from core.db import estimate_row_count
+
+CURSOR_AFTER: str = 'after'
+CURSOR_BEFORE: str = 'before'
+CURSOR_SEPARATOR: str = '|'
+
+
+def encode_cursor(obj: typing.Union[Model, dict]) -> str:
+    """
+    Упаковывает ключ записи (pub_date, id) в непрозрачный токен,
+    пригодный для передачи в параметрах ?after= и ?before=.
+    Запись может быть объектом модели или словарем из .values().
+    """
+    if isinstance(obj, dict):
+        pub_date, pk = obj['pub_date'], obj['id']
+    else:
+        pub_date, pk = obj.pub_date, obj.pk
+    raw = f'{pub_date.isoformat()}{CURSOR_SEPARATOR}{pk}'
+    return urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token: str) -> typing.Optional[tuple]:
+    """
+    Распаковывает токен курсора в пару (pub_date, id).
+    Для испорченного токена возвращает None.
+    """
+    try:
+        raw = urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode()
+        pub_date, pk = raw.rsplit(CURSOR_SEPARATOR, 1)
+        pub_date = parse_datetime(pub_date)
+        pk = int(pk)
+    except (DecodeError, UnicodeDecodeError, ValueError):
+        return None
+    if pub_date is None:
+        return None
+    return pub_date, pk
+
+
+class CursorPage(Sequence):
+    """
+    Страница курсорной пагинации.
+    Вместо номеров страниц хранит токены соседних страниц,
+    поэтому не требует ни COUNT(*), ни OFFSET.
+    """
+
+    is_cursor: bool = True
+
+    def __init__(
+        self,
+        object_list: list,
+        next_cursor: typing.Optional[str],
+        previous_cursor: typing.Optional[str],
+    ) -> None:
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self) -> str:
+        return f'<CursorPage after={self.next_cursor}>'
+
+    def __len__(self) -> int:
+        return len(self.object_list)
+
+    def __getitem__(self, index: typing.Union[int, slice]) -> typing.Any:
+        return self.object_list[index]
+
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    def has_previous(self) -> bool:
+        return self.previous_cursor is not None
+
+    def has_other_pages(self) -> bool:
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """
+    Пагинация по ключу (pub_date, id) в порядке убывания,
+    совпадающем с Post.Meta.ordering.
+    Каждая страница выбирается одним запросом с LIMIT,
+    глубина листания на стоимость запроса не влияет.
+    """
+
+    def __init__(self, queryset: QuerySet, per_page: int) -> None:
+        self.queryset = queryset
+        self.per_page = per_page
+
+    def get_page(
+        self,
+        after: typing.Optional[str] = None,
+        before: typing.Optional[str] = None,
+    ) -> CursorPage:
+        """
+        Возвращает страницу после токена after или перед токеном before.
+        Без токенов (или с испорченным токеном) - первую страницу.
+        """
+        key = decode_cursor(after or before or '')
+        if key is None:
+            return self._forward(self.queryset, has_previous=False)
+        pub_date, pk = key
+        if after:
+            return self._forward(
+                self.queryset.filter(
+                    Q(pub_date__lt=pub_date)
+                    | Q(pub_date=pub_date, pk__lt=pk),
+                ),
+                has_previous=True,
+            )
+        return self._backward(
+            self.queryset.filter(
+                Q(pub_date__gt=pub_date) | Q(pub_date=pub_date, pk__gt=pk),
+            ),
+        )
+
+    def _forward(self, queryset: QuerySet, has_previous: bool) -> CursorPage:
+        rows = list(
+            queryset.order_by('-pub_date', '-pk')[:self.per_page + 1],
+        )
+        has_next = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        return CursorPage(
+            rows,
+            encode_cursor(rows[-1]) if has_next else None,
+            encode_cursor(rows[0]) if has_previous and rows else None,
+        )
+
+    def _backward(self, queryset: QuerySet) -> CursorPage:
+        rows = list(
+            queryset.order_by('pub_date', 'pk')[:self.per_page + 1],
+        )
+        has_previous = len(rows) > self.per_page
+        rows = rows[:self.per_page][::-1]
+        return CursorPage(
+            rows,
+            encode_cursor(rows[-1]) if rows else None,
+            encode_cursor(rows[0]) if has_previous else None,
+        )
+
+
+class ChainedFeed:
+    """
+    Лента из двух выборок с одинаковым порядком, где все записи
+    первой идут раньше всех записей второй, например основная
+    таблица постов и архив более старых постов.
+    Поддерживает то, что нужно пагинаторам: filter, order_by,
+    срезы и count. Срез читает вторую выборку, только если
+    первой не хватило, поэтому страницы в пределах первой
+    выборки стоят одного запроса, как и без архива.
+
+    first_count: известное заранее число записей первой выборки;
+    без него оно считается, только если срез начинается
+    за пределами прочитанных записей первой выборки.
+    """
+
+    ordered: bool = True
+
+    def __init__(
+        self,
+        first: QuerySet,
+        second: QuerySet,
+        first_count: typing.Optional[int] = None,
+        reverse: bool = False,
+    ) -> None:
+        self.first = first
+        self.second = second
+        self.first_count = first_count
+        self.reverse = reverse
+
+    def filter(self, *args: tuple, **kwargs: dict) -> 'ChainedFeed':
+        return ChainedFeed(
+            self.first.filter(*args, **kwargs),
+            self.second.filter(*args, **kwargs),
+            reverse=self.reverse,
+        )
+
+    def order_by(self, *fields: str) -> 'ChainedFeed':
+        """
+        Сортировка обеих выборок; по возрастанию первого поля
+        выборки меняются местами (сначала старые записи).
+        """
+        return ChainedFeed(
+            self.first.order_by(*fields),
+            self.second.order_by(*fields),
+            self.first_count,
+            reverse=not fields[0].startswith('-'),
+        )
+
+    def count(self) -> int:
+        if self.first_count is None:
+            self.first_count = self.first.count()
+        return self.first_count + self.second.count()
+
+    def __getitem__(self, index: slice) -> list:
+        head, tail = self.first, self.second
+        head_count = self.first_count
+        if self.reverse:
+            head, tail = tail, head
+            head_count = None
+        start, stop = index.start or 0, index.stop
+        rows = list(head[start:stop])
+        if stop is not None and len(rows) == stop - start:
+            return rows
+        if rows or not start:
+            head_count = start + len(rows)
+        elif head_count is None:
+            head_count = head.count()
+        return rows + list(tail[
+            max(start - head_count, 0):
+            None if stop is None else stop - head_count
+        ])
 
 
-def paginate(queryset: list, request: HttpRequest, posts_limit: int) -> None:
+class CappedPage(Page):
+    """
+    Страница пагинатора с ограниченным подсчетом: наличие
+    следующей страницы известно по лишней выбранной записи,
+    а не по числу страниц.
+    """
+
+    def __init__(
+        self,
+        object_list: list,
+        number: int,
+        paginator: Paginator,
+        has_next: bool,
+    ) -> None:
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def has_next(self) -> bool:
+        return self._has_next
+
+
+class CountedPaginator(Paginator):
+    """
+    Пагинатор с ограниченной стоимостью подсчета и вывода страниц.
+
+    count: заранее известное число объектов (например,
+    денормализованный счетчик), чтобы не выполнять COUNT(*).
+    count_limit: если число объектов неизвестно, считаем не дальше
+    этого порога; при превышении count_capped становится True,
+    а номера страниц за порогом не выводятся.
+    on_each_side: число ссылок по обе стороны от текущей страницы.
+    """
+
+    def __init__(
+        self,
+        object_list: QuerySet,
+        per_page: int,
+        count: typing.Optional[int] = None,
+        count_limit: typing.Optional[int] = None,
+        on_each_side: int = 2,
+        **kwargs: dict,
+    ) -> None:
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_limit = count_limit
+        self.on_each_side = on_each_side
+        self.count_capped = False
+        if count is not None:
+            self.count = count
+
+    @cached_property
+    def count(self) -> int:
+        if self.count_limit is None or not isinstance(
+            self.object_list, QuerySet,
+        ):
+            return super().count
+        count = self.object_list.order_by()[:self.count_limit + 1].count()
+        if count > self.count_limit:
+            self.count_capped = True
+            return self.count_limit
+        return count
+
+    def validate_number(self, number: typing.Any) -> int:
+        """
+        При ограниченном подсчете номера за порогом допустимы:
+        есть ли на них посты, выясняет page.
+        """
+        try:
+            return super().validate_number(number)
+        except EmptyPage:
+            if not self.count_capped or int(number) < 1:
+                raise
+            return int(number)
+
+    def page(self, number: typing.Any) -> Page:
+        """
+        При ограниченном подсчете выбирает на одну запись больше
+        страницы, чтобы узнать, есть ли следующая.
+        """
+        number = self.validate_number(number)
+        if not self.count_capped:
+            return super().page(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage('That page contains no results')
+        return CappedPage(
+            rows[:self.per_page], number, self, len(rows) > self.per_page,
+        )
+
+    def get_page_window(self, number: int) -> list:
+        """
+        Возвращает номера страниц для вывода: первую, последнюю
+        и on_each_side соседних с текущей; пропуски обозначены None.
+        Для ограниченного подсчета последняя страница не выводится,
+        а окно доходит до текущей страницы, даже если она за порогом.
+        """
+        last = max(self.num_pages, number) if self.count_capped else (
+            self.num_pages
+        )
+        window = range(
+            max(number - self.on_each_side, 1),
+            min(number + self.on_each_side, last) + 1,
+        )
+        pages = sorted(
+            {1, *window} if self.count_capped else {1, last, *window},
+        )
+        result = []
+        for page in pages:
+            if result and page - result[-1] > 1:
+                result.append(None)
+            result.append(page)
+        return result
+
+    def get_page(self, number: typing.Any) -> Page:
+        page = super().get_page(number)
+        page.page_window = self.get_page_window(page.number)
+        return page
+
+
+class EstimatedCountPaginator(CountedPaginator):
+    """
+    Пагинатор для списков админки: для всей таблицы берет оценку
+    числа строк из статистики SQLite, для отфильтрованного
+    списка считает не дальше ADMIN_COUNT_LIMIT записей.
+    """
+
+    def __init__(
+        self,
+        object_list: QuerySet,
+        per_page: int,
+        orphans: int = 0,
+        allow_empty_first_page: bool = True,
+    ) -> None:
+        super().__init__(
+            object_list,
+            per_page,
+            count_limit=settings.ADMIN_COUNT_LIMIT,
+            orphans=orphans,
+            allow_empty_first_page=allow_empty_first_page,
+        )
+
+    @cached_property
+    def count(self) -> int:
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimate_row_count(
+                connections[queryset.db], queryset.model._meta.db_table,
+            )
+            if estimate is not None:
+                self.count_capped = True
+                return estimate
+        return super().count
+
+
+def paginate(
+    queryset: typing.Union[QuerySet, ChainedFeed],
+    request: HttpRequest,
+    posts_limit: int,
+    count: typing.Optional[int] = None,
+) -> typing.Union[Page, CursorPage]:
     """
     Функция постраничного разделения в зависимости
     от объемов входящей информации,
     вынесена в отдельную область.
+
+    Если в запросе передан токен ?after= или ?before=,
+    используется курсорная пагинация, иначе - постраничная по ?page=;
+    у страницы в next_cursor токен следующей курсорной страницы.
+    count: известное заранее число объектов вместо COUNT(*).
     """
-    paginator = Paginator(queryset, posts_limit)
+    after = request.GET.get(CURSOR_AFTER)
+    before = request.GET.get(CURSOR_BEFORE)
+    if after or before:
+        return CursorPaginator(queryset, posts_limit).get_page(after, before)
+    paginator = CountedPaginator(
+        queryset,
+        posts_limit,
+        count,
+        count_limit=settings.PAGINATOR_COUNT_LIMIT,
+        on_each_side=settings.PAGINATOR_ON_EACH_SIDE,
+    )
     page_number = request.GET.get('page')
-    return paginator.get_page(page_number)
+    page = paginator.get_page(page_number)
+    # Ссылка на следующую страницу ведет на курсор после последнего
+    # поста, чтобы листание ленты не доходило до OFFSET по ?page=.
+    page.next_cursor = (
+        encode_cursor(page[len(page) - 1]) if page.has_next() else None
+    )
+    return page
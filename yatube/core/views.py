@@ -0,0 +1,30 @@
+import hmac
+
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse, HttpResponseForbidden
+from django.views.decorators.http import require_safe
+
+from core import metrics
+
+PROMETHEUS_CONTENT_TYPE: str = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+@require_safe
+def metrics_view(request: HttpRequest) -> HttpResponse:
+    """
+    Метрики всех рабочих процессов в текстовом формате Prometheus.
+    Доступны только с заголовком Authorization: Bearer METRICS_TOKEN:
+    за обратным прокси адрес клиента у всех запросов один и тот же.
+    Без METRICS_TOKEN метрики недоступны.
+    """
+    token = settings.METRICS_TOKEN
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    if not token or not hmac.compare_digest(
+        header.encode(), f'Bearer {token}'.encode(),
+    ):
+        return HttpResponseForbidden()
+    metrics.flush(force=True)
+    return HttpResponse(
+        metrics.render(metrics.collect()),
+        content_type=PROMETHEUS_CONTENT_TYPE,
+    )
@@ -1,7 +1,105 @@
-from django.contrib import admin
+import typing
+
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME, ActionForm
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.exceptions import ValidationError
+from django.db.models import QuerySet
+from django.db.models.functions import Substr
+from django.http import HttpRequest, HttpResponse, StreamingHttpResponse
+from django.shortcuts import render
+from django.template.defaultfilters import truncatechars
 
 from core.admin import BaseAdmin
+from core.utils import EstimatedCountPaginator
+from posts import bulk, exports
 from posts.models import Group, Post
+from posts.search import search_ids
+
+
+class GroupActionForm(ActionForm):
+    """
+    Форма массовых действий с выбором группы назначения.
+    Группа выбирается поиском, как в autocomplete_fields:
+    в панели действий не выводится список всех групп.
+    """
+
+    group = forms.ModelChoiceField(
+        Group.objects.all(),
+        required=False,
+        label='Группа',
+        widget=AutocompleteSelect(
+            Post._meta.get_field('group').remote_field, admin.site,
+        ),
+    )
+
+
+class PostActionForm(GroupActionForm):
+    """Форма действий над постами: группа и сжатие выгрузки."""
+
+    compress = forms.BooleanField(required=False, label='gzip')
+
+
+def export_response(
+    request: HttpRequest,
+    queryset: QuerySet,
+    fmt: str,
+) -> StreamingHttpResponse:
+    """
+    Отдает выгрузку постов потоком, не собирая ее в памяти.
+    Сжатие gzip включается флажком в форме действия.
+    """
+    compress = PostActionForm.base_fields['compress'].clean(
+        request.POST.get('compress'),
+    )
+    response = StreamingHttpResponse(
+        exports.export_posts(queryset, fmt, compress),
+        content_type=(
+            exports.GZIP_CONTENT_TYPE if compress
+            else exports.CONTENT_TYPES[fmt]
+        ),
+    )
+    filename = f'posts.{fmt}.gz' if compress else f'posts.{fmt}'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def run_bulk(
+    modeladmin: admin.ModelAdmin,
+    request: HttpRequest,
+    progress: typing.Iterator[int],
+    message: str,
+) -> None:
+    """
+    Выполняет массовое действие пачка за пачкой
+    и сообщает число обработанных объектов и пачек.
+    """
+    done = chunks = 0
+    for chunks, done in enumerate(progress, 1):
+        pass
+    modeladmin.message_user(
+        request, message.format(done=done, chunks=chunks), messages.SUCCESS,
+    )
+
+
+def get_target_group(
+    modeladmin: admin.ModelAdmin,
+    request: HttpRequest,
+) -> typing.Optional[Group]:
+    """Группа назначения из формы действия или None с ошибкой."""
+    try:
+        group = GroupActionForm.base_fields['group'].clean(
+            request.POST.get('group'),
+        )
+    except ValidationError:
+        group = None
+    if group is not None:
+        return group
+    modeladmin.message_user(
+        request, 'Выберите группу для действия.', messages.ERROR,
+    )
+    return None
 
 
 @admin.register(Post)
@@ -9,17 +107,147 @@ class PostAdmin(BaseAdmin):
     """
     Настройки отображения модели 'Статьи' в интерфейсе админки.
 
-    list_display: перечисляем поля, которые должны отображаться.
-    list_editable: опция для измнения поля group в любом посте.
-    search_fields: интерфейс для поиска по тексту постов.
+    list_display: перечисляем поля, которые должны отображаться,
+    в списке вместо полного текста выводится его начало.
+    list_select_related: автор и группа загружаются одним запросом.
+    search_fields: интерфейс для поиска по тексту постов,
+    поиск выполняется по полнотекстовому индексу posts_post_fts.
     list_filter: фильтрация по дате.
+    date_hierarchy: навигация по датам публикации.
+    autocomplete_fields: автор и группа выбираются поиском,
+    а не из списка всех пользователей и групп.
+    paginator: оценка числа записей вместо полного подсчета.
+    show_full_result_count: не считать все записи таблицы
+    при поиске и фильтрации.
+    actions: перенос в группу, удаление группы у постов и удаление
+    выполняются пачками UPDATE/DELETE, счетчики и кэш
+    обновляются один раз на пачку; выгрузка в CSV и JSONL
+    отдается потоком.
     empty_value_display: вывод в поле текста '-пусто',
     если информация отсутствует.
     """
 
+    TEXT_PREVIEW_LENGTH: int = 80
+    DELETE_CONFIRMATION_TEMPLATE: str = (
+        'admin/posts/post/bulk_delete_confirmation.html'
+    )
+
     list_display = ('pk', 'text', 'pub_date', 'author', 'group')
+    list_select_related = ('author', 'group')
     search_fields = ('text',)
     list_filter = ('pub_date',)
+    date_hierarchy = 'pub_date'
+    autocomplete_fields = ('author', 'group')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    action_form = PostActionForm
+    actions = (
+        'move_to_group', 'clear_group', 'delete_posts',
+        'export_csv', 'export_jsonl',
+    )
+
+    def get_actions(self, request: HttpRequest) -> dict:
+        """
+        Стандартное удаление собирает и удаляет посты по одному,
+        его заменяет пакетное delete_posts.
+        """
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+    def move_to_group(self, request: HttpRequest, queryset: QuerySet) -> None:
+        group = get_target_group(self, request)
+        if group is not None:
+            run_bulk(
+                self, request, bulk.move_posts(queryset, group),
+                f'Перенесено в группу «{group}» постов: {{done}} '
+                '(пачек: {chunks}).',
+            )
+
+    move_to_group.short_description = 'Перенести в группу'
+    move_to_group.allowed_permissions = ('change',)
+
+    def clear_group(self, request: HttpRequest, queryset: QuerySet) -> None:
+        run_bulk(
+            self, request, bulk.move_posts(queryset, None),
+            'Убрана группа у постов: {done} (пачек: {chunks}).',
+        )
+
+    clear_group.short_description = 'Убрать группу'
+    clear_group.allowed_permissions = ('change',)
+
+    def delete_posts(
+        self, request: HttpRequest, queryset: QuerySet,
+    ) -> typing.Optional[HttpResponse]:
+        """
+        Показывает число удаляемых постов и после подтверждения
+        удаляет их пачками.
+        """
+        if request.POST.get('post'):
+            run_bulk(
+                self, request, bulk.delete_posts(queryset),
+                'Удалено постов: {done} (пачек: {chunks}).',
+            )
+            return None
+        return render(request, self.DELETE_CONFIRMATION_TEMPLATE, {
+            **self.admin_site.each_context(request),
+            'title': 'Удаление постов',
+            'opts': self.model._meta,
+            'total': queryset.count(),
+            'selected': request.POST.getlist(ACTION_CHECKBOX_NAME),
+            'select_across': request.POST.get('select_across', '0'),
+            'action_checkbox_name': ACTION_CHECKBOX_NAME,
+        })
+
+    delete_posts.short_description = 'Удалить выбранные посты'
+    delete_posts.allowed_permissions = ('delete',)
+
+    def export_csv(
+        self, request: HttpRequest, queryset: QuerySet,
+    ) -> StreamingHttpResponse:
+        return export_response(request, queryset, 'csv')
+
+    export_csv.short_description = 'Выгрузить в CSV'
+    export_csv.allowed_permissions = ('view',)
+
+    def export_jsonl(
+        self, request: HttpRequest, queryset: QuerySet,
+    ) -> StreamingHttpResponse:
+        return export_response(request, queryset, 'jsonl')
+
+    export_jsonl.short_description = 'Выгрузить в JSONL'
+    export_jsonl.allowed_permissions = ('view',)
+
+    def get_queryset(self, request: HttpRequest) -> QuerySet:
+        """
+        В списке постов загружается только начало текста.
+        """
+        queryset = super().get_queryset(request)
+        if request.resolver_match.url_name != 'posts_post_changelist':
+            return queryset
+        return queryset.defer('text').annotate(
+            text_preview=Substr('text', 1, self.TEXT_PREVIEW_LENGTH + 1),
+        )
+
+    def get_list_display(self, request: HttpRequest) -> tuple:
+        """Колонка text в списке заменяется началом текста."""
+        return tuple(
+            'text_preview' if name == 'text' else name
+            for name in super().get_list_display(request)
+        )
+
+    def text_preview(self, obj: Post) -> str:
+        return truncatechars(obj.text_preview, self.TEXT_PREVIEW_LENGTH)
+
+    text_preview.short_description = 'текст поста'
+
+    def get_search_results(
+        self, request: HttpRequest, queryset: QuerySet, search_term: str,
+    ) -> typing.Tuple[QuerySet, bool]:
+        """Ищет по полнотекстовому индексу вместо LIKE '%term%'."""
+        if not search_term.strip():
+            return queryset, False
+        return queryset.filter(pk__in=search_ids(search_term)), False
 
 
 @admin.register(Group)
@@ -29,13 +257,34 @@ class GroupAdmin(admin.ModelAdmin):
 
     list_display: перечисляем поля, которые должны отображаться.
     list_editable: опция для измнения поля заголовка в любом посте.
-    search_fields: интерфейс для поиска группы по уникальному номеру.
-    list_filter: фильтрация по заголовку.
+    search_fields: интерфейс для поиска группы по названию и адресу,
+    используется и для автодополнения группы в постах.
+    paginator: оценка числа записей вместо полного подсчета.
+    actions: слияние выбранных групп с группой из формы действия.
     empty_value_display: вывод в поле текста '-пусто',
     если информация отсутствует.
     """
 
-    list_display = ('pk', 'title')
+    list_display = ('pk', 'title', 'slug', 'post_count')
     list_editable = ('title',)
-    search_fields = ('pk',)
-    list_filter = ('title',)
+    search_fields = ('title', 'slug')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    action_form = GroupActionForm
+    actions = ('merge_groups',)
+
+    def merge_groups(self, request: HttpRequest, queryset: QuerySet) -> None:
+        """
+        Переносит посты выбранных групп в группу из формы действия
+        и удаляет опустевшие группы.
+        """
+        group = get_target_group(self, request)
+        if group is not None:
+            run_bulk(
+                self, request, bulk.merge_groups(queryset, group),
+                f'В группу «{group}» перенесено постов: {{done}} '
+                '(пачек: {chunks}).',
+            )
+
+    merge_groups.short_description = 'Объединить в группу'
+    merge_groups.allowed_permissions = ('change', 'delete')
@@ -6,3 +6,7 @@ class PostsConfig(AppConfig):
 
     name = 'posts'
     verbose_name = 'посты'
+
+    def ready(self) -> None:
+        """Подключает обработчики сигналов счетчиков постов."""
+        import posts.signals  # noqa: F401
@@ -0,0 +1,228 @@
+import logging
+import typing
+from collections import Counter
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import Count, F, Max, QuerySet
+from django.utils import timezone
+
+from posts.cache import expire_post_feeds
+from posts.counters import change_post_count, recount_groups
+from posts.models import ArchivedPost, Group, Post, TimelineEntry
+from posts.timeline import fan_out, move_group_follows
+
+logger = logging.getLogger(__name__)
+
+
+def _chunks(queryset: QuerySet) -> typing.Iterator[typing.List[int]]:
+    """
+    Разбивает выборку на пачки id постов по BULK_CHUNK_SIZE.
+    Пачки выбираются по ключу id без OFFSET, поэтому посты,
+    которые обработка убрала из выборки, не сдвигают следующие пачки.
+    """
+    ids = queryset.order_by('pk').values_list('pk', flat=True)
+    last = 0
+    while True:
+        chunk = list(ids.filter(pk__gt=last)[:settings.BULK_CHUNK_SIZE])
+        if not chunk:
+            return
+        yield chunk
+        last = chunk[-1]
+
+
+def _count_by(pks: typing.List[int], field: str) -> typing.Dict[int, int]:
+    """Число постов пачки по каждому значению поля field."""
+    return dict(
+        Post.objects.filter(pk__in=pks)
+        .order_by()
+        .values_list(field)
+        .annotate(total=Count('pk')),
+    )
+
+
+def _expire(
+    author_ids: typing.Iterable[int],
+    group_ids: typing.Iterable[typing.Optional[int]],
+) -> None:
+    """Сбрасывает ленты авторов и групп пачки после фиксации транзакции."""
+    author_ids, group_ids = set(author_ids), set(group_ids)
+    transaction.on_commit(lambda: expire_post_feeds(author_ids, group_ids))
+
+
+def _insert_raw(posts: typing.List[Post]) -> None:
+    """
+    Вставляет посты так же, как loaddata: raw-вставка не вызывает
+    pre_save полей, поэтому auto_now_add не заменяет заданную
+    pub_date, а общее для всех потоков описание модели
+    на время вставки не меняется. Пачки - как у bulk_create.
+    """
+    fields = [
+        field for field in Post._meta.concrete_fields
+        if not field.primary_key
+    ]
+    using = router.db_for_write(Post)
+    batch_size = max(
+        connections[using].ops.bulk_batch_size(fields, posts), 1,
+    )
+    for start in range(0, len(posts), batch_size):
+        Post.objects._insert(
+            posts[start:start + batch_size], fields, raw=True, using=using,
+        )
+
+
+def create_posts(posts: typing.List[Post]) -> int:
+    """
+    Вставляет посты пачками в транзакции.
+    Пост без даты публикации получает текущее время.
+    Счетчики сдвигаются один раз на автора и группу пачки,
+    посты рассылаются в ленты подписок в той же транзакции,
+    ленты сбрасываются после ее фиксации.
+    """
+    now = timezone.now()
+    for post in posts:
+        post.pub_date = post.pub_date or now
+        post.updated_at = post.updated_at or now
+    authors = Counter(post.author_id for post in posts)
+    groups = Counter(post.group_id for post in posts)
+    with transaction.atomic():
+        last = Post.objects.aggregate(last=Max('pk'))['last'] or 0
+        _insert_raw(posts)
+        fan_out(last + 1)
+        for author_id, total in authors.items():
+            change_post_count(author_id, None, total)
+        for group_id, total in groups.items():
+            change_post_count(None, group_id, total)
+        _expire(authors, groups)
+    return len(posts)
+
+
+def move_posts(
+    queryset: QuerySet,
+    group: typing.Optional[Group],
+) -> typing.Iterator[int]:
+    """
+    Переносит посты выборки в группу group (None - убирает группу)
+    пачками по одному UPDATE на пачку.
+    Счетчики групп сдвигаются один раз на группу в пачке,
+    версии постов увеличиваются, ленты сбрасываются после пачки.
+    Отдает число обработанных постов после каждой пачки.
+    """
+    group_id = group.pk if group is not None else None
+    if group_id is None:
+        queryset = queryset.filter(group__isnull=False)
+    else:
+        queryset = queryset.exclude(group_id=group_id)
+    done = 0
+    for chunk in _chunks(queryset):
+        with transaction.atomic():
+            old_groups = _count_by(chunk, 'group_id')
+            authors = _count_by(chunk, 'author_id')
+            moved = Post.objects.filter(pk__in=chunk).update(
+                group_id=group_id,
+                version=F('version') + 1,
+                updated_at=timezone.now(),
+            )
+            for old_group, total in old_groups.items():
+                change_post_count(None, old_group, -total)
+            change_post_count(None, group_id, moved)
+            _expire(authors, [*old_groups, group_id])
+        done += moved
+        logger.info('Перенесено постов: %s', done)
+        yield done
+
+
+def delete_posts(queryset: QuerySet) -> typing.Iterator[int]:
+    """
+    Удаляет посты выборки пачками по одному DELETE на пачку.
+    Сигналы post_delete для отдельных постов не отправляются,
+    вместо них счетчики авторов и групп сдвигаются один раз
+    на автора и группу в пачке.
+    Отдает число удаленных постов после каждой пачки.
+    """
+    done = 0
+    for chunk in _chunks(queryset):
+        with transaction.atomic():
+            groups = _count_by(chunk, 'group_id')
+            authors = _count_by(chunk, 'author_id')
+            # _raw_delete выполняет DELETE без сбора объектов
+            # и без сигналов; на посты ссылаются только ленты подписок.
+            TimelineEntry.objects.filter(post_id__in=chunk)._raw_delete(
+                queryset.db,
+            )
+            deleted = Post.objects.filter(pk__in=chunk)._raw_delete(
+                queryset.db,
+            )
+            for author_id, total in authors.items():
+                change_post_count(author_id, None, -total)
+            for group_id, total in groups.items():
+                change_post_count(None, group_id, -total)
+            _expire(authors, groups)
+        done += deleted
+        logger.info('Удалено постов: %s', done)
+        yield done
+
+
+def archive_posts(queryset: QuerySet) -> typing.Iterator[int]:
+    """
+    Переносит посты выборки в архив (ArchivedPost) с теми же id
+    пачками: одна вставка и один DELETE на пачку в транзакции.
+    post_count не меняется - он учитывает и архив,
+    archived_count авторов и групп сдвигается один раз на пачку.
+    Ленты групп и профилей не сбрасываются: profile и group_list
+    продолжаются в архиве и выглядят так же. Главная сбрасывается:
+    архивные посты из нее уходят. Из лент подписок архивные
+    посты убираются: они строятся только по основной таблице.
+    Отдает число перенесенных постов после каждой пачки.
+    """
+    done = 0
+    for chunk in _chunks(queryset):
+        with transaction.atomic():
+            groups = _count_by(chunk, 'group_id')
+            authors = _count_by(chunk, 'author_id')
+            ArchivedPost.objects.bulk_create(
+                ArchivedPost(id=row.pop('pk'), **row)
+                for row in Post.objects.filter(pk__in=chunk).values(
+                    'pk', 'text', 'pub_date', 'updated_at',
+                    'author_id', 'group_id', 'version',
+                )
+            )
+            TimelineEntry.objects.filter(post_id__in=chunk)._raw_delete(
+                queryset.db,
+            )
+            archived = Post.objects.filter(pk__in=chunk)._raw_delete(
+                queryset.db,
+            )
+            for author_id, total in authors.items():
+                change_post_count(author_id, None, total, 'archived_count')
+            for group_id, total in groups.items():
+                change_post_count(None, group_id, total, 'archived_count')
+            _expire((), ())
+        done += archived
+        logger.info('Перенесено в архив постов: %s', done)
+        yield done
+
+
+def merge_groups(
+    queryset: QuerySet,
+    target: Group,
+) -> typing.Iterator[int]:
+    """
+    Переносит все посты групп выборки, в том числе архивные,
+    и подписки на них в группу target, после чего удаляет
+    опустевшие группы.
+    Отдает число перенесенных постов после каждой пачки.
+    """
+    sources = queryset.exclude(pk=target.pk)
+    yield from move_posts(Post.objects.filter(group__in=sources), target)
+    with transaction.atomic():
+        archived = ArchivedPost.objects.filter(group__in=sources).update(
+            group_id=target.pk, version=F('version') + 1,
+        )
+        if archived:
+            change_post_count(None, target.pk, archived)
+            change_post_count(None, target.pk, archived, 'archived_count')
+            _expire((), (target.pk,))
+        move_group_follows(sources, target)
+        recount_groups((target.pk,))
+        sources.delete()
@@ -0,0 +1,80 @@
+import typing
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import SafeText, mark_safe
+
+from core import metrics
+from core.cache import expire_feeds
+from posts.models import Group, Post, User
+
+CARD_TEMPLATE: str = 'posts/includes/post_card.html'
+
+INDEX_FEED: str = 'index'
+GROUP_FEED: str = 'group:{slug}'
+PROFILE_FEED: str = 'profile:{username}'
+SITEMAP_FEED: str = 'sitemap'
+
+
+def card_key(post: Post) -> str:
+    """Ключ кэша карточки: id поста и его версия."""
+    return f'post_card:{post.pk}:{post.version}'
+
+
+def render_cards(
+    posts: typing.Iterable[Post],
+    author: typing.Optional[User] = None,
+) -> typing.List[typing.Tuple[Post, SafeText]]:
+    """
+    Возвращает пары (пост, html карточки).
+    Все карточки страницы читаются из кэша одним get_many,
+    отсутствующие рендерятся и сохраняются одним set_many.
+    author: общий автор постов ленты profile, чтобы при рендере
+    не загружать автора каждого поста отдельным запросом.
+    """
+    posts = list(posts)
+    keys = [card_key(post) for post in posts]
+    cards = cache.get_many(keys)
+    missing = {}
+    for post, key in zip(posts, keys):
+        if key in cards:
+            continue
+        if author is not None:
+            post.author = author
+        missing[key] = render_to_string(CARD_TEMPLATE, {'post': post})
+    metrics.record_cache('card', len(posts) - len(missing), len(missing))
+    if missing:
+        cache.set_many(missing, settings.POST_CARD_CACHE_TIMEOUT)
+        cards.update(missing)
+    return [(post, mark_safe(cards[key])) for post, key in zip(posts, keys)]
+
+
+def expire_post_feeds(
+    author_ids: typing.Iterable[int],
+    group_ids: typing.Iterable[typing.Optional[int]],
+    extra_feeds: typing.Iterable[str] = (),
+) -> None:
+    """
+    Сбрасывает закэшированные страницы лент, в которых
+    появляются посты перечисленных авторов и групп:
+    главную, ленты групп и профили авторов, а также индекс карты сайта.
+    extra_feeds: ленты, которые уже не найти по id, например
+    по прежнему slug группы или username удаленного автора.
+    """
+    feeds = [INDEX_FEED, SITEMAP_FEED, *extra_feeds]
+    group_ids = {pk for pk in group_ids if pk is not None}
+    if group_ids:
+        feeds.extend(
+            GROUP_FEED.format(slug=slug)
+            for slug in Group.objects.filter(pk__in=group_ids).values_list(
+                'slug', flat=True,
+            )
+        )
+    feeds.extend(
+        PROFILE_FEED.format(username=username)
+        for username in User.objects.filter(
+            pk__in=set(author_ids),
+        ).values_list('username', flat=True)
+    )
+    expire_feeds(feeds)
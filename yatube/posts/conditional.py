@@ -0,0 +1,132 @@
+import datetime
+import typing
+
+from django.db.models import (
+    BooleanField, Max, OuterRef, QuerySet, Subquery, Value,
+)
+from django.http import HttpRequest
+
+from core.cache import peek_feed_version
+from posts.cache import INDEX_FEED
+from posts.models import ArchivedPost, Group, Post, User
+from posts.sitemaps import (
+    SECTIONS, file_modified, pregenerated_path, shard_filename,
+)
+
+PageState = typing.Tuple[typing.Optional[datetime.datetime], str]
+
+# Ключ сессии с номером версии подписок пользователя.
+FOLLOW_VERSION: str = 'follow_version'
+
+
+def _make_state(
+    request: HttpRequest,
+    updated_at: typing.Optional[datetime.datetime],
+    marker: typing.Any,
+) -> PageState:
+    """
+    Собирает валидаторы страницы. В ETag входит пользователь,
+    так как шапка страницы зависит от него, версия его подписок,
+    от которой зависят кнопки подписки, и marker - счетчик постов
+    или версия ленты, чтобы удаление поста тоже меняло ETag.
+    """
+    stamp = updated_at.timestamp() if updated_at else 0
+    version = request.session.get(FOLLOW_VERSION, 0)
+    return updated_at, f'{stamp}-{marker}-{request.user.pk}-{version}'
+
+
+def _last_update(posts: QuerySet) -> Subquery:
+    """
+    Подзапрос с последним updated_at постов: одна точечная
+    выборка по индексу (фильтр, updated_at), без просмотра ленты.
+    """
+    return Subquery(
+        posts.order_by('-updated_at').values('updated_at')[:1],
+    )
+
+
+def index_state(request: HttpRequest) -> PageState:
+    """
+    Последнее изменение берется из индекса post_updated_idx,
+    а удаление постов отмечает версия главной в кэше:
+    она меняется при каждой записи, затрагивающей главную.
+    Версия читается без создания, поэтому без кэша
+    или после вытеснения она просто пустая.
+    """
+    updated_at = Post.objects.order_by().aggregate(
+        updated_at=Max('updated_at'),
+    )['updated_at']
+    marker = peek_feed_version(INDEX_FEED)
+    return _make_state(request, updated_at, marker)
+
+
+def _counted_state(
+    request: HttpRequest, owner: QuerySet, posts: QuerySet, count: str,
+) -> PageState:
+    """
+    Последнее изменение постов ленты и хранимый счетчик
+    ее постов count одним запросом к владельцу ленты.
+    """
+    state = owner.values_list(count, _last_update(posts)).first()
+    if state is None:
+        return _make_state(request, None, None)
+    total, updated_at = state
+    return _make_state(request, updated_at, total)
+
+
+def group_state(request: HttpRequest, slug: str) -> PageState:
+    return _counted_state(
+        request,
+        Group.objects.filter(slug=slug),
+        Post.objects.filter(group=OuterRef('pk')),
+        'post_count',
+    )
+
+
+def profile_state(request: HttpRequest, username: str) -> PageState:
+    return _counted_state(
+        request,
+        User.objects.filter(username=username),
+        Post.objects.filter(author=OuterRef('pk')),
+        'profile__post_count',
+    )
+
+
+def post_state(request: HttpRequest, post_id: int) -> PageState:
+    """
+    Последнее изменение поста и счетчик постов его автора,
+    который тоже выводится на странице поста.
+    Пост ищется в основной таблице и в архиве одним запросом;
+    request.post_archived сообщает view, в какой таблице он нашелся.
+    """
+    fields = ('updated_at', 'author__profile__post_count', 'archived')
+    rows = [
+        model.objects.filter(pk=post_id).order_by().annotate(
+            archived=Value(archived, output_field=BooleanField()),
+        ).values_list(*fields)
+        for model, archived in ((Post, False), (ArchivedPost, True))
+    ]
+    state = next(iter(rows[0].union(rows[1], all=True)[:1]), None)
+    if state is None:
+        return _make_state(request, None, None)
+    updated_at, post_count, request.post_archived = state
+    return _make_state(request, updated_at, post_count)
+
+
+def sitemap_shard_state(
+    request: HttpRequest, section: str, number: int,
+) -> PageState:
+    """
+    Дата изменения части карты сайта: время сборки файла,
+    если часть собрана заранее, иначе последнее изменение
+    ее объектов. Для пустой или неизвестной части - (None, None).
+    """
+    path = pregenerated_path(shard_filename(section, number))
+    if path is not None:
+        return file_modified(path), None
+    if section not in SECTIONS:
+        return None, None
+    exists, modified = SECTIONS[section].shard_lastmod(number)
+    if not exists:
+        return None, None
+    return modified, f'{modified.timestamp() if modified else 0}'
@@ -0,0 +1,136 @@
+import typing
+
+from django.db.models import Count, F, Model, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from posts.models import ArchivedPost, Follow, Group, Post, Profile, User
+
+
+def change_post_count(
+    author_id: typing.Optional[int],
+    group_id: typing.Optional[int],
+    delta: int,
+    field: str = 'post_count',
+) -> None:
+    """
+    Сдвигает счетчики постов автора и группы на delta
+    одним UPDATE на каждую таблицу, без чтения текущего значения.
+    field: какой счетчик сдвигать: post_count, archived_count
+    или follower_count.
+    Профиль, которого нет (пользователь создан без сигнала
+    post_save, например через bulk_create), при увеличении счетчика
+    создается пересчетом: вызовы идут после изменения данных.
+    """
+    if author_id is not None:
+        updated = Profile.objects.filter(user_id=author_id).update(
+            **{field: F(field) + delta},
+        )
+        if not updated and delta > 0:
+            recount_authors((author_id,))
+    if group_id is not None:
+        Group.objects.filter(pk=group_id).update(
+            **{field: F(field) + delta},
+        )
+
+
+def _post_count(
+    field: str, outer: str = 'pk', model: typing.Type[Model] = Post,
+) -> Coalesce:
+    """
+    Подзапрос с фактическим числом записей model (постов
+    или подписок), у которых внешний ключ field совпадает
+    с полем outer внешней записи.
+    """
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{field: OuterRef(outer)})
+            .order_by()
+            .values(field)
+            .annotate(total=Count('pk'))
+            .values('total'),
+        ),
+        0,
+    )
+
+
+def _actual_counts(field: str, outer: str = 'pk') -> dict:
+    """Фактические post_count (с архивом) и archived_count."""
+    return {
+        'post_count': (
+            _post_count(field, outer)
+            + _post_count(field, outer, ArchivedPost)
+        ),
+        'archived_count': _post_count(field, outer, ArchivedPost),
+    }
+
+
+def recount_groups(
+    group_ids: typing.Optional[typing.Iterable[int]] = None,
+) -> int:
+    """
+    Пересчитывает счетчики постов и подписчиков групп (всех
+    или перечисленных) и возвращает число исправленных записей.
+    """
+    groups = Group.objects.all()
+    if group_ids is not None:
+        groups = groups.filter(pk__in=list(group_ids))
+    counts = {
+        **_actual_counts('group'),
+        'follower_count': _post_count('group', model=Follow),
+    }
+    stale = groups.annotate(
+        actual=counts['post_count'],
+        archived=counts['archived_count'],
+        follows=counts['follower_count'],
+    ).exclude(
+        post_count=F('actual'),
+        archived_count=F('archived'),
+        follower_count=F('follows'),
+    )
+    return Group.objects.filter(pk__in=stale.values('pk')).update(**counts)
+
+
+def recount_authors(
+    author_ids: typing.Optional[typing.Iterable[int]] = None,
+) -> int:
+    """
+    Создает недостающие профили и пересчитывает счетчики постов
+    и подписчиков авторов (всех или перечисленных),
+    возвращает число исправленных записей.
+    """
+    users = User.objects.filter(profile__isnull=True)
+    profiles = Profile.objects.all()
+    if author_ids is not None:
+        author_ids = list(author_ids)
+        users = users.filter(pk__in=author_ids)
+        profiles = profiles.filter(user_id__in=author_ids)
+    Profile.objects.bulk_create(
+        Profile(user_id=pk) for pk in users.values_list('pk', flat=True)
+    )
+    counts = {
+        **_actual_counts('author', 'user_id'),
+        'follower_count': _post_count('author', 'user_id', Follow),
+    }
+    stale = profiles.annotate(
+        actual=counts['post_count'],
+        archived=counts['archived_count'],
+        follows=counts['follower_count'],
+    ).exclude(
+        post_count=F('actual'),
+        archived_count=F('archived'),
+        follower_count=F('follows'),
+    )
+    return Profile.objects.filter(pk__in=stale.values('pk')).update(**counts)
+
+
+def author_profile(user: User) -> Profile:
+    """
+    Профиль автора. Недостающий профиль создается
+    с пересчитанными счетчиками.
+    """
+    try:
+        return user.profile
+    except Profile.DoesNotExist:
+        recount_authors((user.pk,))
+        user.profile = Profile.objects.get(user=user)
+        return user.profile
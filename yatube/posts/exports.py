@@ -0,0 +1,106 @@
+import csv
+import json
+import typing
+import zlib
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import QuerySet
+
+FORMATS: tuple = ('csv', 'jsonl')
+CONTENT_TYPES: dict = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+GZIP_CONTENT_TYPE: str = 'application/gzip'
+
+# Поля выгрузки совпадают с полями import_posts.
+FIELDS: tuple = ('id', 'text', 'author', 'group', 'pub_date')
+_COLUMNS: tuple = ('pk', 'text', 'author__username', 'group__slug', 'pub_date')
+
+
+class _Echo:
+    """Буфер для csv.writer, возвращающий записанную строку."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def filter_posts(
+    queryset: QuerySet,
+    group: typing.Optional[str] = None,
+    author: typing.Optional[str] = None,
+    since: typing.Optional[datetime] = None,
+    until: typing.Optional[datetime] = None,
+) -> QuerySet:
+    """Отбирает посты по slug группы, username автора и датам."""
+    if group:
+        queryset = queryset.filter(group__slug=group)
+    if author:
+        queryset = queryset.filter(author__username=author)
+    if since:
+        queryset = queryset.filter(pub_date__gte=since)
+    if until:
+        queryset = queryset.filter(pub_date__lt=until)
+    return queryset
+
+
+def iter_chunks(queryset: QuerySet) -> typing.Iterator[list]:
+    """
+    Читает посты пачками по EXPORT_CHUNK_SIZE по ключу id:
+    каждая пачка - отдельный запрос с LIMIT без OFFSET,
+    в памяти одновременно находится только одна пачка.
+    """
+    rows = queryset.order_by('pk').values_list(*_COLUMNS)
+    last = 0
+    while True:
+        chunk = list(rows.filter(pk__gt=last)[:settings.EXPORT_CHUNK_SIZE])
+        if not chunk:
+            return
+        yield chunk
+        last = chunk[-1][0]
+
+
+def _csv_chunks(chunks: typing.Iterable[list]) -> typing.Iterator[str]:
+    writer = csv.writer(_Echo())
+    yield writer.writerow(FIELDS)
+    for chunk in chunks:
+        yield ''.join(
+            writer.writerow((*row[:4], row[4].isoformat())) for row in chunk
+        )
+
+
+def _jsonl_chunks(chunks: typing.Iterable[list]) -> typing.Iterator[str]:
+    for chunk in chunks:
+        yield ''.join(
+            json.dumps(
+                dict(zip(FIELDS, (*row[:4], row[4].isoformat()))),
+                ensure_ascii=False,
+            ) + '\n'
+            for row in chunk
+        )
+
+
+def _gzip(chunks: typing.Iterable[bytes]) -> typing.Iterator[bytes]:
+    """Сжимает поток в формат gzip по мере чтения."""
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_posts(
+    queryset: QuerySet,
+    fmt: str,
+    compress: bool = False,
+) -> typing.Iterator[bytes]:
+    """
+    Выгружает посты в формате csv или jsonl потоком байтов,
+    по одному блоку на пачку; при compress поток сжимается gzip.
+    Расход памяти не зависит от числа постов.
+    """
+    render = _csv_chunks if fmt == 'csv' else _jsonl_chunks
+    stream = (text.encode() for text in render(iter_chunks(queryset)))
+    return _gzip(stream) if compress else stream
@@ -0,0 +1,139 @@
+import datetime
+import typing
+
+from django.conf import settings
+from django.contrib.syndication.views import Feed
+from django.db.models import QuerySet
+from django.shortcuts import get_object_or_404
+from django.template.defaultfilters import truncatewords
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+
+from core.decorators import (
+    cache_anonymous_page, conditional_page, query_budget,
+)
+from posts.cache import GROUP_FEED, INDEX_FEED, PROFILE_FEED
+from posts.conditional import group_state, index_state, profile_state
+from posts.models import Group, Post, User
+
+
+class PostFeed(Feed):
+    """
+    Общая часть лент RSS: SYNDICATION_ITEMS последних постов
+    с автором и группой, выбранных одним запросом.
+    """
+
+    TITLE_WORDS: int = 10
+
+    def posts(self, obj: typing.Any) -> QuerySet:
+        return Post.objects.all()
+
+    def items(self, obj: typing.Any) -> QuerySet:
+        return self.posts(obj).for_syndication()[:settings.SYNDICATION_ITEMS]
+
+    def item_title(self, item: Post) -> str:
+        return truncatewords(item.text, self.TITLE_WORDS)
+
+    def item_description(self, item: Post) -> str:
+        return item.text
+
+    def item_link(self, item: Post) -> str:
+        return reverse('posts:post_detail', args=(item.pk,))
+
+    def item_author_name(self, item: Post) -> str:
+        return item.author.get_full_name() or item.author.username
+
+    def item_pubdate(self, item: Post) -> datetime.datetime:
+        return item.pub_date
+
+    def item_updateddate(self, item: Post) -> datetime.datetime:
+        return item.updated_at
+
+    def item_categories(self, item: Post) -> tuple:
+        return (item.group.title,) if item.group_id else ()
+
+
+class IndexFeed(PostFeed):
+    title = 'Yatube: последние записи'
+    description = 'Последние записи всех авторов'
+
+    def link(self) -> str:
+        return reverse('posts:index')
+
+
+class GroupFeed(PostFeed):
+    def get_object(self, request: typing.Any, slug: str) -> Group:
+        return get_object_or_404(Group, slug=slug)
+
+    def posts(self, obj: Group) -> QuerySet:
+        return obj.posts.all()
+
+    def title(self, obj: Group) -> str:
+        return f'Yatube: записи сообщества {obj.title}'
+
+    def description(self, obj: Group) -> str:
+        return obj.description
+
+    def link(self, obj: Group) -> str:
+        return reverse('posts:group_list', args=(obj.slug,))
+
+
+class ProfileFeed(PostFeed):
+    def get_object(self, request: typing.Any, username: str) -> User:
+        return get_object_or_404(User, username=username)
+
+    def posts(self, obj: User) -> QuerySet:
+        return obj.posts.all()
+
+    def title(self, obj: User) -> str:
+        return f'Yatube: записи {obj.get_full_name() or obj.username}'
+
+    def description(self, obj: User) -> str:
+        return f'Последние записи автора {obj.username}'
+
+    def link(self, obj: User) -> str:
+        return reverse('posts:profile', args=(obj.username,))
+
+
+class IndexAtomFeed(IndexFeed):
+    feed_type = Atom1Feed
+    subtitle = IndexFeed.description
+
+
+class GroupAtomFeed(GroupFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj: Group) -> str:
+        return self.description(obj)
+
+
+class ProfileAtomFeed(ProfileFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj: User) -> str:
+        return self.description(obj)
+
+
+def feed_view(
+    feed: Feed,
+    name: str,
+    state: typing.Callable,
+    max_queries: int,
+) -> typing.Callable:
+    """
+    Оборачивает ленту кэшем страниц и условным GET так же,
+    как HTML-страницу той же ленты: запись поста сбрасывает
+    и страницу, и ее RSS/Atom, а опрос читалкой без изменений
+    получает 304 или ответ из кэша без запросов к базе.
+    """
+    return query_budget(max_queries)(
+        cache_anonymous_page(name)(conditional_page(state)(feed)),
+    )
+
+
+index_rss = feed_view(IndexFeed(), INDEX_FEED, index_state, 2)
+index_atom = feed_view(IndexAtomFeed(), INDEX_FEED, index_state, 2)
+group_rss = feed_view(GroupFeed(), GROUP_FEED, group_state, 3)
+group_atom = feed_view(GroupAtomFeed(), GROUP_FEED, group_state, 3)
+profile_rss = feed_view(ProfileFeed(), PROFILE_FEED, profile_state, 3)
+profile_atom = feed_view(ProfileAtomFeed(), PROFILE_FEED, profile_state, 3)
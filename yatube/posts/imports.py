@@ -0,0 +1,74 @@
+import csv
+import json
+import typing
+from datetime import datetime
+
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+FORMATS: tuple = ('jsonl', 'csv')
+
+# Результат разбора строки: (данные поста, None) или (None, ошибка).
+Parsed = typing.Tuple[typing.Optional[dict], typing.Optional[str]]
+
+
+def read_rows(
+    file: typing.TextIO,
+    fmt: str,
+) -> typing.Iterator[typing.Union[str, dict]]:
+    """
+    Читает входной файл построчно, не загружая его целиком:
+    для jsonl отдает строки, для csv - словари по заголовку.
+    """
+    if fmt == 'csv':
+        yield from csv.DictReader(file)
+    else:
+        yield from file
+
+
+def _parse_date(value: typing.Any) -> typing.Optional[datetime]:
+    """Дата ISO 8601 с часовым поясом или None, если она некорректна."""
+    try:
+        value = parse_datetime(str(value))
+    except ValueError:
+        return None
+    if value is not None and timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value
+
+
+def parse_row(row: typing.Union[str, dict]) -> Parsed:
+    """
+    Разбирает и проверяет одну запись импорта.
+    Не обращается к базе данных, поэтому выполняется
+    в дочерних процессах.
+
+    Ожидаемые поля: text, author (username), group (slug, необязательно),
+    pub_date (ISO 8601, необязательно).
+    """
+    if isinstance(row, str):
+        if not row.strip():
+            return None, 'пустая строка'
+        try:
+            row = json.loads(row)
+        except ValueError as error:
+            return None, f'некорректный JSON: {error}'
+    if not isinstance(row, dict):
+        return None, 'запись должна быть объектом'
+    text = str(row.get('text') or '').strip()
+    author = str(row.get('author') or '').strip()
+    if not text:
+        return None, 'не указан текст поста'
+    if not author:
+        return None, 'не указан автор'
+    pub_date = None
+    if row.get('pub_date'):
+        pub_date = _parse_date(row['pub_date'])
+        if pub_date is None:
+            return None, f'некорректная дата: {row["pub_date"]}'
+    return {
+        'text': text,
+        'author': author,
+        'group': str(row.get('group') or '').strip() or None,
+        'pub_date': pub_date,
+    }, None
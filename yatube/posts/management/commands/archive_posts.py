@@ -0,0 +1,56 @@
+import datetime
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from posts.bulk import archive_posts
+from posts.models import ArchivedPost, Post
+
+
+class Command(BaseCommand):
+    """
+    Переносит посты старше --days дней в архив пачками
+    по BULK_CHUNK_SIZE. Заодно переносит посты основной таблицы,
+    не более новые, чем самый новый пост архива (например,
+    импортированные со старой датой): ленты продолжаются
+    в архиве, только если все его посты старше основной таблицы.
+    """
+
+    help = 'Переносит старые посты в архив'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.ARCHIVE_AFTER_DAYS,
+            help='Возраст постов для архива, в днях',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только посчитать посты для архива',
+        )
+
+    def handle(self, *args: tuple, **options: dict) -> None:
+        cutoff = timezone.now() - datetime.timedelta(days=options['days'])
+        condition = Q(pub_date__lt=cutoff)
+        newest = ArchivedPost.objects.aggregate(
+            newest=Max('pub_date'),
+        )['newest']
+        if newest is not None:
+            condition |= Q(pub_date__lte=newest)
+        queryset = Post.objects.filter(condition)
+        if options['dry_run']:
+            self.stdout.write(f'Постов для архива: {queryset.count()}')
+            return
+        started = time.perf_counter()
+        done = 0
+        for done in archive_posts(queryset):
+            self.stdout.write(f'Перенесено: {done}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Перенесено в архив постов: {done} '
+            f'за {time.perf_counter() - started:.1f} с',
+        ))
@@ -0,0 +1,69 @@
+import os
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from core.benchmarks import current_rss, random_text, rolled_back
+from posts.exports import export_posts
+from posts.models import Post, User
+
+
+class Command(BaseCommand):
+    """
+    Замеряет выгрузку постов на растущем числе записей:
+    время, скорость и прирост резидентной памяти (RSS)
+    во время выгрузки. Прирост не должен зависеть от числа постов.
+    Посты создаются в транзакции, которая откатывается после замера.
+    """
+
+    help = 'Замеряет память и скорость выгрузки от 10k до 10M постов'
+
+    BATCH_SIZE: int = 10000
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            '--sizes', nargs='+', type=int,
+            default=[10000, 100000, 1000000, 10000000],
+        )
+        parser.add_argument('--format', default='csv')
+        parser.add_argument('--gzip', action='store_true')
+
+    def handle(self, *args: tuple, **options: dict) -> None:
+        rng = random.Random(0)
+        with rolled_back():
+            author = User.objects.create(username='bench_export_author')
+            self.stdout.write('posts\tseconds\trows/s\trss growth, MB')
+            for size in sorted(options['sizes']):
+                self.fill(author, size, rng)
+                seconds, growth = self.measure(
+                    options['format'], options['gzip'],
+                )
+                self.stdout.write(
+                    f'{size}\t{seconds:.1f}\t{size / seconds:.0f}'
+                    f'\t{growth / 2 ** 20:.1f}',
+                )
+
+    def fill(self, author: User, size: int, rng: random.Random) -> None:
+        """Дополняет таблицу постов до size записей."""
+        existing = Post.objects.count()
+        while existing < size:
+            batch = min(self.BATCH_SIZE, size - existing)
+            Post.objects.bulk_create(
+                Post(text=random_text(rng), author=author)
+                for _ in range(batch)
+            )
+            existing += batch
+
+    def measure(self, fmt: str, compress: bool) -> tuple:
+        """
+        Время выгрузки в /dev/null и наибольший прирост RSS
+        относительно начала выгрузки, замеренный после каждой пачки.
+        """
+        baseline = peak = current_rss()
+        started = time.perf_counter()
+        with open(os.devnull, 'wb') as file:
+            for chunk in export_posts(Post.objects.all(), fmt, compress):
+                file.write(chunk)
+                peak = max(peak, current_rss())
+        return time.perf_counter() - started, peak - baseline
@@ -0,0 +1,79 @@
+import random
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+
+from core.benchmarks import best_of, random_text, rolled_back
+from posts.models import Post, User
+from posts.search import SearchResults
+
+
+class Command(BaseCommand):
+    """
+    Сравнивает полнотекстовый поиск FTS5 с LIKE '%term%'
+    на растущем числе постов. Посты создаются в транзакции,
+    которая откатывается после замера.
+    """
+
+    help = 'Сравнивает поиск FTS5 и LIKE на 10k, 100k и 1M постов'
+
+    BATCH_SIZE: int = 10000
+    RARE_WORD: str = 'редкость'
+    RARE_EVERY: int = 1000
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            '--sizes', nargs='+', type=int,
+            default=[10000, 100000, 1000000],
+        )
+        parser.add_argument('--query', default=self.RARE_WORD)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args: tuple, **options: dict) -> None:
+        rng = random.Random(0)
+        query = options['query']
+        with rolled_back():
+            author = User.objects.create(username='bench_search_author')
+            self.stdout.write('posts\tfts, ms\tlike, ms')
+            for size in sorted(options['sizes']):
+                self.fill(author, size, rng)
+                fts = best_of(
+                    lambda: self.fts_page(query), options['repeat'],
+                )
+                like = best_of(
+                    lambda: self.like_page(query), options['repeat'],
+                )
+                self.stdout.write(
+                    f'{size}\t{fts * 1000:.1f}\t{like * 1000:.1f}',
+                )
+
+    def fill(self, author: User, size: int, rng: random.Random) -> None:
+        """
+        Дополняет таблицу постов до size записей;
+        каждый RARE_EVERY-й пост содержит слово RARE_WORD.
+        """
+        existing = Post.objects.count()
+        while existing < size:
+            batch = min(self.BATCH_SIZE, size - existing)
+            Post.objects.bulk_create(
+                Post(
+                    text=random_text(rng) + (
+                        f' {self.RARE_WORD}'
+                        if (existing + number) % self.RARE_EVERY == 0
+                        else ''
+                    ),
+                    author=author,
+                )
+                for number in range(batch)
+            )
+            existing += batch
+
+    def fts_page(self, query: str) -> None:
+        results = SearchResults(query)
+        results.count()
+        results[0:settings.LIMIT_POSTS]
+
+    def like_page(self, query: str) -> None:
+        posts = Post.objects.for_feed().filter(text__icontains=query)
+        posts.count()
+        list(posts[:settings.LIMIT_POSTS])
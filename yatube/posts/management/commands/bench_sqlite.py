@@ -0,0 +1,181 @@
+import os
+import random
+import sqlite3
+import tempfile
+import time
+import typing
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+
+from core.benchmarks import random_text
+from core.db import is_lock_error, retry_on_lock
+
+SCHEMA: tuple = (
+    'CREATE TABLE author (id INTEGER PRIMARY KEY, post_count INTEGER)',
+    'CREATE TABLE post (id INTEGER PRIMARY KEY, text TEXT, '
+    'pub_date REAL, author_id INTEGER)',
+    'CREATE INDEX post_pub_date ON post (pub_date DESC, id DESC)',
+)
+AUTHORS: int = 100
+
+
+class Command(BaseCommand):
+    """
+    Сравнивает пропускную способность SQLite со стандартными
+    настройками и с профилем SQLITE_PRAGMAS: писатели в отдельных
+    потоках создают посты (вставка и обновление счетчика автора
+    в одной транзакции, как post_create), читатели выбирают
+    страницы ленты. Каждый профиль работает с отдельным файлом
+    во временном каталоге, база проекта не затрагивается.
+    """
+
+    help = 'Сравнивает запись и чтение SQLite до и после настройки'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--duration', type=float, default=5)
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--rows', type=int, default=10000)
+
+    def handle(self, *args: tuple, **options: dict) -> None:
+        self.stdout.write('profile\twrites/s\treads/s\tlock errors')
+        for name, pragmas in (
+            ('stock', {}), ('tuned', settings.SQLITE_PRAGMAS),
+        ):
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, 'bench.sqlite3')
+                self.prepare(path, options['rows'])
+                writes, reads, errors = self.run(
+                    path, pragmas, name == 'tuned', options,
+                )
+            self.stdout.write(
+                f'{name}\t{writes / options["duration"]:.0f}'
+                f'\t{reads / options["duration"]:.0f}\t{errors}',
+            )
+
+    def prepare(self, path: str, rows: int) -> None:
+        rng = random.Random(0)
+        connection = sqlite3.connect(path)
+        for statement in SCHEMA:
+            connection.execute(statement)
+        connection.executemany(
+            'INSERT INTO author VALUES (?, 0)',
+            ((pk,) for pk in range(1, AUTHORS + 1)),
+        )
+        connection.executemany(
+            'INSERT INTO post (text, pub_date, author_id) VALUES (?, ?, ?)',
+            (
+                (random_text(rng), time.time(), rng.randint(1, AUTHORS))
+                for _ in range(rows)
+            ),
+        )
+        connection.commit()
+        connection.close()
+
+    def connect(self, path: str, pragmas: dict) -> sqlite3.Connection:
+        # Как в Django: таймаут драйвера по умолчанию, транзакции явные.
+        connection = sqlite3.connect(
+            path, isolation_level=None, check_same_thread=False,
+        )
+        for name, value in pragmas.items():
+            connection.execute(f'PRAGMA {name} = {value}')
+        return connection
+
+    def run(
+        self, path: str, pragmas: dict, retry: bool, options: dict,
+    ) -> typing.Tuple[int, int, int]:
+        """Число записей, чтений и ошибок блокировки за duration секунд."""
+        deadline = time.monotonic() + options['duration']
+        with ThreadPoolExecutor(
+            options['writers'] + options['readers'],
+        ) as executor:
+            writers = [
+                executor.submit(
+                    self.write_loop, path, pragmas, retry, deadline, seed,
+                )
+                for seed in range(options['writers'])
+            ]
+            readers = [
+                executor.submit(
+                    self.read_loop, path, pragmas, deadline, 1000 + seed,
+                )
+                for seed in range(options['readers'])
+            ]
+            writes = [future.result() for future in writers]
+            reads = [future.result() for future in readers]
+        return (
+            sum(done for done, _ in writes),
+            sum(done for done, _ in reads),
+            sum(errors for _, errors in writes + reads),
+        )
+
+    def create_post(
+        self, connection: sqlite3.Connection, rng: random.Random,
+    ) -> None:
+        author = rng.randint(1, AUTHORS)
+        try:
+            connection.execute('BEGIN')
+            connection.execute(
+                'INSERT INTO post (text, pub_date, author_id) '
+                'VALUES (?, ?, ?)',
+                (random_text(rng), time.time(), author),
+            )
+            connection.execute(
+                'UPDATE author SET post_count = post_count + 1 WHERE id = ?',
+                (author,),
+            )
+            connection.execute('COMMIT')
+        except sqlite3.OperationalError:
+            if connection.in_transaction:
+                connection.execute('ROLLBACK')
+            raise
+
+    def read_page(
+        self, connection: sqlite3.Connection, rng: random.Random,
+    ) -> None:
+        connection.execute(
+            'SELECT id, text, pub_date, author_id FROM post '
+            'ORDER BY pub_date DESC, id DESC LIMIT 10 OFFSET ?',
+            (rng.randint(0, 100) * 10,),
+        ).fetchall()
+
+    def write_loop(
+        self, path: str, pragmas: dict, retry: bool, deadline: float,
+        seed: int,
+    ) -> typing.Tuple[int, int]:
+        create_post = self.create_post
+        if retry:
+            create_post = retry_on_lock(create_post)
+        return self.loop(path, pragmas, create_post, deadline, seed)
+
+    def read_loop(
+        self, path: str, pragmas: dict, deadline: float, seed: int,
+    ) -> typing.Tuple[int, int]:
+        return self.loop(path, pragmas, self.read_page, deadline, seed)
+
+    def loop(
+        self,
+        path: str,
+        pragmas: dict,
+        operation: typing.Callable,
+        deadline: float,
+        seed: int,
+    ) -> typing.Tuple[int, int]:
+        """Повторяет operation до deadline: число успехов и блокировок."""
+        rng = random.Random(seed)
+        connection = self.connect(path, pragmas)
+        done = errors = 0
+        try:
+            while time.monotonic() < deadline:
+                try:
+                    operation(connection, rng)
+                    done += 1
+                except sqlite3.OperationalError as error:
+                    if not is_lock_error(error):
+                        raise
+                    errors += 1
+        finally:
+            connection.close()
+        return done, errors
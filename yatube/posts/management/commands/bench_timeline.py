@@ -0,0 +1,197 @@
+import datetime
+import random
+import typing
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import connection
+from django.test import override_settings
+from django.utils import timezone
+
+from core.benchmarks import best_of, random_text, rolled_back
+from posts.bulk import create_posts
+from posts.models import Follow, Post, Profile, TimelineEntry, User
+from posts.timeline import timeline_page
+
+# Заполнение лент так, как их заполнила бы рассылка при создании
+# постов: разосланные посты авторов, у которых меньше limit подписчиков.
+MATERIALIZE_SQL: str = f"""
+    INSERT INTO {TimelineEntry._meta.db_table} (user_id, post_id, pub_date)
+    SELECT follow.user_id, post.id, post.pub_date
+    FROM {Follow._meta.db_table} AS follow
+    JOIN {Post._meta.db_table} AS post ON post.author_id = follow.author_id
+    WHERE post.fanned_out
+"""
+
+
+class Command(BaseCommand):
+    """
+    Сравнивает ленту подписок, собранную при чтении
+    (author__in по таблице постов), с материализованной лентой
+    при скошенном (по Ципфу) распределении подписчиков:
+    несколько авторов собирают большую часть подписок.
+    Замеряет и цену рассылки поста для обычного и популярного
+    автора с гибридным порогом и без него.
+    Данные создаются в транзакции, которая откатывается после замера.
+    """
+
+    help = 'Сравнивает чтение и рассылку ленты подписок'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--readers', type=int, default=2000)
+        parser.add_argument('--authors', type=int, default=500)
+        parser.add_argument('--posts', type=int, default=50000)
+        parser.add_argument('--follows', type=int, default=20)
+        parser.add_argument(
+            '--probes', nargs='+', type=int, default=[10, 100, 400],
+        )
+        parser.add_argument('--skew', type=float, default=1.1)
+        parser.add_argument(
+            '--limit', type=int, default=settings.TIMELINE_FANOUT_LIMIT,
+        )
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args: tuple, **options: dict) -> None:
+        rng = random.Random(0)
+        with rolled_back(), override_settings(
+            TIMELINE_FANOUT_LIMIT=options['limit'],
+        ):
+            authors = self.fill(rng, options)
+            counts = dict(
+                Profile.objects.filter(user__in=authors).values_list(
+                    'user_id', 'follower_count',
+                ),
+            )
+            self.stdout.write(
+                f'подписчиков у авторов: максимум {max(counts.values())}, '
+                f'медиана {sorted(counts.values())[len(counts) // 2]}, '
+                f'выше порога {options["limit"]}: '
+                f'{sum(c >= options["limit"] for c in counts.values())}',
+            )
+            self.reads(rng, authors, options)
+            self.writes(authors, counts, options['repeat'])
+
+    def fill(self, rng: random.Random, options: dict) -> typing.List[User]:
+        """
+        Авторы с постами, читатели с подписками по Ципфу
+        и материализованные ленты. Возвращает авторов
+        по убыванию популярности.
+        """
+        # bulk_create в SQLite не заполняет pk, поэтому
+        # пользователи перечитываются после вставки.
+        User.objects.bulk_create(
+            User(username=f'bench_timeline_{i}')
+            for i in range(options['authors'] + options['readers'])
+        )
+        users = list(
+            User.objects.filter(
+                username__startswith='bench_timeline_',
+            ).order_by('pk'),
+        )
+        Profile.objects.bulk_create(Profile(user=user) for user in users)
+        authors, readers = (
+            users[:options['authors']], users[options['authors']:],
+        )
+        now = timezone.now()
+        create_posts([
+            Post(
+                text=random_text(rng, 10), author=rng.choice(authors),
+                pub_date=now - datetime.timedelta(minutes=i),
+            )
+            for i in range(options['posts'])
+        ])
+        weights = [
+            1 / rank ** options['skew'] for rank in range(1, len(authors) + 1)
+        ]
+        follows = [
+            Follow(user=reader, author=author)
+            for reader in readers
+            for author in self.choose(
+                rng, authors, weights, options['follows'],
+            )
+        ]
+        Follow.objects.bulk_create(follows)
+        for author_id, total in Counter(
+            follow.author_id for follow in follows
+        ).items():
+            Profile.objects.filter(user_id=author_id).update(
+                follower_count=total,
+            )
+        Post.objects.filter(
+            author__profile__follower_count__gte=options['limit'],
+        ).update(fanned_out=False)
+        with connection.cursor() as cursor:
+            cursor.execute(MATERIALIZE_SQL)
+            cursor.execute('ANALYZE')
+        return authors
+
+    @staticmethod
+    def choose(
+        rng: random.Random, authors: list, weights: list, size: int,
+    ) -> set:
+        """size разных авторов с вероятностями weights."""
+        chosen = set()
+        while len(chosen) < min(size, len(authors)):
+            chosen.update(rng.choices(authors, weights, k=size - len(chosen)))
+        return chosen
+
+    def reads(
+        self, rng: random.Random, authors: list, options: dict,
+    ) -> None:
+        """Первая страница ленты для читателей с разным числом подписок."""
+        weights = [
+            1 / rank ** options['skew'] for rank in range(1, len(authors) + 1)
+        ]
+        self.stdout.write('follows\tpull, ms\ttimeline, ms')
+        for size in options['probes']:
+            reader = User.objects.create(username=f'bench_probe_{size}')
+            followed = self.choose(rng, authors, weights, size)
+            Follow.objects.bulk_create(
+                Follow(user=reader, author=author) for author in followed
+            )
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    MATERIALIZE_SQL + ' AND follow.user_id = %s',
+                    [reader.pk],
+                )
+            ids = [author.pk for author in followed]
+            pull = best_of(
+                lambda: list(
+                    Post.objects.for_feed().filter(author_id__in=ids)[
+                        :settings.LIMIT_POSTS
+                    ],
+                ),
+                options['repeat'],
+            )
+            timeline = best_of(
+                lambda: list(timeline_page(reader, settings.LIMIT_POSTS)),
+                options['repeat'],
+            )
+            self.stdout.write(
+                f'{size}\t{pull * 1000:.2f}\t{timeline * 1000:.2f}',
+            )
+
+    def writes(self, authors: list, counts: dict, repeat: int) -> None:
+        """
+        Время создания поста популярным автором и автором
+        с медианным числом подписчиков, с порогом и без него.
+        """
+        ranked = sorted(authors, key=lambda author: -counts[author.pk])
+        self.stdout.write('author\tfollowers\thybrid, ms\tfan-out all, ms')
+        for name, author in (
+            ('top', ranked[0]), ('median', ranked[len(ranked) // 2]),
+        ):
+            hybrid = best_of(
+                lambda: Post.objects.create(text='bench', author=author),
+                repeat,
+            )
+            with override_settings(TIMELINE_FANOUT_LIMIT=2 ** 62):
+                fan_out_all = best_of(
+                    lambda: Post.objects.create(text='bench', author=author),
+                    repeat,
+                )
+            self.stdout.write(
+                f'{name}\t{counts[author.pk]}\t{hybrid * 1000:.2f}'
+                f'\t{fan_out_all * 1000:.2f}',
+            )
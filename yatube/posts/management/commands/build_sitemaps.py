@@ -0,0 +1,72 @@
+import glob
+import os
+import time
+import typing
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+
+from core.cache import expire_feeds
+from posts.cache import SITEMAP_FEED
+from posts.sitemaps import (
+    INDEX_FILENAME, SECTIONS, render_index, shard_filename,
+)
+
+
+class Command(BaseCommand):
+    """
+    Собирает карту сайта в каталог SITEMAP_ROOT: индекс и части
+    разделов постов, групп и профилей. Каждая часть пишется
+    потоком во временный файл и атомарно заменяет прежнюю,
+    части, ставшие пустыми, удаляются.
+    Запускается по расписанию; пока файлы есть, /sitemap.xml
+    и его части отдаются с диска без запросов к базе.
+    Закэшированный индекс, построенный по базе, сбрасывается,
+    чтобы он не заслонял собранный файл.
+    """
+
+    help = 'Собирает карту сайта в каталог SITEMAP_ROOT'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            '--base-url', required=True,
+            help='адрес сайта без завершающего /, например https://yatube.ru',
+        )
+
+    def handle(self, *args: tuple, **options: dict) -> None:
+        base_url = options['base_url'].rstrip('/')
+        os.makedirs(settings.SITEMAP_ROOT, exist_ok=True)
+        started = time.perf_counter()
+        written = set()
+        for name, section in SECTIONS.items():
+            for number, _ in section.shards():
+                filename = shard_filename(name, number)
+                urls = self.write(filename, section.render(base_url, number))
+                written.add(filename)
+                self.stdout.write(f'{filename}: {urls} адресов')
+        for path in glob.glob(
+            os.path.join(settings.SITEMAP_ROOT, shard_filename('*', '*')),
+        ):
+            if os.path.basename(path) not in written:
+                os.remove(path)
+        self.write(INDEX_FILENAME, render_index(base_url))
+        expire_feeds((SITEMAP_FEED,))
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Частей: {len(written)}, '
+                f'{time.perf_counter() - started:.1f} с',
+            ),
+        )
+
+    @staticmethod
+    def write(filename: str, chunks: typing.Iterable[str]) -> int:
+        """Записывает файл атомарно и возвращает число адресов в нем."""
+        path = os.path.join(settings.SITEMAP_ROOT, filename)
+        temporary = f'{path}.tmp'
+        urls = 0
+        with open(temporary, 'w', encoding='utf-8') as file:
+            for chunk in chunks:
+                urls += chunk.count('<loc>')
+                file.write(chunk)
+        os.replace(temporary, path)
+        return urls
@@ -0,0 +1,87 @@
+from django.core.management.base import (
+    BaseCommand, CommandError, CommandParser,
+)
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# auto_vacuum = INCREMENTAL: свободные страницы возвращаются
+# файлу по PRAGMA incremental_vacuum, без полного VACUUM.
+INCREMENTAL: int = 2
+
+
+class Command(BaseCommand):
+    """
+    Обслуживание базы SQLite: проверка целостности, сбор
+    статистики для планировщика (ANALYZE), возврат свободных
+    страниц (инкрементальный VACUUM) и сброс журнала WAL в базу.
+    Без флагов выполняет все шаги.
+    """
+
+    help = 'Проверка, ANALYZE и инкрементальный VACUUM базы SQLite'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--check', action='store_true')
+        parser.add_argument('--analyze', action='store_true')
+        parser.add_argument('--vacuum', action='store_true')
+        parser.add_argument(
+            '--full-check',
+            action='store_true',
+            help='integrity_check вместо быстрого quick_check',
+        )
+        parser.add_argument(
+            '--pages',
+            type=int,
+            default=0,
+            help='Сколько свободных страниц вернуть (0 - все)',
+        )
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args: tuple, **options: dict) -> None:
+        connection = connections[options['database']]
+        if connection.vendor != 'sqlite':
+            raise CommandError('Команда обслуживает только SQLite')
+        steps = [
+            step for step in ('check', 'analyze', 'vacuum') if options[step]
+        ] or ['check', 'analyze', 'vacuum']
+        actions = {
+            'check': self.check_integrity,
+            'analyze': self.analyze,
+            'vacuum': self.vacuum,
+        }
+        with connection.cursor() as cursor:
+            for step in steps:
+                actions[step](cursor, options)
+            cursor.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+
+    def check_integrity(self, cursor: object, options: dict) -> None:
+        pragma = 'integrity_check' if options['full_check'] else 'quick_check'
+        cursor.execute(f'PRAGMA {pragma}')
+        problems = [row[0] for row in cursor.fetchall() if row[0] != 'ok']
+        if problems:
+            raise CommandError(
+                'Нарушена целостность базы:\n' + '\n'.join(problems),
+            )
+        self.stdout.write(self.style.SUCCESS(f'{pragma}: ok'))
+
+    def analyze(self, cursor: object, options: dict) -> None:
+        cursor.execute('ANALYZE')
+        self.stdout.write(self.style.SUCCESS('ANALYZE: статистика собрана'))
+
+    def vacuum(self, cursor: object, options: dict) -> None:
+        cursor.execute('PRAGMA auto_vacuum')
+        if cursor.fetchone()[0] != INCREMENTAL:
+            # Режим меняется только полным VACUUM, один раз.
+            cursor.execute(f'PRAGMA auto_vacuum = {INCREMENTAL}')
+            cursor.execute('VACUUM')
+            self.stdout.write(self.style.SUCCESS(
+                'VACUUM: база переведена в auto_vacuum=INCREMENTAL',
+            ))
+            return
+        cursor.execute('PRAGMA freelist_count')
+        before = cursor.fetchone()[0]
+        cursor.execute(f'PRAGMA incremental_vacuum({options["pages"]})')
+        cursor.fetchall()
+        cursor.execute('PRAGMA freelist_count')
+        after = cursor.fetchone()[0]
+        self.stdout.write(self.style.SUCCESS(
+            f'incremental_vacuum: возвращено страниц: {before - after}',
+        ))
@@ -0,0 +1,70 @@
+import sys
+import typing
+from datetime import datetime, time
+
+from django.core.management.base import (
+    BaseCommand, CommandError, CommandParser,
+)
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from posts.exports import FORMATS, export_posts, filter_posts
+from posts.models import Post
+
+
+def parse_moment(value: str) -> datetime:
+    """Дата или дата со временем в формате ISO 8601."""
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(value)
+        moment = datetime.combine(day, time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+class Command(BaseCommand):
+    """
+    Выгружает посты в CSV или JSONL с постоянным расходом памяти:
+    посты читаются пачками по ключу id и сразу записываются,
+    при --gzip поток сжимается по мере записи.
+    """
+
+    help = 'Выгружает посты в CSV или JSONL'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--format', choices=FORMATS, default='csv')
+        parser.add_argument(
+            '--output', default='-', help='файл выгрузки, "-" - stdout',
+        )
+        parser.add_argument('--gzip', action='store_true')
+        parser.add_argument('--group', help='slug группы')
+        parser.add_argument('--author', help='username автора')
+        parser.add_argument('--since', type=parse_moment)
+        parser.add_argument('--until', type=parse_moment)
+
+    def handle(self, *args: tuple, **options: dict) -> None:
+        queryset = filter_posts(
+            Post.objects.all(),
+            group=options['group'],
+            author=options['author'],
+            since=options['since'],
+            until=options['until'],
+        )
+        stream = export_posts(queryset, options['format'], options['gzip'])
+        if options['output'] == '-':
+            self.write(stream, sys.stdout.buffer)
+            return
+        try:
+            with open(options['output'], 'wb') as file:
+                self.write(stream, file)
+        except OSError as error:
+            raise CommandError(error)
+
+    @staticmethod
+    def write(stream: typing.Iterable[bytes], file: typing.BinaryIO) -> None:
+        for chunk in stream:
+            file.write(chunk)
+        file.flush()
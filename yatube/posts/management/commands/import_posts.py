@@ -0,0 +1,176 @@
+import itertools
+import os
+import time
+import typing
+from multiprocessing import Pool
+
+from django.core.management.base import (
+    BaseCommand, CommandError, CommandParser,
+)
+from django.db import transaction
+
+from posts.bulk import create_posts
+from posts.imports import FORMATS, Parsed, parse_row, read_rows
+from posts.models import Group, ImportCheckpoint, Post, User
+
+
+class Command(BaseCommand):
+    """
+    Потоковый импорт постов из файла JSONL или CSV.
+
+    Файл читается построчно, записи разбираются и проверяются
+    в дочерних процессах, авторы и группы находятся по username
+    и slug через словари в памяти, посты вставляются пачками
+    bulk_create, каждая пачка - в своей транзакции.
+    В той же транзакции число обработанных строк записывается
+    в контрольную точку (ImportCheckpoint), повторный запуск
+    продолжает с нее и не вставляет зафиксированные пачки снова.
+    """
+
+    help = 'Импортирует посты из файла JSONL или CSV'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('path', help='файл .jsonl или .csv')
+        parser.add_argument('--format', choices=FORMATS)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help='число процессов для разбора записей',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='имя контрольной точки, по умолчанию абсолютный путь файла',
+        )
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='начать сначала, не учитывая контрольную точку',
+        )
+
+    def handle(self, *args: tuple, **options: dict) -> None:
+        path = options['path']
+        fmt = options['format'] or os.path.splitext(path)[1].lstrip('.')
+        if fmt not in FORMATS:
+            raise CommandError(f'Неизвестный формат файла: {path}')
+        self.batch_size = options['batch_size']
+        self.checkpoint = options['checkpoint'] or os.path.abspath(path)
+        self.authors = {}
+        self.groups = {}
+        if options['restart']:
+            ImportCheckpoint.objects.filter(source=self.checkpoint).delete()
+        skip = self.read_checkpoint()
+        if skip:
+            self.stdout.write(f'Продолжение со строки {skip + 1}')
+        with open(path, newline='', encoding='utf-8') as file:
+            rows = itertools.islice(read_rows(file, fmt), skip, None)
+            workers = options['workers']
+            if workers > 1:
+                with Pool(workers) as pool:
+                    parsed = pool.imap(
+                        parse_row, rows,
+                        chunksize=max(self.batch_size // workers, 1),
+                    )
+                    self.run(parsed, skip)
+            else:
+                self.run(map(parse_row, rows), skip)
+        ImportCheckpoint.objects.filter(source=self.checkpoint).delete()
+
+    def run(self, parsed: typing.Iterator[Parsed], position: int) -> None:
+        """
+        Собирает разобранные записи в пачки, вставляет их
+        и сообщает скорость импорта после каждой пачки.
+        """
+        started = time.perf_counter()
+        imported = skipped = processed = 0
+        while True:
+            batch = list(itertools.islice(parsed, self.batch_size))
+            if not batch:
+                break
+            posts, errors = self.build_posts(batch, position)
+            with transaction.atomic():
+                imported += create_posts(posts) if posts else 0
+                self.write_checkpoint(position + len(batch))
+            skipped += len(errors)
+            processed += len(batch)
+            position += len(batch)
+            for error in errors:
+                self.stderr.write(error)
+            rate = processed / (time.perf_counter() - started)
+            self.stdout.write(
+                f'Строк: {position}, импортировано: {imported}, '
+                f'пропущено: {skipped}, {rate:.0f} строк/с',
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Импортировано постов: {imported}, пропущено: {skipped}',
+            ),
+        )
+
+    def build_posts(
+        self,
+        batch: typing.List[Parsed],
+        position: int,
+    ) -> typing.Tuple[typing.List[Post], typing.List[str]]:
+        """
+        Превращает разобранные записи пачки в посты.
+        Неизвестные авторы и группы загружаются одним запросом
+        на пачку и запоминаются в словарях.
+        """
+        rows = [data for data, _ in batch if data is not None]
+        self.resolve(
+            self.authors, User.objects, 'username',
+            {row['author'] for row in rows},
+        )
+        self.resolve(
+            self.groups, Group.objects, 'slug',
+            {row['group'] for row in rows if row['group']},
+        )
+        posts, errors = [], []
+        for line, (data, error) in enumerate(batch, position + 1):
+            if data is not None:
+                error = self.check_keys(data)
+            if error is not None:
+                errors.append(f'Строка {line}: {error}')
+                continue
+            posts.append(Post(
+                text=data['text'],
+                author_id=self.authors[data['author']],
+                group_id=self.groups.get(data['group']),
+                pub_date=data['pub_date'],
+            ))
+        return posts, errors
+
+    def check_keys(self, data: dict) -> typing.Optional[str]:
+        if data['author'] not in self.authors:
+            return f'неизвестный автор {data["author"]}'
+        if data['group'] and data['group'] not in self.groups:
+            return f'неизвестная группа {data["group"]}'
+        return None
+
+    @staticmethod
+    def resolve(
+        lookup: dict,
+        manager: typing.Any,
+        field: str,
+        keys: typing.Set[str],
+    ) -> None:
+        missing = keys - lookup.keys()
+        if missing:
+            lookup.update(
+                manager.filter(**{f'{field}__in': missing}).values_list(
+                    field, 'pk',
+                ),
+            )
+
+    def read_checkpoint(self) -> int:
+        return ImportCheckpoint.objects.filter(
+            source=self.checkpoint,
+        ).values_list('position', flat=True).first() or 0
+
+    def write_checkpoint(self, position: int) -> None:
+        """
+        Записывает контрольную точку в транзакции пачки:
+        пачка и позиция после нее фиксируются вместе.
+        """
+        ImportCheckpoint.objects.update_or_create(
+            source=self.checkpoint, defaults={'position': position},
+        )
@@ -0,0 +1,456 @@
+import json
+import math
+import os
+import random
+import secrets
+import time
+import typing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import (
+    BaseCommand, CommandError, CommandParser,
+)
+from django.db import connection, connections
+from django.urls import reverse
+from django.utils import timezone
+
+from core.benchmarks import WORDS
+from core.loadtest import (
+    PERCENTILES, HttpTransport, InProcessTransport, Recorder,
+)
+from posts import urls as posts_urls
+from posts.models import Follow, Group, Post, User
+from posts.sitemaps import SECTIONS
+
+SAMPLE_SIZE: int = 1000
+
+# Имена адресов posts.urls, которые запрашивает каждый сценарий.
+SCENARIO_ROUTES: typing.Dict[str, tuple] = {
+    'browse_index': ('index',),
+    'browse_group': ('group_list',),
+    'browse_profile': ('profile',),
+    'post_detail': ('post_detail',),
+    'search': ('search',),
+    'feeds': (
+        'index_rss', 'index_atom', 'group_rss', 'group_atom',
+        'profile_rss', 'profile_atom',
+    ),
+    'sitemap': ('sitemap', 'sitemap_shard'),
+    'login': (),
+    'create_post': ('post_create',),
+    'edit_post': ('post_edit',),
+    'follow': (
+        'follow_index', 'profile_follow', 'profile_unfollow',
+        'group_follow', 'group_unfollow',
+    ),
+}
+
+# Доля сценариев в смешанной нагрузке.
+SCENARIO_WEIGHTS: typing.Dict[str, int] = {
+    'browse_index': 30,
+    'browse_group': 15,
+    'browse_profile': 10,
+    'post_detail': 20,
+    'search': 5,
+    'feeds': 5,
+    'sitemap': 2,
+    'login': 3,
+    'create_post': 5,
+    'edit_post': 5,
+    'follow': 5,
+}
+
+
+def is_test_database() -> bool:
+    """
+    База по умолчанию - тестовая: SQLite в памяти
+    или файл/база с именем на test.
+    """
+    name = str(connection.settings_dict['NAME'])
+    return (
+        name == ':memory:' or 'mode=memory' in name
+        or os.path.basename(name).startswith('test')
+    )
+
+
+def collect_sample(username: str, password: str) -> dict:
+    """
+    Готовит данные для сценариев: пользователя нагрузки с паролем
+    и постом, id постов, slug групп, авторов и число страниц лент.
+    Пароль существующего пользователя не меняется: он должен совпадать.
+    Команда редактирует только созданный здесь пост; что удалить
+    после прогона, запоминается в created_user, first_post_id
+    и follow_ids.
+    """
+    user, created = User.objects.get_or_create(username=username)
+    if created:
+        user.set_password(password)
+        user.save()
+    elif not user.check_password(password):
+        raise CommandError(
+            f'Пользователь {username} уже существует, '
+            'укажите его пароль в --password',
+        )
+    own = Post.objects.create(text='loadtest', author=user).pk
+    return {
+        'username': username,
+        'password': password,
+        'created_user': created,
+        'first_post_id': own,
+        'follow_ids': list(user.follows.values_list('pk', flat=True)),
+        'post_ids': list(
+            Post.objects.values_list('pk', flat=True)[:SAMPLE_SIZE],
+        ),
+        'own_post_ids': [own],
+        'groups': list(
+            Group.objects.order_by('-post_count').values_list(
+                'slug', 'post_count',
+            )[:SAMPLE_SIZE],
+        ),
+        'authors': list(
+            User.objects.filter(profile__post_count__gt=0).values_list(
+                'username', 'profile__post_count',
+            )[:SAMPLE_SIZE],
+        ),
+        'group_ids': list(Group.objects.values_list('pk', flat=True)[:50]),
+        'posts_total': Post.objects.count(),
+        'sitemap_shards': [
+            (name, number)
+            for name, section in SECTIONS.items()
+            for number, _ in section.shards()
+        ],
+    }
+
+
+def cleanup(sample: dict) -> None:
+    """
+    Удаляет записанное нагрузкой: созданного командой пользователя
+    (вместе с его постами и подписками) или, для существующего,
+    посты начиная с first_post_id и новые подписки.
+    """
+    users = User.objects.filter(username=sample['username'])
+    if sample['created_user']:
+        users.delete()
+        return
+    Post.objects.filter(
+        author__in=users, pk__gte=sample['first_post_id'],
+    ).delete()
+    Follow.objects.filter(user__in=users).exclude(
+        pk__in=sample['follow_ids'],
+    ).delete()
+
+
+def pages(total: int) -> int:
+    return max(math.ceil(total / settings.LIMIT_POSTS), 1)
+
+
+class Scenarios:
+    """
+    Сценарии смешанной нагрузки. Каждый сценарий выполняет
+    один или несколько запросов и записывает их под именем маршрута;
+    глубокие страницы лент записываются отдельно.
+    """
+
+    def __init__(
+        self,
+        sample: dict,
+        make_transport: typing.Callable,
+        rng: random.Random,
+    ) -> None:
+        self.sample = sample
+        self.make_transport = make_transport
+        self.rng = rng
+        self.anonymous = make_transport()
+        self.user = make_transport()
+        self.login(self.user)
+
+    def run(self, name: str) -> None:
+        getattr(self, name)()
+
+    def browse_feed(self, route: str, path: str, total: int) -> None:
+        self.anonymous.request(route, 'GET', path)
+        depth = pages(total)
+        if depth > 1:
+            self.anonymous.request(
+                f'{route} (deep)', 'GET', path,
+                {'page': self.rng.randint(2, depth)},
+            )
+
+    def browse_index(self) -> None:
+        self.browse_feed(
+            'index', reverse('posts:index'), self.sample['posts_total'],
+        )
+
+    def browse_group(self) -> None:
+        if self.sample['groups']:
+            slug, total = self.rng.choice(self.sample['groups'])
+            self.browse_feed(
+                'group_list', reverse('posts:group_list', args=(slug,)), total,
+            )
+
+    def browse_profile(self) -> None:
+        if self.sample['authors']:
+            username, total = self.rng.choice(self.sample['authors'])
+            self.browse_feed(
+                'profile', reverse('posts:profile', args=(username,)), total,
+            )
+
+    def post_detail(self) -> None:
+        if self.sample['post_ids']:
+            post_id = self.rng.choice(self.sample['post_ids'])
+            self.anonymous.request(
+                'post_detail', 'GET',
+                reverse('posts:post_detail', args=(post_id,)),
+            )
+
+    def search(self) -> None:
+        self.anonymous.request(
+            'search', 'GET', reverse('posts:search'),
+            {'q': self.rng.choice(WORDS)},
+        )
+
+    def feeds(self) -> None:
+        route = self.rng.choice(SCENARIO_ROUTES['feeds'])
+        if route.startswith('group'):
+            if not self.sample['groups']:
+                return
+            args = (self.rng.choice(self.sample['groups'])[0],)
+        elif route.startswith('profile'):
+            args = (self.sample['username'],)
+        else:
+            args = ()
+        self.anonymous.request(
+            route, 'GET', reverse(f'posts:{route}', args=args),
+        )
+
+    def sitemap(self) -> None:
+        self.anonymous.request('sitemap', 'GET', reverse('posts:sitemap'))
+        if self.sample['sitemap_shards']:
+            self.anonymous.request(
+                'sitemap_shard', 'GET', reverse(
+                    'posts:sitemap_shard',
+                    args=self.rng.choice(self.sample['sitemap_shards']),
+                ),
+            )
+
+    def login(self, transport: typing.Any = None) -> None:
+        """Вход с формы; без transport - новым посетителем."""
+        transport = transport or self.make_transport()
+        path = reverse('users:login')
+        transport.request('login', 'GET', path)
+        transport.request('login', 'POST', path, {
+            'username': self.sample['username'],
+            'password': self.sample['password'],
+        }, expected=(302,))
+
+    def create_post(self) -> None:
+        path = reverse('posts:post_create')
+        self.user.request('post_create', 'GET', path)
+        data = {'text': f'loadtest {timezone.now().isoformat()}'}
+        if self.sample['group_ids']:
+            data['group'] = self.rng.choice(self.sample['group_ids'])
+        self.user.request('post_create', 'POST', path, data, expected=(302,))
+
+    def edit_post(self) -> None:
+        post_id = self.rng.choice(self.sample['own_post_ids'])
+        path = reverse('posts:post_edit', args=(post_id,))
+        self.user.request('post_edit', 'GET', path)
+        self.user.request('post_edit', 'POST', path, {
+            'text': f'loadtest edit {timezone.now().isoformat()}',
+        }, expected=(302,))
+
+    def follow(self) -> None:
+        """
+        Подписка на случайного автора или группу, чтение ленты
+        подписок и отписка; подписки пользователя нагрузки
+        не копятся от прогона к прогону.
+        """
+        targets = [
+            ('profile', username) for username, _ in self.sample['authors']
+            if username != self.sample['username']
+        ] + [('group', slug) for slug, _ in self.sample['groups']]
+        if not targets:
+            return
+        kind, target = self.rng.choice(targets)
+        self.user.request(
+            f'{kind}_follow', 'POST',
+            reverse(f'posts:{kind}_follow', args=(target,)),
+            expected=(302,),
+        )
+        self.user.request('follow_index', 'GET', reverse('posts:follow_index'))
+        self.user.request(
+            f'{kind}_unfollow', 'POST',
+            reverse(f'posts:{kind}_unfollow', args=(target,)),
+            expected=(302,),
+        )
+
+
+def run_worker(
+    sample: dict,
+    base_url: typing.Optional[str],
+    duration: float,
+    seed: int,
+    weights: typing.Dict[str, int],
+) -> Recorder:
+    """
+    Исполнитель нагрузки: до истечения duration выбирает
+    сценарии случайно с весами weights.
+    """
+    recorder = Recorder()
+
+    def make_transport() -> typing.Any:
+        if base_url:
+            return HttpTransport(recorder, base_url)
+        return InProcessTransport(recorder)
+
+    rng = random.Random(seed)
+    scenarios = Scenarios(sample, make_transport, rng)
+    names, scenario_weights = zip(*weights.items())
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        scenarios.run(rng.choices(names, scenario_weights)[0])
+    connections.close_all()
+    return recorder
+
+
+class Command(BaseCommand):
+    """
+    Нагрузочный тест: смешанные сценарии анонимного чтения лент
+    (включая глубокие страницы), страниц постов, поиска, лент
+    RSS/Atom и карты сайта, входа на сайт, создания
+    и редактирования постов.
+
+    Запросы выполняются в этом же процессе через WSGI-обработчик
+    Django или, с --url, к запущенному серверу. Исполнители -
+    потоки или, с --processes, процессы. Для каждого маршрута
+    выводятся p50/p95/p99 задержки, запросы в секунду
+    и среднее число SQL-запросов (только в этом же процессе),
+    результаты можно сохранить в JSON для сравнения запусков.
+
+    Тест пишет в базу: создает пользователя нагрузки, посты
+    и подписки и удаляет их после прогона. Поэтому он запускается
+    только на тестовой базе (см. is_test_database) или с --allow-writes.
+    Без --password пароль нового пользователя нагрузки генерируется.
+    """
+
+    help = 'Нагрузочный тест всех маршрутов posts.urls'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            '--url', help='адрес сервера, например http://127.0.0.1:8000',
+        )
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument(
+            '--processes', action='store_true',
+            help='исполнители - процессы, а не потоки',
+        )
+        parser.add_argument(
+            '--duration', type=float, default=10, help='секунд',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--scenarios', nargs='+', choices=SCENARIO_WEIGHTS,
+            help='только перечисленные сценарии',
+        )
+        parser.add_argument('--username', default='loadtest')
+        parser.add_argument(
+            '--password',
+            help='пароль пользователя нагрузки; по умолчанию случайный',
+        )
+        parser.add_argument(
+            '--allow-writes', action='store_true',
+            help='разрешить запись в нетестовую базу',
+        )
+        parser.add_argument('--output', help='файл результатов JSON')
+
+    def handle(self, *args: tuple, **options: dict) -> None:
+        weights = {
+            name: weight for name, weight in SCENARIO_WEIGHTS.items()
+            if not options['scenarios'] or name in options['scenarios']
+        }
+        if not (options['allow_writes'] or is_test_database()):
+            raise CommandError(
+                'Нагрузочный тест пишет в базу '
+                f'{connection.settings_dict["NAME"]}, которая не похожа '
+                'на тестовую; для запуска укажите --allow-writes',
+            )
+        self.warn_uncovered(weights)
+        sample = collect_sample(
+            options['username'],
+            options['password'] or secrets.token_urlsafe(16),
+        )
+        started = time.perf_counter()
+        try:
+            recorder = self.run_workers(sample, weights, options)
+        finally:
+            cleanup(sample)
+        seconds = time.perf_counter() - started
+        routes = recorder.summary(seconds)
+        self.report(routes, seconds)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump({
+                    'started_at': timezone.now().isoformat(),
+                    'mode': 'http' if options['url'] else 'in-process',
+                    'url': options['url'],
+                    'workers': options['workers'],
+                    'processes': options['processes'],
+                    'duration': round(seconds, 2),
+                    'posts_total': sample['posts_total'],
+                    'routes': routes,
+                }, file, ensure_ascii=False, indent=2)
+
+    def run_workers(
+        self, sample: dict, weights: dict, options: dict,
+    ) -> Recorder:
+        executor_class = ThreadPoolExecutor
+        if options['processes']:
+            executor_class = ProcessPoolExecutor
+            connections.close_all()
+        recorder = Recorder()
+        with executor_class(options['workers']) as executor:
+            futures = [
+                executor.submit(
+                    run_worker, sample, options['url'],
+                    options['duration'], options['seed'] + number, weights,
+                )
+                for number in range(options['workers'])
+            ]
+            for future in futures:
+                recorder.merge(future.result())
+        return recorder
+
+    def warn_uncovered(self, weights: dict) -> None:
+        """Предупреждает о маршрутах posts.urls без сценария."""
+        covered = {
+            route for name in weights for route in SCENARIO_ROUTES[name]
+        }
+        uncovered = {
+            pattern.name for pattern in posts_urls.urlpatterns
+        } - covered
+        if uncovered:
+            self.stderr.write(
+                'Маршруты без нагрузки: ' + ', '.join(sorted(uncovered)),
+            )
+
+    def report(self, routes: dict, seconds: float) -> None:
+        columns = ('requests', 'rps', *(f'p{r}_ms' for r in PERCENTILES),
+                   'queries', 'errors')
+        width = max((len(route) for route in routes), default=5) + 2
+        self.stdout.write(
+            'route'.ljust(width) + ''.join(c.rjust(10) for c in columns),
+        )
+        for route, stats in routes.items():
+            self.stdout.write(route.ljust(width) + ''.join(
+                str('-' if stats[c] is None else stats[c]).rjust(10)
+                for c in columns
+            ))
+        for route, stats in routes.items():
+            for reason, count in stats['failures'].items():
+                self.stderr.write(f'{route}: {reason} x{count}')
+        total = sum(stats['requests'] for stats in routes.values())
+        self.stdout.write(self.style.SUCCESS(
+            f'Всего запросов: {total} за {seconds:.1f} с, '
+            f'{total / seconds:.1f} в секунду',
+        ))
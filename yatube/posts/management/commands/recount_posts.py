@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.counters import recount_authors, recount_groups
+
+
+class Command(BaseCommand):
+    """
+    Сверяет денормализованные счетчики постов авторов и групп
+    с фактическим числом постов и исправляет расхождения.
+    """
+
+    help = 'Пересчитывает счетчики постов авторов и групп'
+
+    def handle(self, *args: tuple, **options: dict) -> None:
+        with transaction.atomic():
+            groups = recount_groups()
+            authors = recount_authors()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Исправлено групп: {groups}, авторов: {authors}',
+            ),
+        )
@@ -0,0 +1,41 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import DEFAULT_DB_ALIAS
+
+from core.db import copy_database
+
+
+class Command(BaseCommand):
+    """
+    Замена репликации для локального запуска: копирует основную
+    базу SQLite в файлы реплик DATABASE_REPLICAS. С --interval
+    повторяет копирование, имитируя отставание реплик.
+    """
+
+    help = 'Копирует основную базу SQLite в реплики'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=0,
+            help='Повторять каждые N секунд (0 - скопировать один раз)',
+        )
+
+    def handle(self, *args: tuple, **options: dict) -> None:
+        if not settings.DATABASE_REPLICAS:
+            self.stdout.write('Реплики не настроены (DATABASE_REPLICAS)')
+            return
+        source = settings.DATABASES[DEFAULT_DB_ALIAS]['NAME']
+        while True:
+            for alias in settings.DATABASE_REPLICAS:
+                started = time.perf_counter()
+                copy_database(source, settings.DATABASES[alias]['NAME'])
+                self.stdout.write(self.style.SUCCESS(
+                    f'{alias}: {time.perf_counter() - started:.2f} с',
+                ))
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,64 @@
+from django.conf import settings
+from django.core.management.base import (
+    BaseCommand, CommandError, CommandParser,
+)
+
+from core.slowlog import aggregate
+
+SORT_KEYS: tuple = ('total_ms', 'count', 'max_ms', 'avg_ms')
+
+
+class Command(BaseCommand):
+    """
+    Сводка журнала медленных SQL-запросов по видам запросов:
+    сколько раз встретился запрос, сколько времени занял,
+    из каких view вызывался и каким был его план.
+    """
+
+    help = 'Сводка журнала медленных SQL-запросов'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            '--file',
+            default=settings.SLOW_QUERY_LOG,
+            help='Файл журнала (по умолчанию SLOW_QUERY_LOG)',
+        )
+        parser.add_argument(
+            '--sort',
+            choices=SORT_KEYS,
+            default='total_ms',
+            help='Порядок сводки, по убыванию',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=20,
+            help='Сколько видов запросов вывести',
+        )
+
+    def handle(self, *args: tuple, **options: dict) -> None:
+        try:
+            with open(options['file'], encoding='utf-8') as file:
+                groups = aggregate(file)
+        except FileNotFoundError:
+            raise CommandError(f'Журнал не найден: {options["file"]}')
+        groups.sort(key=lambda group: group[options['sort']], reverse=True)
+        for group in groups[:options['limit']]:
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'{group["fingerprint"]}  count={group["count"]}  '
+                f'total_ms={group["total_ms"]:.1f}  '
+                f'avg_ms={group["avg_ms"]:.1f}  '
+                f'max_ms={group["max_ms"]:.1f}',
+            ))
+            self.stdout.write(f'  {group["sql"]}')
+            self.stdout.write(f'  params: {group["params"]}')
+            self.stdout.write('  views: ' + ', '.join(
+                f'{view} ({count})'
+                for view, count in group['views'].most_common()
+            ))
+            for line in group.get('plan') or ():
+                self.stdout.write(f'  plan: {line}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Видов запросов: {len(groups)}, '
+            f'записей: {sum(group["count"] for group in groups)}',
+        ))
@@ -0,0 +1,66 @@
+# Generated by Django 2.2.6 on 2026-10-18 05:46
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+def fill_post_counters(apps, schema_editor):
+    Group = apps.get_model('posts', 'Group')
+    Post = apps.get_model('posts', 'Post')
+    Profile = apps.get_model('posts', 'Profile')
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    author_counts = dict(
+        Post.objects.order_by().values_list('author').annotate(Count('pk'))
+    )
+    Profile.objects.bulk_create(
+        Profile(user_id=pk, post_count=author_counts.get(pk, 0))
+        for pk in User.objects.values_list('pk', flat=True)
+    )
+    group_counts = (
+        Post.objects.filter(group__isnull=False)
+        .order_by().values_list('group').annotate(Count('pk'))
+    )
+    for group_id, total in group_counts:
+        Group.objects.filter(pk=group_id).update(post_count=total)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0007_auto_20221030_2143'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='post_count',
+            field=models.IntegerField(default=0, editable=False, verbose_name='число постов'),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='author',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='posts', to=settings.AUTH_USER_MODEL, verbose_name='автор'),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='group',
+            field=models.ForeignKey(blank=True, help_text='Группа, к которой будет относиться пост', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='posts', to='posts.Group', verbose_name='группа'),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='pub_date',
+            field=models.DateTimeField(auto_now_add=True, verbose_name='дата публикации'),
+        ),
+        migrations.CreateModel(
+            name='Profile',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('post_count', models.IntegerField(default=0, editable=False, verbose_name='число постов')),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='profile', to=settings.AUTH_USER_MODEL, verbose_name='пользователь')),
+            ],
+        ),
+        migrations.RunPython(fill_post_counters, migrations.RunPython.noop),
+    ]
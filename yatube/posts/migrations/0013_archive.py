@@ -0,0 +1,51 @@
+# Generated by Django 2.2.6 on 2026-10-18 06:28
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0012_post_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='archived_count',
+            field=models.IntegerField(default=0, editable=False, verbose_name='число постов в архиве'),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='archived_count',
+            field=models.IntegerField(default=0, editable=False, verbose_name='число постов в архиве'),
+        ),
+        migrations.CreateModel(
+            name='ArchivedPost',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('text', models.TextField(verbose_name='текст поста')),
+                ('pub_date', models.DateTimeField(verbose_name='дата публикации')),
+                ('updated_at', models.DateTimeField(verbose_name='дата изменения')),
+                ('version', models.PositiveIntegerField(default=1, verbose_name='версия')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='дата переноса в архив')),
+                ('author', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='archived_posts', to=settings.AUTH_USER_MODEL, verbose_name='автор')),
+                ('group', models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_posts', to='posts.Group', verbose_name='группа')),
+            ],
+            options={
+                'ordering': ('-pub_date', '-id'),
+                'default_related_name': 'archived_posts',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='archivedpost',
+            index=models.Index(fields=['group', 'pub_date', 'id'], name='archive_group_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedpost',
+            index=models.Index(fields=['author', 'pub_date', 'id'], name='archive_author_feed_idx'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 2.2.6 on 2026-10-18 06:56
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Q
+
+
+def mark_pulled_posts(apps, schema_editor):
+    Group = apps.get_model('posts', 'Group')
+    Post = apps.get_model('posts', 'Post')
+    Profile = apps.get_model('posts', 'Profile')
+    limit = settings.TIMELINE_FANOUT_LIMIT
+    Post.objects.filter(
+        Q(author_id__in=Profile.objects.filter(
+            follower_count__gte=limit,
+        ).values('user_id'))
+        | Q(group_id__in=Group.objects.filter(
+            follower_count__gte=limit,
+        ).values('pk')),
+    ).update(fanned_out=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_import_checkpoint'),
+    ]
+
+    # AddField в SQLite пересоздает таблицу и теряет триггеры
+    # полнотекстового индекса (0012), ADD COLUMN их сохраняет.
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    sql='ALTER TABLE posts_post '
+                        'ADD COLUMN fanned_out bool NOT NULL DEFAULT 1',
+                    reverse_sql='ALTER TABLE posts_post DROP COLUMN fanned_out',
+                ),
+            ],
+            state_operations=[
+                migrations.AddField(
+                    model_name='post',
+                    name='fanned_out',
+                    field=models.BooleanField(default=True, editable=False, verbose_name='разослан в ленты'),
+                ),
+            ],
+        ),
+        migrations.RunPython(mark_pulled_posts, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(fanned_out=False), fields=['author', 'pub_date', 'id'], name='post_author_pulled_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(fanned_out=False), fields=['group', 'pub_date', 'id'], name='post_group_pulled_idx'),
+        ),
+    ]
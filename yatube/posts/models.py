@@ -1,5 +1,7 @@
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
+
+from core.db import retry_on_lock
 
 User = get_user_model()
 
@@ -13,6 +15,10 @@ class Group(models.Model):
     title: название группы.
     slug: уникальный адрес группы, часть URL.
     description: текст, описывающий сообщество.
+    post_count: число постов сообщества, поддерживается
+    при сохранении и удалении постов; включает посты архива.
+    archived_count: сколько из них перенесено в архив.
+    follower_count: число подписчиков группы.
     """
 
     TITLE_LENGTH_RETURN: int = 60
@@ -20,11 +26,84 @@ class Group(models.Model):
     title = models.CharField('название группы', max_length=200)
     slug = models.SlugField('уникальный адрес', unique=True)
     description = models.TextField('описание группы')
+    post_count = models.IntegerField(
+        'число постов', default=0, editable=False,
+    )
+    archived_count = models.IntegerField(
+        'число постов в архиве', default=0, editable=False,
+    )
+    follower_count = models.IntegerField(
+        'число подписчиков', default=0, editable=False,
+    )
 
     def __str__(self) -> str:
         return self.title[:self.TITLE_LENGTH_RETURN]
 
 
+class PostQuerySet(models.QuerySet):
+    """
+    Именованные профили выборки постов: каждый соединяет
+    ровно те таблицы и загружает ровно те поля, которые
+    нужны соответствующему шаблону.
+    """
+
+    CARD_FIELDS: tuple = (
+        'text',
+        'pub_date',
+        'author_id',
+        'group_id',
+        'version',
+    )
+    AUTHOR_FIELDS: tuple = (
+        'author__username',
+        'author__first_name',
+        'author__last_name',
+    )
+    GROUP_FIELDS: tuple = (
+        'group__slug',
+        'group__title',
+    )
+
+    def for_feed(self) -> 'PostQuerySet':
+        """Посты для лент index и group_list: карточка, автор и группа."""
+        return self.select_related('author', 'group').only(
+            *self.CARD_FIELDS, *self.AUTHOR_FIELDS, *self.GROUP_FIELDS,
+        )
+
+    def for_profile(self) -> 'PostQuerySet':
+        """
+        Посты для ленты profile: автор у всех постов один
+        и уже передан в шаблон, поэтому соединяется только группа.
+        """
+        return self.select_related('group').only(
+            *self.CARD_FIELDS, *self.GROUP_FIELDS,
+        )
+
+    def for_syndication(self) -> 'PostQuerySet':
+        """
+        Посты для лент RSS и Atom: поля карточки, автор, группа
+        и дата изменения для элемента updated.
+        """
+        return self.for_feed().only(
+            *self.CARD_FIELDS,
+            *self.AUTHOR_FIELDS,
+            *self.GROUP_FIELDS,
+            'updated_at',
+        )
+
+    def for_detail(self) -> 'PostQuerySet':
+        """
+        Пост для страницы post_detail: автор вместе
+        со счетчиком его постов и группа.
+        """
+        return self.select_related('author__profile', 'group').only(
+            *self.CARD_FIELDS,
+            *self.AUTHOR_FIELDS,
+            *self.GROUP_FIELDS,
+            'author__profile__post_count',
+        )
+
+
 class Post(models.Model):
     """
     Модель для хранения статей.
@@ -34,16 +113,35 @@ class Post(models.Model):
 
     text: текс статьи.
     pud_date: дата публикации статьи.
+    updated_at: дата последнего изменения статьи,
+    по ней вычисляются ETag и Last-Modified страниц.
     author: автор статьи, установлена связь с таблицей User,
     при удалении из таблицы User автора,
     также будут удалены все связанные статьи.
     group: название сообщества, к которому относится статья,
     установлена связь с моделью Group, чтобы при добавлении
     новой записи можно было сослаться на данную модель.
+    version: номер версии поста, увеличивается при каждом
+    сохранении и входит в ключ кэша карточки поста.
+    fanned_out: пост разослан в ленты подписчиков автора и группы
+    (posts.timeline.fan_out); если у автора или группы было
+    от TIMELINE_FANOUT_LIMIT подписчиков, лента подписок читает
+    пост из Post, сколько бы подписчиков ни осталось потом.
+
+    Составные индексы (группа, дата, id), (автор, дата, id)
+    и (дата, id) покрывают фильтрацию и сортировку лент
+    group_list, profile и index; отдельные индексы внешних ключей
+    не нужны, их заменяют префиксы составных.
+    Частичные индексы по неразосланным постам (автор, дата, id)
+    и (группа, дата, id) покрывают их чтение в ленте подписок.
+    Индексы по updated_at позволяют вычислить ETag
+    и Last-Modified лент, не читая саму таблицу.
     """
 
     TEXT_LENGTH_RETURN: int = 50
 
+    is_archived: bool = False
+
     text = models.TextField(
         'текст поста',
         help_text='Введите текст поста',
@@ -51,9 +149,13 @@ class Post(models.Model):
     pub_date = models.DateTimeField(
         verbose_name='дата публикации', auto_now_add=True,
     )
+    updated_at = models.DateTimeField(
+        verbose_name='дата изменения', auto_now=True,
+    )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
+        db_index=False,
         verbose_name='автор',
     )
     group = models.ForeignKey(
@@ -61,16 +163,301 @@ class Post(models.Model):
         blank=True,
         null=True,
         on_delete=models.SET_NULL,
+        db_index=False,
         verbose_name='группа',
         help_text='Группа, к которой будет относиться пост',
     )
+    version = models.PositiveIntegerField(
+        'версия', default=1, editable=False,
+    )
+    fanned_out = models.BooleanField(
+        'разослан в ленты', default=True, editable=False,
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
-        ordering = ('-pub_date',)
+        ordering = ('-pub_date', '-id')
         default_related_name = 'posts'
+        indexes = (
+            models.Index(
+                fields=('group', 'pub_date', 'id'), name='post_group_feed_idx',
+            ),
+            models.Index(
+                fields=('author', 'pub_date', 'id'),
+                name='post_author_feed_idx',
+            ),
+            models.Index(fields=('pub_date', 'id'), name='post_feed_idx'),
+            models.Index(
+                fields=('group', 'updated_at'), name='post_group_updated_idx',
+            ),
+            models.Index(
+                fields=('author', 'updated_at'),
+                name='post_author_updated_idx',
+            ),
+            models.Index(fields=('updated_at',), name='post_updated_idx'),
+            models.Index(
+                fields=('author', 'pub_date', 'id'),
+                name='post_author_pulled_idx',
+                condition=models.Q(fanned_out=False),
+            ),
+            models.Index(
+                fields=('group', 'pub_date', 'id'),
+                name='post_group_pulled_idx',
+                condition=models.Q(fanned_out=False),
+            ),
+        )
 
     def __str__(self) -> str:
         """
         Возвращает в консоль сокращенный текст поста.
         """
         return self.text[:self.TEXT_LENGTH_RETURN]
+
+    @classmethod
+    def from_db(cls, db: str, field_names: list, values: list) -> 'Post':
+        """
+        Запоминает автора и группу загруженного поста,
+        чтобы при сохранении поправить счетчики без лишнего запроса.
+        """
+        instance = super().from_db(db, field_names, values)
+        if {'author_id', 'group_id'} <= instance.__dict__.keys():
+            instance._loaded_keys = (instance.author_id, instance.group_id)
+        return instance
+
+    def save(self, *args: tuple, **kwargs: dict) -> None:
+        """
+        Сохраняет пост в транзакции, чтобы обработчики post_save
+        обновили счетчики постов автора и группы атомарно.
+        Транзакция, не дождавшаяся блокировки базы, повторяется.
+        При редактировании увеличивает версию поста, тем самым
+        сбрасывая закэшированную карточку.
+        """
+        if not self._state.adding:
+            self.version += 1
+            if not hasattr(self, '_loaded_keys'):
+                self._loaded_keys = Post.objects.filter(
+                    pk=self.pk,
+                ).values_list('author_id', 'group_id').first()
+        adding, pk = self._state.adding, self.pk
+
+        @retry_on_lock
+        def save_atomic() -> None:
+            # Откаченная попытка не должна оставить посту новый pk.
+            self._state.adding, self.pk = adding, pk
+            with transaction.atomic(using=kwargs.get('using')):
+                super(Post, self).save(*args, **kwargs)
+
+        save_atomic()
+        self._loaded_keys = (self.author_id, self.group_id)
+
+
+class Profile(models.Model):
+    """
+    Денормализованные данные автора.
+
+    user: пользователь, которому принадлежит профиль.
+    post_count: число постов автора, поддерживается
+    при сохранении и удалении постов; включает посты архива.
+    archived_count: сколько из них перенесено в архив.
+    follower_count: число подписчиков автора.
+    """
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name='profile',
+        verbose_name='пользователь',
+    )
+    post_count = models.IntegerField(
+        'число постов', default=0, editable=False,
+    )
+    archived_count = models.IntegerField(
+        'число постов в архиве', default=0, editable=False,
+    )
+    follower_count = models.IntegerField(
+        'число подписчиков', default=0, editable=False,
+    )
+
+    def __str__(self) -> str:
+        return str(self.user)
+
+
+class ArchivedPost(models.Model):
+    """
+    Архив старых постов: команда archive_posts переносит сюда
+    посты старше заданного срока вместе с их id, поэтому
+    адреса постов не меняются. Все посты архива старше всех
+    постов основной таблицы, и ленты profile и group_list
+    продолжаются в архиве после последнего поста основной таблицы.
+    Посты архива только читаются.
+
+    Поля совпадают с Post, но даты хранятся как есть,
+    без auto_now. archived_at: дата переноса в архив.
+    Индексы покрывают только ленты profile и group_list.
+    """
+
+    TEXT_LENGTH_RETURN: int = Post.TEXT_LENGTH_RETURN
+
+    is_archived: bool = True
+
+    text = models.TextField('текст поста')
+    pub_date = models.DateTimeField('дата публикации')
+    updated_at = models.DateTimeField('дата изменения')
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        db_index=False,
+        verbose_name='автор',
+    )
+    group = models.ForeignKey(
+        Group,
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+        db_index=False,
+        verbose_name='группа',
+    )
+    version = models.PositiveIntegerField('версия', default=1)
+    archived_at = models.DateTimeField(
+        'дата переноса в архив', auto_now_add=True,
+    )
+
+    objects = PostQuerySet.as_manager()
+
+    class Meta:
+        ordering = ('-pub_date', '-id')
+        default_related_name = 'archived_posts'
+        indexes = (
+            models.Index(
+                fields=('group', 'pub_date', 'id'),
+                name='archive_group_feed_idx',
+            ),
+            models.Index(
+                fields=('author', 'pub_date', 'id'),
+                name='archive_author_feed_idx',
+            ),
+        )
+
+    def __str__(self) -> str:
+        return self.text[:self.TEXT_LENGTH_RETURN]
+
+
+class Follow(models.Model):
+    """
+    Подписка пользователя user на автора author или на группу group,
+    заполнено ровно одно из двух полей.
+    Индексы (автор, пользователь) и (группа, пользователь)
+    выбирают подписчиков при рассылке нового поста.
+    """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        db_index=False,
+        related_name='follows',
+        verbose_name='подписчик',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        db_index=False,
+        related_name='followers',
+        verbose_name='автор',
+    )
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        db_index=False,
+        related_name='followers',
+        verbose_name='группа',
+    )
+    created = models.DateTimeField('дата подписки', auto_now_add=True)
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'author'), name='follow_unique_author',
+            ),
+            models.UniqueConstraint(
+                fields=('user', 'group'), name='follow_unique_group',
+            ),
+            models.CheckConstraint(
+                check=(
+                    models.Q(author__isnull=False, group__isnull=True)
+                    | models.Q(author__isnull=True, group__isnull=False)
+                ),
+                name='follow_one_target',
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('author', 'user'), name='follow_author_idx',
+            ),
+            models.Index(fields=('group', 'user'), name='follow_group_idx'),
+        )
+
+    def __str__(self) -> str:
+        return f'{self.user} -> {self.author or self.group}'
+
+
+class TimelineEntry(models.Model):
+    """
+    Строка ленты подписок пользователя: пост автора или группы,
+    на которые он подписан. Строки добавляются при публикации
+    поста (posts.timeline.fan_out), pub_date копируется из поста,
+    чтобы страница ленты читалась по индексу (user, pub_date, post).
+    Посты авторов и групп с большим числом подписчиков сюда
+    не попадают (Post.fanned_out), они дочитываются из Post
+    при чтении ленты.
+    """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        db_index=False,
+        related_name='timeline',
+        verbose_name='читатель',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='пост',
+    )
+    pub_date = models.DateTimeField('дата публикации')
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'post'), name='timeline_unique_post',
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('user', 'pub_date', 'post'),
+                name='timeline_feed_idx',
+            ),
+        )
+
+
+class ImportCheckpoint(models.Model):
+    """
+    Контрольная точка команды import_posts.
+
+    source: имя импорта, по умолчанию абсолютный путь файла.
+    position: число обработанных строк файла; записывается
+    в той же транзакции, что и пачка постов, поэтому повторный
+    запуск не вставляет зафиксированную пачку второй раз.
+    """
+
+    source = models.CharField('источник', max_length=500, unique=True)
+    position = models.PositiveIntegerField('обработано строк', default=0)
+    updated_at = models.DateTimeField('дата изменения', auto_now=True)
+
+    def __str__(self) -> str:
+        return f'{self.source}: {self.position}'
@@ -0,0 +1,122 @@
+import re
+import typing
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from django.utils.safestring import SafeText, mark_safe
+
+from posts.models import Post
+
+WORD = re.compile(r'\w+')
+
+# Окончания русских слов, отбрасываемые перед поиском по префиксу:
+# встроенные токенизаторы FTS5 не умеют приводить слова к основе.
+ENDINGS: tuple = tuple(sorted(
+    (
+        'ами', 'ями', 'ого', 'его', 'ому', 'ему', 'ыми', 'ими', 'ой',
+        'ей', 'ий', 'ый', 'ая', 'яя', 'ое', 'ее', 'ые', 'ие', 'ую',
+        'юю', 'ам', 'ям', 'ах', 'ях', 'ом', 'ем', 'ов', 'ев', 'а',
+        'я', 'о', 'е', 'ы', 'и', 'у', 'ю', 'ь',
+    ),
+    key=len,
+    reverse=True,
+))
+MIN_STEM_LENGTH: int = 4
+
+HIGHLIGHT_START: str = '\x02'
+HIGHLIGHT_END: str = '\x03'
+SNIPPET_TOKENS: int = 24
+
+SEARCH_SQL: str = (
+    'SELECT rowid, snippet(posts_post_fts, 0, %s, %s, %s, %s) '
+    'FROM posts_post_fts WHERE posts_post_fts MATCH %s '
+    'ORDER BY rank LIMIT %s OFFSET %s'
+)
+COUNT_SQL: str = (
+    'SELECT count(*) FROM posts_post_fts WHERE posts_post_fts MATCH %s'
+)
+IDS_SQL: str = 'SELECT rowid FROM posts_post_fts WHERE posts_post_fts MATCH %s'
+
+
+def stem(word: str) -> str:
+    """Отбрасывает окончание слова, если остается достаточно длинная основа."""
+    for ending in ENDINGS:
+        if (
+            word.endswith(ending)
+            and len(word) - len(ending) >= MIN_STEM_LENGTH
+        ):
+            return word[:-len(ending)]
+    return word
+
+
+def build_match_query(query: str) -> str:
+    """
+    Превращает пользовательский ввод в запрос FTS5: каждое слово
+    приводится к основе и ищется по префиксу, все слова обязательны.
+    Служебный синтаксис FTS5 из ввода не попадает в запрос.
+    """
+    return ' '.join(
+        f'"{stem(word)}"*' for word in WORD.findall(query.lower())
+    )
+
+
+def search_ids(query: str) -> RawSQL:
+    """Подзапрос с id постов, подходящих под запрос, для pk__in."""
+    return RawSQL(IDS_SQL, (build_match_query(query),))
+
+
+def highlight(snippet: str) -> SafeText:
+    """Экранирует фрагмент текста и выделяет найденные слова тегом mark."""
+    return mark_safe(
+        escape(snippet)
+        .replace(HIGHLIGHT_START, '<mark>')
+        .replace(HIGHLIGHT_END, '</mark>'),
+    )
+
+
+class SearchResults:
+    """
+    Результаты полнотекстового поиска, упорядоченные по релевантности.
+    Поддерживает count() и срезы, поэтому подходит для Paginator:
+    каждая страница выбирается из индекса FTS5 одним запросом,
+    посты страницы загружаются вторым.
+    """
+
+    def __init__(self, query: str) -> None:
+        self.match = build_match_query(query)
+
+    def count(self) -> int:
+        if not self.match:
+            return 0
+        with connection.cursor() as cursor:
+            cursor.execute(COUNT_SQL, (self.match,))
+            return cursor.fetchone()[0]
+
+    def __len__(self) -> int:
+        return self.count()
+
+    def __getitem__(self, index: slice) -> typing.List[Post]:
+        if not self.match:
+            return []
+        with connection.cursor() as cursor:
+            cursor.execute(
+                SEARCH_SQL,
+                (
+                    HIGHLIGHT_START,
+                    HIGHLIGHT_END,
+                    '…',
+                    SNIPPET_TOKENS,
+                    self.match,
+                    index.stop - index.start,
+                    index.start,
+                ),
+            )
+            snippets = dict(cursor.fetchall())
+        posts = Post.objects.for_feed().in_bulk(snippets)
+        results = []
+        for pk, snippet in snippets.items():
+            if pk in posts:
+                posts[pk].snippet = highlight(snippet)
+                results.append(posts[pk])
+        return results
@@ -0,0 +1,271 @@
+import typing
+
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import (
+    post_delete, post_save, pre_delete, pre_save,
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from posts.cache import GROUP_FEED, PROFILE_FEED, expire_post_feeds
+from posts.counters import change_post_count
+from posts.models import ArchivedPost, Follow, Group, Post, Profile, User
+from posts.timeline import fan_out
+
+
+@receiver(post_save, sender=User)
+def create_profile(
+    sender: type, instance: User, created: bool, **kwargs: dict,
+) -> None:
+    """Заводит профиль со счетчиком постов для нового пользователя."""
+    if created:
+        Profile.objects.get_or_create(user=instance)
+
+
+def _post_keys(field: str, **filters: typing.Any) -> set:
+    """Различные значения field отобранных постов, включая архив."""
+    return {
+        value
+        for model in (Post, ArchivedPost)
+        for value in model.objects.filter(**filters).order_by().values_list(
+            field, flat=True,
+        ).distinct()
+    }
+
+
+def _expire_cards(**filters: typing.Any) -> None:
+    """
+    Увеличивает версии отобранных постов, включая архив,
+    и их updated_at, чтобы сменились и карточки, и ETag лент.
+    """
+    for model in (Post, ArchivedPost):
+        model.objects.filter(**filters).update(
+            version=F('version') + 1, updated_at=timezone.now(),
+        )
+
+
+# Поля автора, которые выводятся в карточке поста.
+CARD_AUTHOR_FIELDS: tuple = ('username', 'first_name', 'last_name')
+
+
+@receiver(pre_save, sender=User)
+def remember_card_author(sender: type, instance: User, **kwargs: dict) -> None:
+    """
+    Запоминает выводимые в карточках поля автора до сохранения.
+    Сохранения, не затрагивающие эти поля (например, last_login
+    при входе), обходятся без запроса.
+    """
+    update_fields = kwargs.get('update_fields')
+    if instance.pk is None or (
+        update_fields is not None
+        and not set(update_fields) & set(CARD_AUTHOR_FIELDS)
+    ):
+        return
+    instance._card_fields = User.objects.filter(pk=instance.pk).values_list(
+        *CARD_AUTHOR_FIELDS,
+    ).first()
+
+
+@receiver(post_save, sender=User)
+def expire_author_cards(
+    sender: type, instance: User, created: bool, **kwargs: dict,
+) -> None:
+    """
+    Карточки постов выводят имя и username автора,
+    поэтому при их изменении версии постов автора, в том числе
+    архивных, увеличиваются, как и при изменении группы.
+    Сбрасываются и страницы с этими карточками: главная,
+    группы автора и его профиль под прежним и новым username.
+    """
+    old = instance.__dict__.pop('_card_fields', None)
+    if created or old is None or old == tuple(
+        getattr(instance, field) for field in CARD_AUTHOR_FIELDS
+    ):
+        return
+    _expire_cards(author=instance)
+    group_ids = _post_keys('group_id', author=instance)
+    old_feed = PROFILE_FEED.format(username=old[0])
+    transaction.on_commit(
+        lambda: expire_post_feeds((instance.pk,), group_ids, (old_feed,)),
+    )
+
+
+@receiver(post_delete, sender=User)
+def expire_deleted_author(
+    sender: type, instance: User, **kwargs: dict,
+) -> None:
+    """
+    Сбрасывает профиль удаленного пользователя: страница
+    читается из кэша раньше проверки, что автор существует.
+    Главная и группы сбрасываются при удалении его постов.
+    """
+    feed = PROFILE_FEED.format(username=instance.username)
+    transaction.on_commit(lambda: expire_post_feeds((), (), (feed,)))
+
+
+@receiver(post_save, sender=Post)
+def count_saved_post(
+    sender: type, instance: Post, created: bool, **kwargs: dict,
+) -> None:
+    """
+    Обновляет счетчики при создании поста,
+    а при редактировании - только если сменился автор или группа.
+    """
+    new_keys = (instance.author_id, instance.group_id)
+    if created:
+        change_post_count(*new_keys, 1)
+        return
+    old_keys = getattr(instance, '_loaded_keys', None)
+    if old_keys is None or old_keys == new_keys:
+        return
+    old_author, old_group = old_keys
+    if old_author != instance.author_id:
+        change_post_count(old_author, None, -1)
+        change_post_count(instance.author_id, None, 1)
+    if old_group != instance.group_id:
+        change_post_count(None, old_group, -1)
+        change_post_count(None, instance.group_id, 1)
+
+
+@receiver(post_save, sender=Post)
+def fan_out_post(
+    sender: type, instance: Post, created: bool, **kwargs: dict,
+) -> None:
+    """
+    Рассылает новый пост в ленты подписок в той же транзакции,
+    что и его создание. Смена группы при редактировании
+    и перенос постов в ленты не попадают.
+    """
+    if created:
+        fan_out(instance.pk)
+
+
+@receiver(post_save, sender=Follow)
+def count_saved_follow(
+    sender: type, instance: Follow, created: bool, **kwargs: dict,
+) -> None:
+    """Увеличивает счетчик подписчиков автора или группы."""
+    if created:
+        change_post_count(
+            instance.author_id, instance.group_id, 1, 'follower_count',
+        )
+
+
+@receiver(post_delete, sender=Follow)
+def count_deleted_follow(
+    sender: type, instance: Follow, **kwargs: dict,
+) -> None:
+    """
+    Уменьшает счетчик подписчиков, в том числе при каскадном
+    удалении подписок вместе с подписчиком.
+    """
+    change_post_count(
+        instance.author_id, instance.group_id, -1, 'follower_count',
+    )
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender: type, instance: Post, **kwargs: dict) -> None:
+    """
+    Уменьшает счетчики при удалении поста, в том числе
+    при каскадном удалении постов вместе с автором.
+    Обнуление группы (SET_NULL) происходит только при удалении
+    самой группы, поэтому ее счетчик поправлять не нужно.
+    """
+    change_post_count(instance.author_id, instance.group_id, -1)
+
+
+@receiver(post_delete, sender=ArchivedPost)
+def count_deleted_archived_post(
+    sender: type, instance: ArchivedPost, **kwargs: dict,
+) -> None:
+    """
+    Уменьшает счетчики при удалении архивного поста, например
+    каскадном вместе с автором: post_count включает архив,
+    поэтому уменьшаются и он, и archived_count.
+    Лента группы продолжается в архиве и сбрасывается.
+    """
+    keys = (instance.author_id, instance.group_id)
+    change_post_count(*keys, -1)
+    change_post_count(*keys, -1, 'archived_count')
+    transaction.on_commit(
+        lambda: expire_post_feeds((keys[0],), (keys[1],)),
+    )
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def expire_post_pages(sender: type, instance: Post, **kwargs: dict) -> None:
+    """
+    Сбрасывает закэшированные страницы лент, затронутых постом:
+    главную, прежнюю и новую группу и профиль автора.
+    Сброс выполняется после фиксации транзакции, чтобы
+    параллельный запрос не закэшировал страницу без изменений.
+    Имена лент уже загруженных автора и группы поста берутся
+    из них, без повторного чтения после фиксации.
+    """
+    old_author, old_group = getattr(instance, '_loaded_keys', (None, None))
+    author_ids = {instance.author_id, old_author or instance.author_id}
+    group_ids = {instance.group_id, old_group}
+    feeds = []
+    # В Django 2.2 присваивание author_id и group_id
+    # не сбрасывает загруженный объект, поэтому сверяются id.
+    author = instance.author if Post.author.is_cached(instance) else None
+    if author is not None and author.pk == instance.author_id:
+        author_ids.discard(author.pk)
+        feeds.append(PROFILE_FEED.format(username=author.username))
+    group = instance.group if Post.group.is_cached(instance) else None
+    if group is not None and group.pk == instance.group_id:
+        group_ids.discard(group.pk)
+        feeds.append(GROUP_FEED.format(slug=group.slug))
+    transaction.on_commit(
+        lambda: expire_post_feeds(author_ids, group_ids, feeds),
+    )
+
+
+@receiver(pre_save, sender=Group)
+def remember_group_slug(sender: type, instance: Group, **kwargs: dict) -> None:
+    """Запоминает прежний slug группы, чтобы сбросить ее старую ленту."""
+    if instance.pk is not None:
+        instance._loaded_slug = Group.objects.filter(
+            pk=instance.pk,
+        ).values_list('slug', flat=True).first()
+
+
+@receiver(post_save, sender=Group)
+def expire_group_cards(
+    sender: type, instance: Group, created: bool, **kwargs: dict,
+) -> None:
+    """
+    Карточки постов ссылаются на группу по slug,
+    поэтому при изменении группы версии ее постов увеличиваются,
+    а закэшированные страницы с ними сбрасываются: лента группы
+    под прежним и новым slug, главная и профили авторов группы.
+    """
+    old_slug = instance.__dict__.pop('_loaded_slug', None)
+    if created:
+        return
+    _expire_cards(group=instance)
+    author_ids = _post_keys('author_id', group=instance)
+    old_feed = GROUP_FEED.format(slug=old_slug or instance.slug)
+    transaction.on_commit(
+        lambda: expire_post_feeds(author_ids, (instance.pk,), (old_feed,)),
+    )
+
+
+@receiver(pre_delete, sender=Group)
+def expire_deleted_group(
+    sender: type, instance: Group, **kwargs: dict,
+) -> None:
+    """
+    Перед удалением группы (посты остаются без группы)
+    сбрасывает карточки ее постов, ее ленту, главную
+    и профили авторов группы.
+    """
+    _expire_cards(group=instance)
+    author_ids = _post_keys('author_id', group=instance)
+    feed = GROUP_FEED.format(slug=instance.slug)
+    transaction.on_commit(
+        lambda: expire_post_feeds(author_ids, (), (feed,)),
+    )
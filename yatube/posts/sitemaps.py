@@ -0,0 +1,206 @@
+import abc
+import datetime
+import os
+import typing
+from urllib.parse import quote
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.db.models import (
+    ExpressionWrapper, F, IntegerField, Max, QuerySet,
+)
+from django.urls import reverse
+
+from posts.models import ArchivedPost, Group, Post, User
+
+XML_HEADER: str = '<?xml version="1.0" encoding="UTF-8"?>\n'
+XMLNS: str = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+CHUNK_SIZE: int = 2000
+
+# Символы, которые reverse() не кодирует в адресах.
+URL_SAFE: str = "!$&'()*+,;=/~:@"
+
+Shard = typing.Tuple[int, typing.Optional[datetime.datetime]]
+
+
+def _lastmod(value: typing.Optional[datetime.datetime]) -> str:
+    if value is None:
+        return ''
+    return f'<lastmod>{value.isoformat(timespec="seconds")}</lastmod>'
+
+
+class Section(abc.ABC):
+    """
+    Раздел карты сайта, разбитый на части по диапазонам id:
+    часть number содержит объекты с id от number * SITEMAP_SHARD_SIZE + 1
+    до (number + 1) * SITEMAP_SHARD_SIZE включительно.
+    Поэтому состав части не зависит от объектов других частей,
+    а выборка части идет по первичному ключу.
+
+    url_name: имя адреса страницы объекта.
+    key: поле, подставляемое в адрес.
+    sentinel: значение-заглушка, по которому адрес разбирается
+    на префикс и суффикс: reverse() вызывается один раз на часть,
+    а не на каждый из десятков тысяч адресов.
+    lastmod: поле с датой изменения для агрегирования.
+    """
+
+    name: str
+    url_name: str
+    key: str
+    sentinel: typing.Any
+    lastmod: str
+
+    @abc.abstractmethod
+    def queryset(self) -> QuerySet:
+        """Объекты раздела."""
+
+    def rows(self, queryset: QuerySet) -> QuerySet:
+        """Пары (key, lastmod) объектов выборки."""
+        return queryset.values('pk').annotate(
+            modified=Max(self.lastmod),
+        ).values_list('pk', self.key, 'modified')
+
+    def shards(self) -> typing.List[Shard]:
+        """Номера непустых частей и их lastmod одним запросом."""
+        size = settings.SITEMAP_SHARD_SIZE
+        return list(
+            self.queryset()
+            .annotate(shard=ExpressionWrapper(
+                (F('pk') - 1) / size, output_field=IntegerField(),
+            ))
+            .order_by()
+            .values('shard')
+            .annotate(modified=Max(self.lastmod))
+            .order_by('shard')
+            .values_list('shard', 'modified'),
+        )
+
+    def shard_queryset(self, number: int) -> QuerySet:
+        size = settings.SITEMAP_SHARD_SIZE
+        return self.queryset().filter(
+            pk__gt=number * size, pk__lte=(number + 1) * size,
+        )
+
+    def shard_lastmod(
+        self, number: int,
+    ) -> typing.Tuple[bool, typing.Optional[datetime.datetime]]:
+        """Есть ли объекты в части и дата ее последнего изменения."""
+        state = self.shard_queryset(number).order_by().aggregate(
+            exists=Max('pk'), modified=Max(self.lastmod),
+        )
+        return state['exists'] is not None, state['modified']
+
+    def iter_rows(self, number: int) -> typing.Iterator[list]:
+        """
+        Строки части пачками по CHUNK_SIZE по ключу id,
+        в памяти одновременно находится только одна пачка.
+        """
+        rows = self.rows(self.shard_queryset(number).order_by('pk'))
+        last = 0
+        while True:
+            chunk = list(rows.filter(pk__gt=last)[:CHUNK_SIZE])
+            if not chunk:
+                return
+            yield chunk
+            last = chunk[-1][0]
+
+    def render(self, base_url: str, number: int) -> typing.Iterator[str]:
+        """Часть карты сайта потоком, по одному блоку на пачку."""
+        prefix, suffix = reverse(
+            self.url_name, args=(self.sentinel,),
+        ).split(str(self.sentinel))
+        prefix = escape(base_url + prefix)
+        suffix = escape(suffix)
+        yield f'{XML_HEADER}<urlset xmlns="{XMLNS}">\n'
+        for chunk in self.iter_rows(number):
+            yield ''.join(
+                f'<url><loc>{prefix}{escape(quote(str(key), URL_SAFE))}'
+                f'{suffix}</loc>{_lastmod(modified)}</url>\n'
+                for _, key, modified in chunk
+            )
+        yield '</urlset>\n'
+
+
+class PostSection(Section):
+    name = 'posts'
+    url_name = 'posts:post_detail'
+    key = 'pk'
+    sentinel = 987654321
+    lastmod = 'updated_at'
+
+    def queryset(self) -> QuerySet:
+        return Post.objects.all()
+
+    def rows(self, queryset: QuerySet) -> QuerySet:
+        return queryset.values_list('pk', 'pk', 'updated_at')
+
+
+class ArchiveSection(PostSection):
+    """Посты архива: их адреса те же, что до переноса."""
+
+    name = 'archive'
+
+    def queryset(self) -> QuerySet:
+        return ArchivedPost.objects.all()
+
+
+class GroupSection(Section):
+    name = 'groups'
+    url_name = 'posts:group_list'
+    key = 'slug'
+    sentinel = 'sitemap-slug'
+    lastmod = 'posts__updated_at'
+
+    def queryset(self) -> QuerySet:
+        return Group.objects.all()
+
+
+class ProfileSection(Section):
+    name = 'profiles'
+    url_name = 'posts:profile'
+    key = 'username'
+    sentinel = 'sitemap-username'
+    lastmod = 'posts__updated_at'
+
+    def queryset(self) -> QuerySet:
+        return User.objects.filter(profile__post_count__gt=0)
+
+
+SECTIONS: typing.Dict[str, Section] = {
+    section.name: section
+    for section in (
+        PostSection(), ArchiveSection(), GroupSection(), ProfileSection(),
+    )
+}
+
+
+INDEX_FILENAME: str = 'sitemap.xml'
+
+
+def shard_filename(name: str, number: int) -> str:
+    return f'sitemap-{name}-{number}.xml'
+
+
+def render_index(base_url: str) -> typing.Iterator[str]:
+    """Индекс карты сайта: ссылки на все непустые части разделов."""
+    yield f'{XML_HEADER}<sitemapindex xmlns="{XMLNS}">\n'
+    for name, section in SECTIONS.items():
+        for number, modified in section.shards():
+            loc = escape(base_url + reverse(
+                'posts:sitemap_shard', args=(name, number),
+            ))
+            yield f'<sitemap><loc>{loc}</loc>{_lastmod(modified)}</sitemap>\n'
+    yield '</sitemapindex>\n'
+
+
+def pregenerated_path(filename: str) -> typing.Optional[str]:
+    """Путь к собранному командой build_sitemaps файлу или None."""
+    path = os.path.join(settings.SITEMAP_ROOT, filename)
+    return path if os.path.isfile(path) else None
+
+
+def file_modified(path: str) -> datetime.datetime:
+    return datetime.datetime.fromtimestamp(
+        os.path.getmtime(path), tz=datetime.timezone.utc,
+    )
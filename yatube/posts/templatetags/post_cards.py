@@ -0,0 +1,21 @@
+import typing
+
+from django import template
+
+from posts.cache import render_cards
+from posts.models import User
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_cards(
+    posts: typing.Iterable,
+    author: typing.Optional[User] = None,
+) -> list:
+    """
+    Возвращает пары (пост, html карточки) для ленты,
+    карточки берутся из кэша одним обращением.
+    Использование: {% post_cards page_obj as cards %}.
+    """
+    return render_cards(posts, author)
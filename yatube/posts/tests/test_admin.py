@@ -0,0 +1,240 @@
+from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.admin import PostAdmin
+from posts.models import Follow, Group, Post, Profile, TimelineEntry
+
+User = get_user_model()
+
+
+class PostAdminChangelistTests(TestCase):
+    """
+    Проверка списка постов в админке на большом числе записей.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_superuser(
+            username='test_admin', email='a@a.ru', password='pass',
+        )
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test_slug',
+            description='Тестовое описание',
+        )
+        cls.url = reverse('admin:posts_post_changelist')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def create_posts(self, count: int) -> None:
+        Post.objects.bulk_create(
+            Post(text=f'Тестовый пост {i}', author=self.user,
+                 group=self.group)
+            for i in range(count)
+        )
+
+    def count_queries(self, params: dict = None) -> int:
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url, params or {})
+        self.assertEqual(response.status_code, 200)
+        return len(context)
+
+    def test_changelist_queries_do_not_grow(self):
+        """Число запросов списка не зависит от числа постов."""
+        filtered = {'group__id__exact': self.group.pk}
+        self.create_posts(5)
+        few = self.count_queries()
+        few_filtered = self.count_queries(filtered)
+        self.create_posts(200)
+        self.assertEqual(self.count_queries(), few)
+        self.assertEqual(self.count_queries(filtered), few_filtered)
+
+    def test_changelist_shows_text_preview(self):
+        """В списке выводится только начало длинного текста."""
+        Post.objects.create(text='слово ' * 100, author=self.user)
+        response = self.client.get(self.url)
+        post = response.context['cl'].result_list[0]
+        self.assertEqual(
+            len(post.text_preview), PostAdmin.TEXT_PREVIEW_LENGTH + 1,
+        )
+        self.assertNotContains(response, 'слово ' * 20)
+
+    def test_changelist_count_is_capped(self):
+        """Отфильтрованный список считает не дальше порога."""
+        self.create_posts(30)
+        with self.settings(ADMIN_COUNT_LIMIT=10):
+            response = self.client.get(
+                self.url, {'group__id__exact': self.group.pk},
+            )
+        paginator = response.context['cl'].paginator
+        self.assertTrue(paginator.count_capped)
+        self.assertEqual(paginator.count, 10)
+
+    def test_changelist_uses_table_statistics(self):
+        """Без фильтров число постов берется из статистики ANALYZE."""
+        self.create_posts(30)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        response = self.client.get(self.url)
+        paginator = response.context['cl'].paginator
+        self.assertTrue(paginator.count_capped)
+        self.assertEqual(paginator.count, 30)
+
+
+@override_settings(BULK_CHUNK_SIZE=10)
+class BulkActionTests(TestCase):
+    """
+    Проверка массовых действий админки над постами и группами.
+    """
+
+    POSTS_COUNT: int = 25
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_superuser(
+            username='test_admin', email='a@a.ru', password='pass',
+        )
+        cls.source = Group.objects.create(
+            title='Старая группа', slug='old_slug', description='Описание',
+        )
+        cls.target = Group.objects.create(
+            title='Новая группа', slug='new_slug', description='Описание',
+        )
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+        for i in range(self.POSTS_COUNT):
+            Post.objects.create(
+                text=f'Тестовый пост {i}', author=self.user,
+                group=self.source,
+            )
+
+    def run_action(self, model: str, action: str, **data: dict):
+        return self.client.post(
+            reverse(f'admin:posts_{model}_changelist'),
+            {
+                'action': action,
+                'select_across': '1',
+                'index': '0',
+                ACTION_CHECKBOX_NAME: ['0'],
+                **data,
+            },
+            follow=True,
+        )
+
+    def assertCounters(self, source: int, target: int, author: int):
+        self.assertEqual(
+            Group.objects.get(pk=self.source.pk).post_count, source,
+        )
+        self.assertEqual(
+            Group.objects.get(pk=self.target.pk).post_count, target,
+        )
+        self.assertEqual(
+            Profile.objects.get(user=self.user).post_count, author,
+        )
+
+    def test_action_form_does_not_list_groups(self):
+        """Группа действия выбирается поиском, без списка всех групп."""
+        for model in ('post', 'group'):
+            with self.subTest(model=model):
+                response = self.client.get(
+                    reverse(f'admin:posts_{model}_changelist'),
+                )
+                self.assertContains(response, 'admin-autocomplete')
+                self.assertContains(response, 'autocomplete.js')
+                self.assertNotContains(
+                    response, f'<option value="{self.target.pk}">',
+                )
+
+    def test_move_to_group_runs_in_chunks(self):
+        """Перенос выполняется пачками и обновляет счетчики и версии."""
+        with CaptureQueriesContext(connection) as context:
+            response = self.run_action(
+                'post', 'move_to_group', group=self.target.pk,
+            )
+        self.assertContains(response, 'постов: 25 (пачек: 3)')
+        self.assertLess(len(context), self.POSTS_COUNT * 2)
+        self.assertFalse(Post.objects.filter(group=self.source).exists())
+        self.assertFalse(Post.objects.filter(version=1).exists())
+        self.assertCounters(0, self.POSTS_COUNT, self.POSTS_COUNT)
+
+    def test_move_to_group_requires_group(self):
+        """Без выбранной группы посты не переносятся."""
+        response = self.run_action('post', 'move_to_group')
+        self.assertContains(response, 'Выберите группу')
+        self.assertCounters(self.POSTS_COUNT, 0, self.POSTS_COUNT)
+
+    def test_clear_group(self):
+        """Группа убирается у всех выбранных постов."""
+        self.run_action('post', 'clear_group')
+        self.assertFalse(Post.objects.filter(group__isnull=False).exists())
+        self.assertCounters(0, 0, self.POSTS_COUNT)
+
+    def test_delete_posts_after_confirmation(self):
+        """Удаление показывает число постов и выполняется после 'да'."""
+        response = self.run_action('post', 'delete_posts')
+        self.assertContains(response, 'Будет удалено постов: 25')
+        self.assertEqual(Post.objects.count(), self.POSTS_COUNT)
+        response = self.run_action('post', 'delete_posts', post='yes')
+        self.assertContains(response, 'Удалено постов: 25 (пачек: 3)')
+        self.assertFalse(Post.objects.exists())
+        self.assertCounters(0, 0, 0)
+
+    def test_merge_groups(self):
+        """Посты объединяемых групп переносятся, группы удаляются."""
+        self.client.post(
+            reverse('admin:posts_group_changelist'),
+            {
+                'action': 'merge_groups',
+                'index': '0',
+                'group': self.target.pk,
+                ACTION_CHECKBOX_NAME: [self.source.pk, self.target.pk],
+            },
+        )
+        self.assertFalse(Group.objects.filter(pk=self.source.pk).exists())
+        self.assertEqual(
+            Group.objects.get(pk=self.target.pk).post_count,
+            self.POSTS_COUNT,
+        )
+
+    def test_merge_groups_moves_follows(self):
+        """
+        Подписки на объединяемые группы переносятся в группу target
+        без дублей, счетчик подписчиков пересчитывается,
+        новые подписчики получают посты target в ленту.
+        """
+        both = User.objects.create_user(username='both_reader')
+        reader = User.objects.create_user(username='source_reader')
+        Follow.objects.create(user=both, group=self.source)
+        Follow.objects.create(user=both, group=self.target)
+        Follow.objects.create(user=reader, group=self.source)
+        post = Post.objects.create(
+            text='Пост группы target', author=self.user, group=self.target,
+        )
+        self.client.post(
+            reverse('admin:posts_group_changelist'),
+            {
+                'action': 'merge_groups',
+                'index': '0',
+                'group': self.target.pk,
+                ACTION_CHECKBOX_NAME: [self.source.pk, self.target.pk],
+            },
+        )
+        self.assertQuerysetEqual(
+            Follow.objects.filter(group=self.target).order_by('user_id'),
+            [both.pk, reader.pk], lambda row: row.user_id,
+        )
+        self.assertEqual(
+            Group.objects.get(pk=self.target.pk).follower_count, 2,
+        )
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=reader, post=post).exists(),
+        )
@@ -0,0 +1,137 @@
+import datetime
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from django.utils import timezone
+
+from core.utils import encode_cursor
+from posts.bulk import create_posts
+from posts.counters import recount_authors, recount_groups
+from posts.models import ArchivedPost, Group, Post, Profile
+
+User = get_user_model()
+
+POSTS: int = 25
+ARCHIVE_DAYS: int = 13
+
+
+class ArchiveTests(TestCase):
+    """
+    Проверка архива старых постов и лент, продолжающихся в архиве.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='test_author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test_slug',
+            description='Тестовое описание',
+        )
+        now = timezone.now()
+        create_posts([
+            Post(
+                text=f'Пост {day}', author=cls.user, group=cls.group,
+                pub_date=now - datetime.timedelta(days=day, hours=1),
+            )
+            for day in range(POSTS)
+        ])
+        # Все посты от новых к старым.
+        cls.ids = list(Post.objects.values_list('pk', flat=True))
+        call_command(
+            'archive_posts', f'--days={ARCHIVE_DAYS}', stdout=StringIO(),
+        )
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_posts_moved(self):
+        """Старые посты перенесены с прежними id, счетчики согласованы."""
+        self.assertEqual(Post.objects.count(), ARCHIVE_DAYS)
+        self.assertEqual(
+            list(ArchivedPost.objects.values_list('pk', flat=True)),
+            self.ids[ARCHIVE_DAYS:],
+        )
+        profile = Profile.objects.get(user=self.user)
+        self.assertEqual(
+            (profile.post_count, profile.archived_count),
+            (POSTS, POSTS - ARCHIVE_DAYS),
+        )
+        self.assertEqual(recount_authors(), 0)
+        self.assertEqual(recount_groups(), 0)
+
+    def test_deleting_author_updates_group_counters(self):
+        """Удаление автора уменьшает счетчики группы и по архиву."""
+        User.objects.get(pk=self.user.pk).delete()
+        group = Group.objects.get(pk=self.group.pk)
+        self.assertEqual((group.post_count, group.archived_count), (0, 0))
+        self.assertEqual(recount_groups(), 0)
+
+    def test_feeds_continue_into_archive(self):
+        """Страницы profile и group_list продолжаются в архиве."""
+        for url in (
+            reverse('posts:profile', args=(self.user.username,)),
+            reverse('posts:group_list', args=(self.group.slug,)),
+        ):
+            with self.subTest(url=url):
+                ids = []
+                for page in (1, 2, 3):
+                    with CaptureQueriesContext(connection) as queries:
+                        response = self.client.get(url, {'page': page})
+                    self.assertLessEqual(
+                        len(queries), resolve(url).func.query_budget,
+                    )
+                    ids += [post.pk for post in response.context['page_obj']]
+                self.assertEqual(ids, self.ids)
+
+    def test_cursor_pages_continue_into_archive(self):
+        """Курсорные страницы проходят ленту в обе стороны."""
+        url = reverse('posts:profile', args=(self.user.username,))
+        token = encode_cursor(Post.objects.get(pk=self.ids[0]))
+        pages = []
+        while token:
+            page = self.client.get(url, {'after': token}).context['page_obj']
+            pages.append([post.pk for post in page])
+            token = page.next_cursor
+        self.assertEqual(sum(pages, []), self.ids[1:])
+        previous = self.client.get(
+            url, {'before': encode_cursor(ArchivedPost.objects.get(
+                pk=pages[-1][0],
+            ))},
+        ).context['page_obj']
+        self.assertEqual([post.pk for post in previous], pages[-2])
+
+    def test_archived_post_detail(self):
+        """Пост архива открывается по прежнему адресу, но не правится."""
+        pk = self.ids[-1]
+        response = self.client.get(reverse('posts:post_detail', args=(pk,)))
+        self.assertEqual(response.context['post'].pk, pk)
+        self.assertNotContains(
+            response, reverse('posts:post_edit', args=(pk,)),
+        )
+        response = self.client.get(reverse('posts:post_edit', args=(pk,)))
+        self.assertEqual(response.status_code, 404)
+
+    def test_api_feed_continues_into_archive(self):
+        """Лента API по ссылкам next доходит до конца архива."""
+        url = reverse('api:profile_posts', args=(self.user.username,))
+        ids = []
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                data = Client().get(url).json()
+            self.assertLessEqual(
+                len(queries), resolve(url.split('?')[0]).func.query_budget,
+            )
+            ids += [post['id'] for post in data['results']]
+            url = data['next']
+        self.assertEqual(ids, self.ids)
+        response = Client().get(
+            reverse('api:post_detail', args=(self.ids[-1],)),
+        )
+        self.assertEqual(response.json()['id'], self.ids[-1])
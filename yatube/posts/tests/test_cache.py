@@ -0,0 +1,227 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import (
+    Client, TestCase, TransactionTestCase, override_settings,
+)
+from django.urls import reverse
+from mixer.backend.django import mixer
+
+from posts.cache import card_key
+from posts.models import Group, Post
+
+User = get_user_model()
+
+LOCMEM_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'feed_versions': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'feed_versions',
+    },
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class PostCardCacheTests(TestCase):
+    """
+    Проверка кэширования карточек постов в лентах.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='test_author')
+        cls.group = mixer.blend(Group)
+        cls.other_group = mixer.blend(Group)
+        cls.client_author = Client()
+        cls.client_author.force_login(cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(
+            text='test_text', group=self.group, author=self.user,
+        )
+
+    def test_feeds_cache_cards(self):
+        """Карточки постов лент сохраняются в кэш."""
+        feeds = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=(self.group.slug,)),
+            reverse('posts:profile', args=(self.user.username,)),
+        )
+        for url in feeds:
+            with self.subTest(url=url):
+                cache.clear()
+                self.client_author.get(url)
+                self.assertIn('test_text', cache.get(card_key(self.post)))
+
+    def test_warm_feed_does_not_render_cards(self):
+        """На прогретой ленте карточка берется из кэша."""
+        cache.set(card_key(self.post), 'карточка из кэша')
+        response = self.client_author.get(reverse('posts:index'))
+        self.assertContains(response, 'карточка из кэша')
+
+    def test_edit_expires_card(self):
+        """Редактирование поста и смена группы меняют ключ карточки."""
+        self.client_author.get(reverse('posts:index'))
+        self.client_author.post(
+            reverse('posts:post_edit', args=(self.post.pk,)),
+            {'text': 'новый текст', 'group': self.other_group.pk},
+        )
+        response = self.client_author.get(reverse('posts:index'))
+        self.assertContains(response, 'новый текст')
+        self.assertContains(response, self.other_group.slug)
+        self.assertNotContains(response, 'test_text')
+
+    def test_author_rename_expires_card(self):
+        """Смена имени автора меняет ключ карточки, вход - нет."""
+        self.client_author.get(reverse('posts:index'))
+        self.client.force_login(self.user)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.version, 1)
+        self.user.first_name = 'Новое'
+        self.user.last_name = 'Имя'
+        self.user.save()
+        response = self.client_author.get(reverse('posts:index'))
+        self.assertContains(response, 'Новое Имя')
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class AnonymousPageCacheTests(TransactionTestCase):
+    """
+    Проверка кэширования страниц лент для неавторизованных
+    пользователей и их сброса при записи.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='test_author')
+        self.group = mixer.blend(Group)
+        self.other_group = mixer.blend(Group)
+        self.post = Post.objects.create(
+            text='test_text', group=self.group, author=self.user,
+        )
+        self.client_author = Client()
+        self.client_author.force_login(self.user)
+        self.feeds = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=(self.group.slug,)),
+            reverse('posts:profile', args=(self.user.username,)),
+        )
+
+    def test_anonymous_feeds_are_cached(self):
+        """Повторный запрос ленты не выполняет SQL-запросов."""
+        for url in self.feeds:
+            with self.subTest(url=url):
+                self.client.get(url)
+                with self.assertNumQueries(0):
+                    response = self.client.get(url)
+                self.assertContains(response, 'test_text')
+
+    def test_cached_feeds_answer_not_modified(self):
+        """Условный запрос к закэшированной ленте получает 304 без SQL."""
+        etag = self.client.get(self.feeds[0])['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(self.feeds[0], HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_write_in_other_worker_expires_feeds(self):
+        """
+        Запись в другом рабочем процессе со своим кэшем в памяти
+        сбрасывает страницы лент, закэшированные в этом процессе.
+        """
+        self.client.get(self.feeds[0])
+        other_worker = {
+            **LOCMEM_CACHES,
+            'default': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                'LOCATION': 'other_worker',
+            },
+        }
+        with override_settings(CACHES=other_worker):
+            Post.objects.create(text='Новый пост', author=self.user)
+        self.assertContains(self.client.get(self.feeds[0]), 'Новый пост')
+
+    def test_authorized_feeds_are_not_cached(self):
+        """Авторизованный пользователь получает свежую страницу."""
+        self.client_author.get(self.feeds[0])
+        response = self.client_author.get(self.feeds[0])
+        self.assertIsNotNone(response.context)
+
+    def test_create_and_edit_expire_feeds(self):
+        """Создание и редактирование поста сбрасывают затронутые ленты."""
+        for url in self.feeds:
+            self.client.get(url)
+        self.client_author.post(
+            reverse('posts:post_create'),
+            {'text': 'новый пост', 'group': self.group.pk},
+        )
+        for url in self.feeds:
+            with self.subTest(url=url):
+                self.assertContains(self.client.get(url), 'новый пост')
+        old_group_url = self.feeds[1]
+        new_group_url = reverse(
+            'posts:group_list', args=(self.other_group.slug,),
+        )
+        self.client.get(new_group_url)
+        self.client_author.post(
+            reverse('posts:post_edit', args=(self.post.pk,)),
+            {'text': 'перенесенный пост', 'group': self.other_group.pk},
+        )
+        self.assertNotContains(self.client.get(old_group_url), 'перенесенный')
+        self.assertContains(self.client.get(new_group_url), 'перенесенный')
+
+    def test_group_rename_expires_feeds(self):
+        """Смена slug группы сбрасывает ленту под старым slug и главную."""
+        for url in self.feeds:
+            self.client.get(url)
+        old_slug = self.group.slug
+        self.group.slug = 'new-slug'
+        self.group.save()
+        self.assertEqual(self.client.get(self.feeds[1]).status_code, 404)
+        for url in (self.feeds[0], self.feeds[2]):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertContains(response, '/group/new-slug/')
+                self.assertNotContains(response, f'/group/{old_slug}/')
+
+    def test_delete_expires_feeds(self):
+        """Удаление группы и автора сбрасывает их ленты."""
+        for url in self.feeds:
+            self.client.get(url)
+        self.group.delete()
+        self.assertEqual(self.client.get(self.feeds[1]).status_code, 404)
+        self.assertNotContains(
+            self.client.get(self.feeds[0]), f'/group/{self.group.slug}/',
+        )
+        self.user.delete()
+        self.assertEqual(self.client.get(self.feeds[2]).status_code, 404)
+        self.assertNotContains(self.client.get(self.feeds[0]), 'test_text')
+
+    def test_author_rename_expires_feeds(self):
+        """Смена username автора сбрасывает ленты с его карточками."""
+        for url in self.feeds:
+            self.client.get(url)
+        self.user.username = 'renamed_author'
+        self.user.save()
+        self.assertEqual(self.client.get(self.feeds[2]).status_code, 404)
+        for url in self.feeds[:2]:
+            with self.subTest(url=url):
+                self.assertContains(
+                    self.client.get(url), '/profile/renamed_author/',
+                )
+
+    def test_delete_changes_index_etag(self):
+        """Удаление поста меняет ETag главной через версию ленты."""
+        url = self.feeds[0]
+        etag = self.client_author.get(url)['ETag']
+        self.assertEqual(
+            self.client_author.get(url, HTTP_IF_NONE_MATCH=etag).status_code,
+            304,
+        )
+        Post.objects.create(text='старый пост', author=self.user)
+        etag = self.client_author.get(url)['ETag']
+        Post.objects.filter(text='старый пост').first().delete()
+        response = self.client_author.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
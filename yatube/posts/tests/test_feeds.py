@@ -0,0 +1,89 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Group, Post
+from posts.tests.test_cache import LOCMEM_CACHES
+
+User = get_user_model()
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class SyndicationFeedTests(TransactionTestCase):
+    """
+    Проверка лент RSS и Atom: содержимое, кэш и условный GET.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='test_author')
+        self.group = Group.objects.create(
+            title='Тестовая группа', slug='test_slug',
+            description='Тестовое описание',
+        )
+        self.post = Post.objects.create(
+            text='test_text', group=self.group, author=self.user,
+        )
+        self.client_author = Client()
+        self.client_author.force_login(self.user)
+        self.feeds = (
+            reverse('posts:index_rss'),
+            reverse('posts:index_atom'),
+            reverse('posts:group_rss', args=(self.group.slug,)),
+            reverse('posts:group_atom', args=(self.group.slug,)),
+            reverse('posts:profile_rss', args=(self.user.username,)),
+            reverse('posts:profile_atom', args=(self.user.username,)),
+        )
+
+    def test_feeds_contain_posts(self):
+        """Ленты содержат посты со ссылкой на страницу поста."""
+        link = reverse('posts:post_detail', args=(self.post.pk,))
+        for url in self.feeds:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertContains(response, 'test_text')
+                self.assertContains(response, link)
+        self.assertContains(self.client.get(self.feeds[1]), '<feed')
+
+    def test_missing_group_and_author(self):
+        """Лента несуществующей группы или автора - 404."""
+        for url in (
+            reverse('posts:group_rss', args=('missing',)),
+            reverse('posts:profile_atom', args=('missing',)),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_poll_is_cache_hit_or_not_modified(self):
+        """Повторный опрос ленты не обращается к базе данных."""
+        for url in self.feeds:
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+                with self.assertNumQueries(0):
+                    self.assertEqual(self.client.get(url).status_code, 200)
+                    response = self.client.get(
+                        url, HTTP_IF_NONE_MATCH=etag,
+                    )
+                self.assertEqual(response.status_code, 304)
+
+    def test_create_and_edit_expire_feeds(self):
+        """Создание и редактирование поста сбрасывают ленты."""
+        for url in self.feeds:
+            self.client.get(url)
+        self.client_author.post(
+            reverse('posts:post_create'),
+            {'text': 'новый пост', 'group': self.group.pk},
+        )
+        for url in self.feeds:
+            with self.subTest(url=url):
+                self.assertContains(self.client.get(url), 'новый пост')
+        self.client_author.post(
+            reverse('posts:post_edit', args=(self.post.pk,)),
+            {'text': 'исправленный текст', 'group': self.group.pk},
+        )
+        for url in self.feeds:
+            with self.subTest(url=url):
+                self.assertContains(
+                    self.client.get(url), 'исправленный текст',
+                )
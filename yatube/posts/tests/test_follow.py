@@ -0,0 +1,238 @@
+import datetime
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from django.utils import timezone
+
+from posts.bulk import archive_posts, create_posts
+from posts.models import Follow, Group, Post, Profile, TimelineEntry
+from posts.timeline import follow, timeline_page, unfollow
+
+User = get_user_model()
+
+POSTS: int = 25
+
+
+class FollowTests(TestCase):
+    """
+    Проверка подписок и материализованной ленты подписок.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='test_reader')
+        cls.author = User.objects.create_user(username='test_author')
+        cls.other = User.objects.create_user(username='test_other')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test_slug',
+            description='Тестовое описание',
+        )
+        now = timezone.now()
+        create_posts([
+            Post(
+                text=f'Пост {i}',
+                author=cls.author if i % 2 else cls.other,
+                group=cls.group if i % 3 == 0 else None,
+                pub_date=now - datetime.timedelta(hours=i),
+            )
+            for i in range(POSTS)
+        ])
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def expected_ids(self):
+        return list(
+            Post.objects.filter(author=self.author).values_list(
+                'pk', flat=True,
+            )
+            | Post.objects.filter(group=self.group).values_list(
+                'pk', flat=True,
+            ),
+        )
+
+    def read_all(self):
+        """Все посты ленты подписок, страница за страницей."""
+        ids, after = [], None
+        while True:
+            page = timeline_page(self.reader, 4, after)
+            ids.extend(post.pk for post in page)
+            if not page.has_next():
+                return ids
+            after = page.next_cursor
+
+    def test_follow_counts_and_backfills(self):
+        """Подписка сдвигает счетчик и добавляет посты в ленту."""
+        self.assertTrue(follow(self.reader, author=self.author))
+        self.assertFalse(follow(self.reader, author=self.author))
+        self.assertEqual(
+            Profile.objects.get(user=self.author).follower_count, 1,
+        )
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.reader).count(),
+            self.author.posts.count(),
+        )
+
+    def test_unfollow_keeps_posts_of_other_follows(self):
+        """После отписки в ленте остаются посты других подписок."""
+        follow(self.reader, author=self.author)
+        follow(self.reader, group=self.group)
+        self.assertTrue(unfollow(self.reader, author=self.author))
+        self.assertFalse(unfollow(self.reader, author=self.author))
+        self.assertEqual(
+            Profile.objects.get(user=self.author).follower_count, 0,
+        )
+        self.assertEqual(
+            sorted(self.read_all()),
+            sorted(self.group.posts.values_list('pk', flat=True)),
+        )
+
+    def test_unfollow_with_follows_of_both_kinds(self):
+        """
+        Отписка убирает посты цели, когда у читателя есть
+        и другие подписки на авторов и группы.
+        """
+        other_group = Group.objects.create(
+            title='Другая группа', slug='other_slug',
+            description='Тестовое описание',
+        )
+        follow(self.reader, author=self.author)
+        follow(self.reader, author=self.other)
+        follow(self.reader, group=self.group)
+        follow(self.reader, group=other_group)
+        unfollow(self.reader, group=self.group)
+        unfollow(self.reader, author=self.author)
+        self.assertEqual(
+            sorted(self.read_all()),
+            sorted(self.other.posts.values_list('pk', flat=True)),
+        )
+        unfollow(self.reader, author=self.other)
+        self.assertEqual(self.read_all(), [])
+
+    def test_pages_cover_timeline(self):
+        """Страницы ленты идут по убыванию даты без пропусков и повторов."""
+        follow(self.reader, author=self.author)
+        follow(self.reader, group=self.group)
+        self.assertEqual(self.read_all(), self.expected_ids())
+        first = timeline_page(self.reader, 4)
+        page = timeline_page(self.reader, 4, first.next_cursor)
+        previous = timeline_page(self.reader, 4, None, page.previous_cursor)
+        self.assertEqual(
+            [post.pk for post in previous], self.expected_ids()[:4],
+        )
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_large_targets_are_pulled(self):
+        """Посты авторов с большим числом подписчиков читаются из Post."""
+        follow(self.reader, author=self.author)
+        follow(self.reader, group=self.group)
+        entries = TimelineEntry.objects.count()
+        post = Post.objects.create(
+            text='Новый пост', author=self.author, group=self.group,
+        )
+        self.assertFalse(Post.objects.get(pk=post.pk).fanned_out)
+        self.assertEqual(TimelineEntry.objects.count(), entries)
+        self.assertEqual(self.read_all(), self.expected_ids())
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=2)
+    def test_pulled_posts_survive_threshold(self):
+        """
+        Пост, не разосланный из-за числа подписчиков, остается
+        в ленте, когда подписчиков становится меньше порога,
+        а следующие посты снова рассылаются.
+        """
+        follow(self.reader, author=self.author)
+        follow(self.other, author=self.author)
+        pulled = Post.objects.create(text='Пост', author=self.author)
+        unfollow(self.other, author=self.author)
+        self.assertEqual(timeline_page(self.reader, 4)[0], pulled)
+        pushed = Post.objects.create(text='Новый пост', author=self.author)
+        self.assertTrue(
+            TimelineEntry.objects.filter(
+                user=self.reader, post=pushed,
+            ).exists(),
+        )
+        self.assertEqual(
+            self.read_all(),
+            list(self.author.posts.values_list('pk', flat=True)),
+        )
+
+    def test_post_create_fans_out(self):
+        """Новый пост автора попадает в ленту подписчика."""
+        follow(self.reader, author=self.other)
+        author_client = Client()
+        author_client.force_login(self.other)
+        author_client.post(
+            reverse('posts:post_create'), {'text': 'Новый пост'},
+        )
+        post = Post.objects.get(text='Новый пост')
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.reader, post=post).exists(),
+        )
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertEqual(response.context['page_obj'][0], post)
+
+    def test_archived_posts_leave_timeline(self):
+        """Архивные посты убираются из ленты подписок."""
+        follow(self.reader, author=self.author)
+        for _ in archive_posts(Post.objects.filter(author=self.author)):
+            pass
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(self.read_all(), [])
+
+    def test_follow_views(self):
+        """Кнопки подписки работают только через POST и не на себя."""
+        url = reverse('posts:profile_follow', args=(self.author.username,))
+        self.assertEqual(self.client.get(url).status_code, 405)
+        self.client.post(url)
+        self.client.post(
+            reverse('posts:profile_follow', args=(self.reader.username,)),
+        )
+        self.client.post(
+            reverse('posts:group_follow', args=(self.group.slug,)),
+        )
+        self.assertEqual(Follow.objects.filter(user=self.reader).count(), 2)
+        response = self.client.get(
+            reverse('posts:profile', args=(self.author.username,)),
+        )
+        self.assertTrue(response.context['following'])
+        self.client.post(
+            reverse('posts:group_unfollow', args=(self.group.slug,)),
+        )
+        self.assertEqual(Follow.objects.filter(user=self.reader).count(), 1)
+
+    def test_follow_changes_etag(self):
+        """Подписка меняет ETag профиля с кнопкой подписки."""
+        url = reverse('posts:profile', args=(self.author.username,))
+        etag = self.client.get(url)['ETag']
+        self.client.post(
+            reverse('posts:profile_follow', args=(self.author.username,)),
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_follow_index_requires_login(self):
+        """Лента подписок доступна только после входа."""
+        response = Client().get(reverse('posts:follow_index'))
+        self.assertEqual(response.status_code, 302)
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=2)
+    def test_follow_index_within_query_budget(self):
+        """Лента подписок укладывается в бюджет и с дочитыванием."""
+        follow(self.reader, group=self.group)
+        follow(self.other, author=self.author)
+        follow(self.reader, author=self.author)
+        url = reverse('posts:follow_index')
+        page = self.client.get(url).context['page_obj']
+        for path in (url, f'{url}?after={page.next_cursor}'):
+            with self.subTest(path=path):
+                with CaptureQueriesContext(connection) as queries:
+                    self.client.get(path)
+                self.assertLessEqual(
+                    len(queries), resolve(url).func.query_budget,
+                )
@@ -0,0 +1,186 @@
+import datetime
+import json
+import os
+import tempfile
+from unittest import mock
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from posts.bulk import create_posts
+from posts.management.commands.import_posts import Command
+from posts.models import (
+    Group, ImportCheckpoint, Post, Profile, TimelineEntry,
+)
+from posts.timeline import follow, timeline_page
+
+User = get_user_model()
+
+
+class ImportPostsTests(TestCase):
+    """
+    Проверка команды import_posts.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='test_author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test_slug',
+            description='Тестовое описание',
+        )
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, name: str, content: str) -> str:
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(content)
+        return path
+
+    def call(self, path: str, **options: dict) -> str:
+        out = StringIO()
+        call_command(
+            'import_posts', path, stdout=out, stderr=StringIO(),
+            **{'workers': 1, **options},
+        )
+        return out.getvalue()
+
+    def test_import_jsonl(self):
+        """Посты импортируются с датой, счетчики обновляются."""
+        rows = [
+            {'text': 'Первый', 'author': 'test_author', 'group': 'test_slug',
+             'pub_date': '2020-01-02T03:04:05+00:00'},
+            {'text': 'Второй', 'author': 'test_author'},
+            {'text': 'Без автора'},
+            {'text': 'Чужой', 'author': 'nobody'},
+        ]
+        path = self.write(
+            'posts.jsonl',
+            '\n'.join(json.dumps(row) for row in rows) + '\nне json\n',
+        )
+        out = self.call(path, batch_size=2)
+        self.assertIn('Импортировано постов: 2, пропущено: 3', out)
+        self.assertIn('строк/с', out)
+        post = Post.objects.get(text='Первый')
+        self.assertEqual(post.pub_date.year, 2020)
+        self.assertEqual(post.group, self.group)
+        self.assertEqual(Profile.objects.get(user=self.user).post_count, 2)
+        self.assertEqual(Group.objects.get(pk=self.group.pk).post_count, 1)
+        self.assertFalse(ImportCheckpoint.objects.exists())
+
+    def test_dates_kept_without_changing_model(self):
+        """
+        Дата публикации сохраняется без отключения auto_now_add:
+        другие потоки в это время сохраняют посты как обычно.
+        """
+        field = Post._meta.get_field('pub_date')
+        states = []
+
+        def check(execute, sql, params, many, context):
+            if sql.startswith('INSERT'):
+                states.append(field.auto_now_add)
+            return execute(sql, params, many, context)
+
+        pub_date = timezone.now() - datetime.timedelta(days=400)
+        with connection.execute_wrapper(check):
+            create_posts([
+                Post(text='Старый', author=self.user, pub_date=pub_date),
+            ])
+        self.assertEqual(set(states), {True})
+        post = Post.objects.get(text='Старый')
+        self.assertEqual(post.pub_date, pub_date)
+        self.assertIsNotNone(post.updated_at)
+
+    def test_import_csv_in_processes(self):
+        """CSV разбирается в нескольких процессах с сохранением порядка."""
+        lines = ['text,author,group,pub_date'] + [
+            f'Пост {i},test_author,test_slug,' for i in range(30)
+        ]
+        path = self.write('posts.csv', '\n'.join(lines))
+        self.call(path, workers=2, batch_size=7)
+        self.assertEqual(
+            Group.objects.get(pk=self.group.pk).post_count, 30,
+        )
+        self.assertEqual(
+            list(Post.objects.order_by('pk').values_list('text', flat=True)),
+            [f'Пост {i}' for i in range(30)],
+        )
+
+    def test_import_resumes_from_checkpoint(self):
+        """Повторный запуск пропускает строки до контрольной точки."""
+        path = self.write('posts.jsonl', '\n'.join(
+            json.dumps({'text': f'Пост {i}', 'author': 'test_author'})
+            for i in range(5)
+        ))
+        ImportCheckpoint.objects.create(
+            source=os.path.abspath(path), position=3,
+        )
+        out = self.call(path)
+        self.assertIn('Продолжение со строки 4', out)
+        self.assertEqual(
+            sorted(Post.objects.values_list('text', flat=True)),
+            ['Пост 3', 'Пост 4'],
+        )
+
+    def test_interrupted_batch_is_not_duplicated(self):
+        """
+        Пачка и контрольная точка фиксируются вместе:
+        после сбоя повторный запуск не создает дубликатов.
+        """
+        path = self.write('posts.jsonl', '\n'.join(
+            json.dumps({'text': f'Пост {i}', 'author': 'test_author'})
+            for i in range(5)
+        ))
+        write_checkpoint = Command.write_checkpoint
+
+        def fail_second_batch(command, position):
+            if position > 2:
+                raise RuntimeError('сбой')
+            write_checkpoint(command, position)
+
+        with mock.patch.object(
+            Command, 'write_checkpoint', fail_second_batch,
+        ):
+            with self.assertRaises(RuntimeError):
+                self.call(path, batch_size=2)
+        self.assertEqual(Post.objects.count(), 2)
+        self.call(path, batch_size=2)
+        self.assertEqual(
+            sorted(Post.objects.values_list('text', flat=True)),
+            [f'Пост {i}' for i in range(5)],
+        )
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=2)
+    def test_imported_posts_reach_timelines(self):
+        """
+        Импортированные посты попадают в ленты подписчиков:
+        рассылаются или, у автора с большим числом подписчиков,
+        дочитываются из Post.
+        """
+        reader = User.objects.create_user(username='test_reader')
+        other = User.objects.create_user(username='test_other')
+        follow(reader, author=self.user)
+        path = self.write('posts.jsonl', '\n'.join(
+            json.dumps({'text': f'Пост {i}', 'author': 'test_author'})
+            for i in range(3)
+        ))
+        self.call(path, batch_size=2)
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=reader).count(), 3,
+        )
+        follow(other, author=self.user)
+        self.call(self.write('more.jsonl', json.dumps(
+            {'text': 'Пост 3', 'author': 'test_author'},
+        )))
+        self.assertEqual(
+            [post.text for post in timeline_page(reader, 10)],
+            ['Пост 3', 'Пост 2', 'Пост 1', 'Пост 0'],
+        )
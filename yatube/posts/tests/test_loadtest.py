@@ -0,0 +1,126 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from core.loadtest import InProcessTransport, Recorder, percentile
+from posts import urls as posts_urls
+from posts.management.commands.loadtest import (
+    SCENARIO_ROUTES, SCENARIO_WEIGHTS, cleanup, collect_sample, run_worker,
+)
+from posts.models import Follow, Group, Post
+
+User = get_user_model()
+
+
+class LoadTestTests(TestCase):
+    """
+    Проверка сценариев нагрузочного теста.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        author = User.objects.create_user(username='test_author')
+        group = Group.objects.create(
+            title='Тестовая группа', slug='test_slug',
+            description='Тестовое описание',
+        )
+        for i in range(25):
+            Post.objects.create(
+                text=f'Пост {i}', author=author, group=group,
+            )
+
+    def test_percentile(self):
+        """Перцентили по методу ближайшего ранга."""
+        values = [float(value) for value in range(1, 101)]
+        self.assertEqual(percentile(values, 50), 50.0)
+        self.assertEqual(percentile(values, 99), 99.0)
+        self.assertEqual(percentile([], 95), 0.0)
+
+    def test_scenarios_cover_posts_urls(self):
+        """Для каждого маршрута posts.urls есть сценарий."""
+        covered = {
+            route for routes in SCENARIO_ROUTES.values() for route in routes
+        }
+        self.assertEqual(
+            {pattern.name for pattern in posts_urls.urlpatterns} - covered,
+            set(),
+        )
+
+    def test_every_scenario_runs_without_errors(self):
+        """Каждый сценарий выполняет свои маршруты без ошибок."""
+        sample = collect_sample('loadtest', 'loadtest-password')
+        self.addCleanup(cleanup, sample)
+        for name in SCENARIO_WEIGHTS:
+            with self.subTest(scenario=name):
+                recorder = run_worker(sample, None, 0.2, 0, {name: 1})
+                routes = {
+                    route: stats for route, stats in recorder.routes.items()
+                    if stats.latencies
+                }
+                self.assertTrue(routes.keys() & {
+                    *SCENARIO_ROUTES[name], 'login',
+                })
+                for route, stats in routes.items():
+                    self.assertEqual(stats.errors, 0, route)
+
+    def test_cleanup_removes_created_user(self):
+        """Созданный командой пользователь удаляется вместе с постами."""
+        posts_before = Post.objects.count()
+        sample = collect_sample('loadtest', 'loadtest-password')
+        run_worker(sample, None, 0.2, 0, {'create_post': 1, 'follow': 1})
+        cleanup(sample)
+        self.assertFalse(User.objects.filter(username='loadtest').exists())
+        self.assertEqual(Post.objects.count(), posts_before)
+
+    def test_cleanup_keeps_existing_user(self):
+        """
+        Пароль существующего пользователя не меняется, после прогона
+        удаляются только его новые посты и подписки.
+        """
+        user = User.objects.get(username='test_author')
+        user.set_password('author-password')
+        user.save()
+        group = Group.objects.get(slug='test_slug')
+        follow = Follow.objects.create(user=user, group=group)
+        posts = set(user.posts.values_list('pk', flat=True))
+        with self.assertRaises(CommandError):
+            collect_sample('test_author', 'loadtest-password')
+        sample = collect_sample('test_author', 'author-password')
+        run_worker(sample, None, 0.2, 0, {'create_post': 1})
+        Follow.objects.create(user=user, author=User.objects.create_user(
+            username='other_author',
+        ))
+        cleanup(sample)
+        self.assertEqual(
+            set(user.posts.values_list('pk', flat=True)), posts,
+        )
+        self.assertQuerysetEqual(
+            user.follows.all(), [follow.pk], lambda row: row.pk,
+        )
+
+    def test_refuses_non_test_database(self):
+        """Без --allow-writes команда не пишет в нетестовую базу."""
+        with mock.patch(
+            'posts.management.commands.loadtest.is_test_database',
+            return_value=False,
+        ):
+            with self.assertRaises(CommandError):
+                call_command('loadtest')
+        self.assertFalse(User.objects.filter(username='loadtest').exists())
+
+    def test_failures_are_counted_with_reason(self):
+        """Исключение view учитывается как ошибка с причиной."""
+        recorder = Recorder()
+        transport = InProcessTransport(recorder)
+        with mock.patch.object(
+            transport.client, 'get', side_effect=RuntimeError,
+        ):
+            transport.request('index', 'GET', '/')
+        transport.request('missing', 'GET', '/missing/page/')
+        summary = recorder.summary(1)
+        self.assertEqual(summary['index']['failures'], {'RuntimeError': 1})
+        self.assertEqual(summary['missing']['errors'], 1)
+        self.assertEqual(summary['missing']['failures'], {'HTTP 404': 1})
@@ -0,0 +1,201 @@
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core import metrics
+from posts.models import Post
+from posts.tests.test_cache import LOCMEM_CACHES
+
+User = get_user_model()
+
+SAMPLE = re.compile(r'^(\w+)(\{[^}]*\})? (\S+)$', re.MULTILINE)
+
+TOKEN: str = 'test-token'
+
+
+def scrape(client) -> dict:
+    """Ряды /metrics: {(имя, метки): значение}."""
+    response = client.get(
+        reverse('metrics'), HTTP_AUTHORIZATION=f'Bearer {TOKEN}',
+    )
+    return {
+        (name, labels): float(value)
+        for name, labels, value in SAMPLE.findall(response.content.decode())
+    }
+
+
+@override_settings(CACHES=LOCMEM_CACHES, METRICS_TOKEN=TOKEN)
+class MetricsTests(TestCase):
+    """
+    Проверка метрик Prometheus.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='test_author')
+        Post.objects.create(text='test_text', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_request_metrics(self):
+        """Коды ответов, гистограммы по имени URL и кэш страниц."""
+        before = scrape(self.client)
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('posts:index'))
+        self.client.get('/missing/')
+        after = scrape(self.client)
+
+        def delta(name, labels):
+            return after.get((name, labels), 0) - before.get((name, labels), 0)
+
+        self.assertEqual(delta(
+            'yatube_http_requests_total',
+            '{view="posts:index",method="GET",status="200"}',
+        ), 2)
+        self.assertEqual(delta(
+            'yatube_http_requests_total',
+            '{view="<unresolved>",method="GET",status="404"}',
+        ), 1)
+        self.assertEqual(delta(
+            'yatube_http_request_duration_seconds_count',
+            '{view="posts:index"}',
+        ), 2)
+        self.assertEqual(delta(
+            'yatube_http_request_duration_seconds_bucket',
+            '{view="posts:index",le="+Inf"}',
+        ), 2)
+        self.assertGreater(
+            delta('yatube_db_queries_sum', '{view="posts:index"}'), 0,
+        )
+        self.assertEqual(delta(
+            'yatube_cache_requests_total', '{cache="page",result="hit"}',
+        ), 1)
+        self.assertEqual(delta(
+            'yatube_cache_requests_total', '{cache="page",result="miss"}',
+        ), 1)
+        # Сам запрос /metrics еще в обработке.
+        self.assertEqual(after[('yatube_http_requests_in_flight', '')], 1)
+
+    def test_token_required(self):
+        """/metrics недоступен без токена, с чужим токеном и без настройки."""
+        url = reverse('metrics')
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.assertEqual(
+            self.client.get(
+                url, HTTP_AUTHORIZATION='Bearer wrong',
+            ).status_code,
+            403,
+        )
+        with override_settings(METRICS_TOKEN=''):
+            self.assertEqual(
+                self.client.get(
+                    url, HTTP_AUTHORIZATION='Bearer ',
+                ).status_code,
+                403,
+            )
+
+    def test_threads_aggregated(self):
+        """Записи разных потоков складываются без потерь."""
+        registry = metrics.Registry()
+
+        def work():
+            for _ in range(1000):
+                registry.inc('yatube_http_requests_in_flight')
+                registry.observe('yatube_db_queries', ('view',), 2)
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        snapshot = registry.snapshot()
+        self.assertEqual(
+            snapshot[('yatube_http_requests_in_flight', ())], 4000,
+        )
+        row = snapshot[('yatube_db_queries', ('view',))]
+        self.assertEqual(row[-2:], [4000, 8000])
+
+    def test_finished_threads_are_retired(self):
+        """Словари завершившихся потоков не копятся, итог сохраняется."""
+        registry = metrics.Registry()
+        for _ in range(50):
+            thread = threading.Thread(
+                target=registry.inc,
+                args=('yatube_http_requests_total', ('index', 'GET', '200')),
+            )
+            thread.start()
+            thread.join()
+        snapshot = registry.snapshot()
+        self.assertEqual(
+            snapshot[('yatube_http_requests_total', ('index', 'GET', '200'))],
+            50,
+        )
+        self.assertEqual(registry._shards, {})
+        registry.inc('yatube_http_requests_total', ('index', 'GET', '200'))
+        self.assertEqual(len(registry._shards), 1)
+
+    def test_processes_aggregated(self):
+        """
+        Снимки других процессов складываются с метриками текущего;
+        измерители завершившихся процессов отбрасываются.
+        """
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        dead_pid = 2 ** 22 + 1
+        path = os.path.join(directory, f'metrics-{dead_pid}.json')
+        with open(path, 'w') as file:
+            json.dump([
+                ['yatube_http_requests_total', ['x', 'GET', '200'], 5],
+                ['yatube_http_requests_in_flight', [], 3],
+            ], file)
+        with override_settings(METRICS_DIR=directory):
+            values = scrape(self.client)
+            self.assertTrue(os.path.exists(
+                os.path.join(directory, f'metrics-{os.getpid()}.json'),
+            ))
+        self.assertEqual(values[(
+            'yatube_http_requests_total',
+            '{view="x",method="GET",status="200"}',
+        )], 5)
+        self.assertEqual(values[('yatube_http_requests_in_flight', '')], 1)
+
+    def test_dead_snapshots_retired(self):
+        """
+        Снимки завершившихся процессов сливаются в общий итог
+        и удаляются, посторонние файлы каталога пропускаются.
+        """
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        labels = ['x', 'GET', '200']
+        for pid in (2 ** 22 + 1, 2 ** 22 + 2):
+            with open(
+                os.path.join(directory, f'metrics-{pid}.json'), 'w',
+            ) as file:
+                json.dump([['yatube_http_requests_total', labels, 5]], file)
+        for name in ('metrics-backup.json', 'notes.json'):
+            with open(os.path.join(directory, name), 'w') as file:
+                file.write('не json')
+        key = (
+            'yatube_http_requests_total',
+            '{view="x",method="GET",status="200"}',
+        )
+        with override_settings(METRICS_DIR=directory):
+            self.assertEqual(scrape(self.client)[key], 10)
+            self.assertEqual(scrape(self.client)[key], 10)
+        self.assertEqual(
+            sorted(
+                name for name in os.listdir(directory)
+                if name.startswith('metrics-') and name[8].isdigit()
+            ),
+            [f'metrics-{os.getpid()}.json'],
+        )
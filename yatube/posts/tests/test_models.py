@@ -1,8 +1,12 @@
+from io import StringIO
+
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.test import TestCase
+from django.urls import reverse
 from mixer.backend.django import mixer
 
-from posts.models import Group, Post
+from posts.models import Group, Post, Profile
 from yatube.settings import LENGTH_POST
 
 User = get_user_model()
@@ -34,3 +38,81 @@ class PostModelTest(TestCase):
     def test_models_first_15_symbols(self):
         """Проверяем, первые 15 символов выводимые в __str__."""
         self.assertEqual(str(self.post)[:LENGTH_POST], self.post.text)
+
+
+class PostCounterTest(TestCase):
+    """
+    Проверка денормализованных счетчиков постов
+    у авторов и групп.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='counter_author')
+        cls.other_user = User.objects.create_user(username='other_author')
+        cls.group = mixer.blend(Group)
+        cls.other_group = mixer.blend(Group)
+
+    def assertCounters(self, user_count, group_count, other_group_count):
+        self.user.profile.refresh_from_db()
+        self.group.refresh_from_db()
+        self.other_group.refresh_from_db()
+        self.assertEqual(self.user.profile.post_count, user_count)
+        self.assertEqual(self.group.post_count, group_count)
+        self.assertEqual(self.other_group.post_count, other_group_count)
+
+    def test_counters_follow_create_edit_delete(self):
+        """Счетчики меняются при создании, смене группы и удалении."""
+        post = Post.objects.create(
+            author=self.user, text='текст', group=self.group,
+        )
+        self.assertCounters(1, 1, 0)
+        post = Post.objects.get(pk=post.pk)
+        post.group = self.other_group
+        post.save()
+        self.assertCounters(1, 0, 1)
+        post.text = 'новый текст'
+        post.save()
+        self.assertCounters(1, 0, 1)
+        post.delete()
+        self.assertCounters(0, 0, 0)
+
+    def test_counters_follow_cascade_delete(self):
+        """Удаление автора каскадом уменьшает счетчик группы."""
+        Post.objects.create(
+            author=self.other_user, text='текст', group=self.group,
+        )
+        self.assertCounters(0, 1, 0)
+        self.other_user.delete()
+        self.assertCounters(0, 0, 0)
+
+    def test_recount_posts_command_fixes_drift(self):
+        """Команда recount_posts исправляет расхождения счетчиков."""
+        Post.objects.create(author=self.user, text='текст', group=self.group)
+        Group.objects.filter(pk=self.group.pk).update(post_count=42)
+        Profile.objects.filter(user=self.user).update(post_count=0)
+        call_command('recount_posts', stdout=StringIO())
+        self.assertCounters(1, 1, 0)
+
+    def test_missing_profile_is_created(self):
+        """
+        Профиль пользователя, созданного без сигнала post_save,
+        создается с верными счетчиками: при новом посте
+        и при открытии страницы профиля.
+        """
+        User.objects.bulk_create([
+            User(username='bulk_author'), User(username='bulk_reader'),
+        ])
+        author = User.objects.get(username='bulk_author')
+        Post.objects.bulk_create([Post(author=author, text='старый пост')])
+        Post.objects.create(author=author, text='текст')
+        self.assertEqual(Profile.objects.get(user=author).post_count, 2)
+        reader = User.objects.get(username='bulk_reader')
+        Post.objects.bulk_create([Post(author=reader, text='текст')])
+        response = self.client.get(
+            reverse('posts:profile', args=(reader.username,)),
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['page_obj'].paginator.count, 1)
+        self.assertEqual(Profile.objects.get(user=reader).post_count, 1)
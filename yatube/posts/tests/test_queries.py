@@ -0,0 +1,136 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import (
+    Client, TestCase, TransactionTestCase, override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from mixer.backend.django import mixer
+
+from posts.counters import recount_authors, recount_groups
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+@override_settings(QUERY_BUDGET_RAISE=True)
+class QueryBudgetTests(TestCase):
+    """
+    Проверка бюджетов SQL-запросов view-функций posts.
+
+    FEED_SIZES: число постов в ленте, при котором проверяются бюджеты.
+    """
+
+    FEED_SIZES: tuple = (1, 10, 1000)
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='test_author')
+        cls.group = mixer.blend(Group)
+        cls.post = Post.objects.create(
+            text='test_text', group=cls.group, author=cls.user,
+        )
+        cls.client_author = Client()
+        cls.client_author.force_login(cls.user)
+
+    def fill_feed(self, size: int) -> None:
+        """Дополняет ленту автора и группы до size постов."""
+        Post.objects.bulk_create(
+            Post(text=f'Пост {number}', group=self.group, author=self.user)
+            for number in range(Post.objects.count(), size)
+        )
+        recount_authors([self.user.pk])
+        recount_groups([self.group.pk])
+
+    def get_query_counts(self) -> dict:
+        """Выполняет запросы ко всем страницам и считает SQL-запросы."""
+        requests = (
+            ('get', reverse('posts:index'), None),
+            ('get', reverse('posts:group_list', args=(self.group.slug,)), {}),
+            ('get', reverse('posts:profile', args=(self.user.username,)), {}),
+            ('get', reverse('posts:post_detail', args=(self.post.pk,)), None),
+            ('get', reverse('posts:post_create'), None),
+            ('get', reverse('posts:post_edit', args=(self.post.pk,)), None),
+        )
+        counts = {}
+        for method, url, data in requests:
+            with CaptureQueriesContext(connection) as queries:
+                response = getattr(self.client_author, method)(url, data)
+            self.assertIn(response.status_code, (200, 302))
+            budget = resolve(url).func.query_budget
+            self.assertLessEqual(
+                len(queries),
+                budget,
+                f'Ошибка: {method.upper()} {url} выполнил {len(queries)} '
+                f'SQL-запросов при бюджете {budget}',
+            )
+            counts[(method, url)] = len(queries)
+        return counts
+
+    def test_views_stay_within_query_budget(self):
+        """Число SQL-запросов не зависит от размера ленты."""
+        counts = {}
+        for size in self.FEED_SIZES:
+            with self.subTest(size=size):
+                self.fill_feed(size)
+                counts[size] = self.get_query_counts()
+        self.assertEqual(
+            counts[self.FEED_SIZES[1]], counts[self.FEED_SIZES[2]],
+        )
+
+    def test_fetch_profiles_load_template_fields(self):
+        """Профили выборки загружают все поля, нужные шаблонам."""
+        feed_post = Post.objects.for_feed().get(pk=self.post.pk)
+        profile_post = Post.objects.for_profile().get(pk=self.post.pk)
+        detail_post = Post.objects.for_detail().get(pk=self.post.pk)
+        with self.assertNumQueries(0):
+            for post in (feed_post, profile_post, detail_post):
+                post.text, post.pub_date, post.group.slug, post.group.title
+            for post in (feed_post, detail_post):
+                post.author.get_full_name(), str(post.author)
+            detail_post.author.profile.post_count
+
+
+@override_settings(QUERY_BUDGET_RAISE=True)
+class WriteQueryBudgetTests(TransactionTestCase):
+    """
+    Бюджеты SQL-запросов view-функций, которые пишут в базу.
+    В TestCase транзакция не фиксируется и колбэки on_commit
+    (сброс кэша лент) не выполняются, поэтому запросы
+    считаются с настоящей фиксацией.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='test_author')
+        self.group = mixer.blend(Group)
+        self.post = Post.objects.create(
+            text='test_text', group=self.group, author=self.user,
+        )
+        self.client.force_login(self.user)
+
+    def assert_within_budget(self, url: str, data: dict) -> None:
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(url, data)
+        self.assertEqual(response.status_code, 302)
+        budget = resolve(url).func.query_budget
+        self.assertLessEqual(
+            len(queries),
+            budget,
+            f'Ошибка: POST {url} выполнил {len(queries)} '
+            f'SQL-запросов при бюджете {budget}',
+        )
+
+    def test_post_create_stays_within_query_budget(self):
+        """Создание поста укладывается в бюджет SQL-запросов."""
+        self.assert_within_budget(
+            reverse('posts:post_create'),
+            {'text': 'Новый пост', 'group': self.group.pk},
+        )
+
+    def test_post_edit_stays_within_query_budget(self):
+        """Редактирование поста укладывается в бюджет SQL-запросов."""
+        self.assert_within_budget(
+            reverse('posts:post_edit', args=(self.post.pk,)),
+            {'text': 'Новый текст', 'group': self.group.pk},
+        )
@@ -0,0 +1,139 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.db import connection
+from django.test import Client, RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from mixer.backend.django import mixer
+
+from core.db import FULL_SCAN, explain_query_plan, find_plan_problems
+from core.utils import encode_cursor
+from posts.conditional import group_state, index_state, profile_state
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class QueryPlanTests(TestCase):
+    """
+    Проверка, что запросы view-функций posts используют индексы:
+    без полного просмотра posts_post и без сортировки
+    во временном B-дереве.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='test_author')
+        cls.group = mixer.blend(Group)
+        cls.post = Post.objects.create(
+            text='test_text', group=cls.group, author=cls.user,
+        )
+        cls.client_author = Client()
+        cls.client_author.force_login(cls.user)
+        cls.urls = (
+            reverse('posts:index'),
+            reverse('posts:index') + '?page=2',
+            reverse('posts:group_list', args=(cls.group.slug,)),
+            reverse('posts:profile', args=(cls.user.username,)),
+            reverse('posts:post_detail', args=(cls.post.pk,)),
+            reverse('posts:post_edit', args=(cls.post.pk,)),
+        )
+
+    def capture_selects(self, url: str) -> list:
+        """Запрашивает url и возвращает выполненные SELECT с параметрами."""
+        queries = []
+
+        def capture(execute, sql, params, many, context):
+            if sql.lstrip().upper().startswith('SELECT'):
+                queries.append((sql, params))
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(capture):
+            self.client_author.get(url)
+        return queries
+
+    def test_views_use_indexes(self):
+        """Запросы лент и страницы поста не сканируют posts_post."""
+        for url in self.urls:
+            for sql, params in self.capture_selects(url):
+                with self.subTest(url=url, sql=sql):
+                    plan = explain_query_plan(connection, sql, params)
+                    problems = find_plan_problems(plan, ('posts_post',))
+                    self.assertEqual(
+                        problems,
+                        [],
+                        f'Ошибка: {url} выполняет запрос без индекса: {sql}',
+                    )
+
+    def test_feed_validators_do_not_scan(self):
+        """ETag лент вычисляется точечным поиском, без просмотра индекса."""
+        request = RequestFactory().get('/')
+        request.user, request.session = AnonymousUser(), {}
+        states = (
+            (index_state, ()),
+            (group_state, (self.group.slug,)),
+            (profile_state, (self.user.username,)),
+        )
+        for state, args in states:
+            with CaptureQueriesContext(connection) as queries:
+                state(request, *args)
+            for query in queries.captured_queries:
+                with self.subTest(sql=query['sql']):
+                    plan = explain_query_plan(connection, query['sql'])
+                    self.assertEqual(
+                        [step for step in plan if step.startswith('SCAN')],
+                        [],
+                    )
+
+    def test_cursor_pages_use_indexes(self):
+        """Запросы курсорной пагинации не сканируют posts_post."""
+        index = self.client_author.get(reverse('posts:index'))
+        token = index.context['page_obj'][0]
+        for url in self.urls[:4]:
+            for key in ('after', 'before'):
+                cursor_url = f'{url.split("?")[0]}?{key}='
+                for sql, params in self.capture_selects(
+                    cursor_url + encode_cursor(token),
+                ):
+                    with self.subTest(url=cursor_url, sql=sql):
+                        plan = explain_query_plan(connection, sql, params)
+                        self.assertEqual(
+                            find_plan_problems(plan, ('posts_post',)), [],
+                        )
+
+
+class FindPlanProblemsTests(TestCase):
+    """Проверка разбора шагов плана в find_plan_problems."""
+
+    def test_full_scans_are_reported(self):
+        """Полный просмотр таблицы из списка - проблема."""
+        for step in ('SCAN posts_post', 'SCAN TABLE posts_post'):
+            with self.subTest(step=step):
+                self.assertEqual(
+                    find_plan_problems([step], ('posts_post',)), [step],
+                )
+
+    def test_index_scans_are_not_reported(self):
+        """Просмотр по индексу и поиск по индексу - не проблема."""
+        for step in (
+            'SCAN posts_post USING COVERING INDEX post_updated_idx',
+            'SCAN TABLE posts_post USING INDEX post_feed_idx',
+            'SEARCH posts_post USING INDEX post_feed_idx (pub_date<?)',
+        ):
+            with self.subTest(step=step):
+                self.assertIsNone(FULL_SCAN.search(step))
+                self.assertEqual(
+                    find_plan_problems([step], ('posts_post',)), [],
+                )
+
+    def test_other_tables_and_temp_sorts(self):
+        """Таблицы вне списка пропускаются, сортировка - всегда проблема."""
+        self.assertEqual(
+            find_plan_problems(['SCAN posts_group'], ('posts_post',)), [],
+        )
+        self.assertEqual(
+            find_plan_problems(['SCAN posts_postx'], ('posts_post',)), [],
+        )
+        step = 'USE TEMP B-TREE FOR ORDER BY'
+        self.assertEqual(find_plan_problems([step], ('posts_post',)), [step])
@@ -0,0 +1,129 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core import routers
+from core.cache import expire_feeds
+from core.db import copy_database
+from core.decorators import cache_anonymous_page
+from core.middleware import ReplicaRoutingMiddleware
+from posts.models import Post
+from posts.tests.test_cache import LOCMEM_CACHES
+
+ROUTER = routers.PrimaryReplicaRouter()
+
+
+def routed_view(request):
+    """Отвечает базой чтения до и после возможной записи."""
+    before = ROUTER.db_for_read(Post)
+    if request.method == 'POST':
+        ROUTER.db_for_write(Post)
+    return HttpResponse(f'{before} {ROUTER.db_for_read(Post)}')
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'], REPLICA_STICKY_SECONDS=10)
+class ReplicaRoutingTests(SimpleTestCase):
+    """
+    Проверка маршрутизации чтений между основной базой и репликами.
+    """
+
+    def setUp(self):
+        self.middleware = ReplicaRoutingMiddleware(routed_view)
+        self.factory = RequestFactory()
+
+    def test_outside_request(self):
+        """Вне запросов чтения и записи идут в основную базу."""
+        self.assertEqual(ROUTER.db_for_read(Post), 'default')
+        self.assertEqual(ROUTER.db_for_write(Post), 'default')
+        self.assertFalse(ROUTER.allow_migrate('replica1', 'posts'))
+
+    def test_get_reads_replica(self):
+        """GET читает с реплики и не ставит cookie."""
+        response = self.middleware(self.factory.get('/'))
+        self.assertEqual(response.content, b'replica1 replica1')
+        self.assertNotIn(ReplicaRoutingMiddleware.COOKIE, response.cookies)
+        self.assertEqual(ROUTER.db_for_read(Post), 'default')
+
+    def test_read_your_writes(self):
+        """После записи пользователь читает из основной базы."""
+        response = self.middleware(self.factory.post('/'))
+        self.assertEqual(response.content, b'default default')
+        cookie = response.cookies[ReplicaRoutingMiddleware.COOKIE]
+        self.assertEqual(cookie['max-age'], 10)
+
+        request = self.factory.get('/')
+        request.COOKIES[cookie.key] = cookie.value
+        self.assertEqual(self.middleware(request).content, b'default default')
+
+        request = self.factory.get('/')
+        request.COOKIES[cookie.key] = '0'
+        self.assertEqual(
+            self.middleware(request).content, b'replica1 replica1',
+        )
+
+    def test_write_during_get(self):
+        """Запись в GET переключает дальнейшие чтения на основную базу."""
+        def view(request):
+            ROUTER.db_for_write(Post)
+            return HttpResponse(ROUTER.db_for_read(Post))
+
+        response = ReplicaRoutingMiddleware(view)(self.factory.get('/'))
+        self.assertEqual(response.content, b'default')
+        self.assertIn(ReplicaRoutingMiddleware.COOKIE, response.cookies)
+
+    @override_settings(CACHES=LOCMEM_CACHES)
+    def test_page_cache_fills_from_primary_after_write(self):
+        """
+        Страница ленты, закэшированная сразу после смены ее версии,
+        собирается из основной базы, позже - с реплики.
+        """
+        middleware = ReplicaRoutingMiddleware(
+            cache_anonymous_page('replicas')(routed_view),
+        )
+        request = self.factory.get('/')
+        request.user = AnonymousUser()
+        cache.clear()
+        expire_feeds(['replicas'])
+        self.assertEqual(middleware(request).content, b'default default')
+        with override_settings(REPLICA_STICKY_SECONDS=0):
+            expire_feeds(['replicas'])
+            self.assertEqual(
+                middleware(request).content, b'replica1 replica1',
+            )
+
+
+class CopyDatabaseTests(SimpleTestCase):
+    """
+    Проверка замены репликации на двух файлах SQLite.
+    """
+
+    def test_copy(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        primary = os.path.join(directory, 'primary.sqlite3')
+        replica = os.path.join(directory, 'replica.sqlite3')
+        connection = sqlite3.connect(primary)
+        connection.execute('CREATE TABLE post (text TEXT)')
+        connection.execute("INSERT INTO post VALUES ('first')")
+        connection.commit()
+        copy_database(primary, replica)
+        connection.execute("INSERT INTO post VALUES ('second')")
+        connection.commit()
+        connection.close()
+
+        connection = sqlite3.connect(replica)
+        rows = connection.execute('SELECT text FROM post').fetchall()
+        connection.close()
+        self.assertEqual(rows, [('first',)])
+        copy_database(primary, replica)
+        connection = sqlite3.connect(replica)
+        count = connection.execute('SELECT COUNT(*) FROM post').fetchone()
+        connection.close()
+        self.assertEqual(count, (2,))
+        self.assertEqual(os.listdir(directory).count('replica.sqlite3.tmp'), 0)
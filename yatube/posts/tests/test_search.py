@@ -0,0 +1,73 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Post
+
+User = get_user_model()
+
+
+class PostSearchTests(TestCase):
+    """
+    Проверка полнотекстового поиска по постам.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_superuser(
+            username='test_author', email='a@a.ru', password='pass',
+        )
+        cls.post = Post.objects.create(
+            text='Вечерняя прогулка с собаками по <b>набережной</b>',
+            author=cls.user,
+        )
+        cls.other_post = Post.objects.create(
+            text='Утренний поезд в город', author=cls.user,
+        )
+        cls.url = reverse('posts:search')
+
+    def search(self, query: str) -> list:
+        response = self.client.get(self.url, {'q': query})
+        return list(response.context['page_obj'])
+
+    def test_search_finds_word_forms(self):
+        """Поиск не зависит от регистра и окончаний слов."""
+        for query in ('прогулка', 'ПРОГУЛКИ', 'собака', 'набережная'):
+            with self.subTest(query=query):
+                self.assertEqual(self.search(query), [self.post])
+
+    def test_search_highlights_and_escapes_snippet(self):
+        """Найденные слова выделены, текст поста экранирован."""
+        response = self.client.get(self.url, {'q': 'прогулка'})
+        self.assertContains(response, '<mark>прогулка</mark>')
+        self.assertContains(response, '&lt;b&gt;')
+
+    def test_search_index_follows_edit_and_delete(self):
+        """Индекс обновляется при редактировании и удалении поста."""
+        post = Post.objects.get(pk=self.other_post.pk)
+        post.text = 'Ночной самолет'
+        post.save()
+        self.assertEqual(self.search('поезд'), [])
+        self.assertEqual(self.search('самолет'), [post])
+        post.delete()
+        self.assertEqual(self.search('самолет'), [])
+
+    def test_search_ignores_query_syntax(self):
+        """Служебные символы FTS5 в запросе не приводят к ошибке."""
+        for query in ('"', 'AND OR NOT', '*', 'NEAR(', ''):
+            with self.subTest(query=query):
+                self.assertEqual(
+                    self.client.get(self.url, {'q': query}).status_code, 200,
+                )
+
+    def test_admin_search_uses_index(self):
+        """Поиск в админке находит посты по полнотекстовому индексу."""
+        client = Client()
+        client.force_login(self.user)
+        response = client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'поезда'},
+        )
+        self.assertEqual(
+            list(response.context['cl'].result_list), [self.other_post],
+        )
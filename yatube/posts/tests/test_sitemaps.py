@@ -0,0 +1,131 @@
+import re
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.cache import expire_post_feeds
+from posts.models import Group, Post
+from posts.sitemaps import Section
+from posts.tests.test_cache import LOCMEM_CACHES
+
+User = get_user_model()
+
+LOC = re.compile(r'<loc>http://testserver([^<]+)</loc>')
+
+
+@override_settings(SITEMAP_SHARD_SIZE=5)
+class SitemapTests(TestCase):
+    """
+    Проверка карты сайта, разбитой на части.
+    """
+
+    POSTS_COUNT: int = 12
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='test_author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test_slug',
+            description='Тестовое описание',
+        )
+        for i in range(cls.POSTS_COUNT):
+            Post.objects.create(
+                text=f'Пост {i}', author=cls.user, group=cls.group,
+            )
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = directory.name
+        settings_override = override_settings(SITEMAP_ROOT=self.root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def get_text(self, url: str) -> str:
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        if response.streaming:
+            return b''.join(response.streaming_content).decode()
+        return response.content.decode()
+
+    def collect_urls(self) -> list:
+        urls = []
+        for shard in LOC.findall(self.get_text(reverse('posts:sitemap'))):
+            urls.extend(LOC.findall(self.get_text(shard)))
+        return urls
+
+    def test_shards_cover_all_pages(self):
+        """Части индекса содержат все посты, группы и профили."""
+        expected = [
+            reverse('posts:post_detail', args=(pk,))
+            for pk in Post.objects.order_by('pk').values_list('pk', flat=True)
+        ] + [
+            reverse('posts:group_list', args=(self.group.slug,)),
+            reverse('posts:profile', args=(self.user.username,)),
+        ]
+        self.assertEqual(self.collect_urls(), expected)
+
+    def test_shard_is_streamed_with_lastmod(self):
+        """Часть формируется потоком и содержит lastmod постов."""
+        post = Post.objects.order_by('pk').first()
+        number = (post.pk - 1) // 5
+        url = reverse('posts:sitemap_shard', args=('posts', number))
+        response = self.client.get(url)
+        self.assertTrue(response.streaming)
+        text = b''.join(response.streaming_content).decode()
+        self.assertIn(
+            f'<lastmod>{post.updated_at.isoformat(timespec="seconds")}',
+            text,
+        )
+        response = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'],
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_missing_shards(self):
+        """Пустая часть и неизвестный раздел - 404."""
+        for args in (('posts', 1000), ('unknown', 0)):
+            with self.subTest(args=args):
+                response = self.client.get(
+                    reverse('posts:sitemap_shard', args=args),
+                )
+                self.assertEqual(response.status_code, 404)
+
+    def test_pregenerated_sitemaps_are_served_from_disk(self):
+        """Собранные командой файлы отдаются без запросов к базе."""
+        streamed = self.collect_urls()
+        call_command(
+            'build_sitemaps', '--base-url=http://testserver/',
+            stdout=StringIO(),
+        )
+        with self.assertNumQueries(0):
+            self.assertEqual(self.collect_urls(), streamed)
+
+    def test_section_is_abstract(self):
+        """Раздел без queryset создать нельзя."""
+        with self.assertRaises(TypeError):
+            Section()
+
+    @override_settings(CACHES=LOCMEM_CACHES)
+    def test_index_is_cached_until_posts_change(self):
+        """
+        Индекс без собранных файлов строится по базе один раз
+        и перестраивается после изменения постов.
+        """
+        first = self.get_text(reverse('posts:sitemap'))
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_text(reverse('posts:sitemap')), first)
+        for i in range(5):
+            Post.objects.create(text=f'Новый пост {i}', author=self.user)
+        # В TestCase колбэки on_commit не выполняются: сброс
+        # лент, который они делают, вызывается напрямую.
+        expire_post_feeds((self.user.pk,), ())
+        self.assertGreater(
+            len(LOC.findall(self.get_text(reverse('posts:sitemap')))),
+            len(LOC.findall(first)),
+        )
@@ -0,0 +1,73 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.slowlog import normalize
+from posts.models import Post
+
+User = get_user_model()
+
+
+class SlowQueryLogTests(TestCase):
+    """
+    Проверка журнала медленных SQL-запросов и его сводки.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='test_author')
+        cls.post = Post.objects.create(text='test_text', author=cls.user)
+
+    def test_normalize(self):
+        """Запросы, различающиеся значениями, приводятся к одному виду."""
+        self.assertEqual(
+            normalize(
+                'SELECT "t1"."id" FROM "t1" WHERE "t1"."id" IN (%s, %s)\n'
+                "  AND name = 'x' LIMIT 21",
+            ),
+            'SELECT "t1"."id" FROM "t1" WHERE "t1"."id" IN (...) '
+            'AND name = ? LIMIT ?',
+        )
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0)
+    def test_log_entry(self):
+        """В журнал пишутся view, вид запроса, типы параметров и план."""
+        with self.assertLogs('core.slowqueries', 'WARNING') as logs:
+            self.client.get(
+                reverse('posts:profile', args=(self.user.username,)),
+            )
+        entries = [json.loads(record.getMessage()) for record in logs.records]
+        entry = next(
+            entry for entry in entries if 'FROM "auth_user"' in entry['sql']
+        )
+        self.assertEqual(entry['view'], 'posts.views.profile')
+        self.assertEqual(entry['params'], ['str'])
+        self.assertNotIn('test_author', json.dumps(entries))
+        self.assertGreaterEqual(entry['duration_ms'], 0)
+        self.assertTrue(any('auth_user' in line for line in entry['plan']))
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0)
+    def test_report(self):
+        """Сводка группирует записи журнала по виду запроса."""
+        with self.assertLogs('core.slowqueries', 'WARNING') as logs:
+            for _ in range(3):
+                Post.objects.filter(author=self.user).count()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'slow_queries.log')
+        with open(path, 'w') as file:
+            file.write('не JSON\n')
+            for record in logs.records:
+                file.write(record.getMessage() + '\n')
+        out = StringIO()
+        call_command('slowqueries', f'--file={path}', stdout=out)
+        self.assertIn('count=3', out.getvalue())
+        self.assertIn('Видов запросов: 1, записей: 3', out.getvalue())
@@ -0,0 +1,86 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.test import (
+    SimpleTestCase, TestCase, TransactionTestCase, override_settings,
+)
+
+from core.db import retry_on_lock
+
+
+class SQLiteProfileTests(TestCase):
+    """
+    Проверка профиля SQLite, применяемого к новым соединениям.
+    """
+
+    def test_pragmas(self):
+        raw = connection.connection
+        self.assertEqual(raw.execute('PRAGMA synchronous').fetchone(), (1,))
+        self.assertEqual(raw.execute('PRAGMA temp_store').fetchone(), (2,))
+        self.assertEqual(
+            raw.execute('PRAGMA busy_timeout').fetchone(), (5000,),
+        )
+        self.assertEqual(
+            raw.execute('PRAGMA cache_size').fetchone(), (-64 * 1024,),
+        )
+
+
+@override_settings(SQLITE_LOCK_RETRIES=2, SQLITE_LOCK_RETRY_DELAY=0)
+class RetryOnLockTests(SimpleTestCase):
+    """
+    Проверка повтора записи при блокировке базы.
+    """
+
+    def test_retries_lock_errors(self):
+        calls = []
+
+        @retry_on_lock
+        def write():
+            calls.append(1)
+            if len(calls) < 3:
+                raise OperationalError('database is locked')
+            return 'done'
+
+        self.assertEqual(write(), 'done')
+        self.assertEqual(len(calls), 3)
+
+    def test_gives_up(self):
+        calls = []
+
+        @retry_on_lock
+        def write():
+            calls.append(1)
+            raise OperationalError('database is locked')
+
+        with self.assertRaises(OperationalError):
+            write()
+        self.assertEqual(len(calls), 3)
+
+    def test_other_errors_not_retried(self):
+        calls = []
+
+        @retry_on_lock
+        def write():
+            calls.append(1)
+            raise OperationalError('no such table: posts_post')
+
+        with self.assertRaises(OperationalError):
+            write()
+        self.assertEqual(len(calls), 1)
+
+
+class DBMaintainTests(TransactionTestCase):
+    """
+    Проверка команды обслуживания базы.
+    """
+
+    def test_maintain(self):
+        out = StringIO()
+        call_command('dbmaintain', stdout=out)
+        call_command('dbmaintain', '--vacuum', stdout=out)
+        output = out.getvalue()
+        self.assertIn('quick_check: ok', output)
+        self.assertIn('ANALYZE', output)
+        self.assertIn('auto_vacuum=INCREMENTAL', output)
+        self.assertIn('incremental_vacuum', output)
@@ -0,0 +1,54 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Post
+
+User = get_user_model()
+
+TIMING = re.compile(r'(\w+);dur=([\d.]+)(?:;desc="(\d+) queries")?')
+
+
+class ServerTimingTests(TestCase):
+    """
+    Проверка заголовка Server-Timing и лога замеров.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='test_author')
+        cls.post = Post.objects.create(text='test_text', author=cls.user)
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=1)
+    def test_header_and_log(self):
+        """Замеры view, SQL, шаблонов и middleware в заголовке и логе."""
+        url = reverse('posts:post_detail', args=(self.post.pk,))
+        with self.assertLogs('core.timing', 'INFO') as logs:
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(url)
+        metrics = {
+            name: (float(value), queries)
+            for name, value, queries in TIMING.findall(
+                response['Server-Timing'],
+            )
+        }
+        self.assertEqual(
+            set(metrics), {'total', 'view', 'db', 'tpl', 'mw'},
+        )
+        self.assertEqual(metrics['db'][1], str(len(context.captured_queries)))
+        self.assertGreater(metrics['tpl'][0], 0)
+        self.assertLessEqual(metrics['tpl'][0], metrics['view'][0])
+        self.assertLessEqual(metrics['view'][0], metrics['total'][0])
+        self.assertIn('view=posts:post_detail', logs.output[0])
+        self.assertIn('status=200', logs.output[0])
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=0)
+    def test_disabled(self):
+        """При нулевой доле замеров заголовка нет."""
+        response = self.client.get(reverse('posts:index'))
+        self.assertFalse(response.has_header('Server-Timing'))
@@ -1,10 +1,13 @@
+import re
+
 from django import forms
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 from mixer.backend.django import mixer
 
+from core.utils import CountedPaginator, encode_cursor
 from posts.models import Group, Post
 
 User = get_user_model()
@@ -252,3 +255,156 @@ class PaginatorViewsTest(TestCase):
                     f'Ошибка: Пагинатор не выводит на вторую страницу'
                     f'{template} 5 постов',
                 )
+
+    def test_cursor_pages_paginate_correct(self):
+        """
+        Курсорная пагинация выводит те же посты, что и постраничная,
+        и позволяет вернуться на предыдущую страницу.
+        """
+        for pages in self.paginated:
+            name, template, arg = pages
+            reverse_name = reverse(name, args=arg)
+            with self.subTest(reverse_name=reverse_name):
+                first_page = self.client.get(reverse_name).context['page_obj']
+                after = encode_cursor(first_page[settings.LIMIT_POSTS - 1])
+                response = self.client.get(reverse_name, {'after': after})
+                page_obj = response.context['page_obj']
+                self.assertEqual(
+                    list(page_obj),
+                    list(
+                        self.client.get(
+                            reverse_name + '?page=2',
+                        ).context['page_obj'],
+                    ),
+                    f'Ошибка: курсор не выводит вторую страницу {template}',
+                )
+                self.assertFalse(page_obj.has_next())
+                response = self.client.get(
+                    reverse_name, {'before': page_obj.previous_cursor},
+                )
+                self.assertEqual(
+                    list(response.context['page_obj']),
+                    list(first_page),
+                )
+
+    def test_next_link_leads_to_cursor_page(self):
+        """
+        Ссылка «Следующая» постраничной ленты ведет на курсорную
+        страницу с теми же постами, что и ?page=2.
+        """
+        for name, template, arg in self.paginated:
+            reverse_name = reverse(name, args=arg)
+            with self.subTest(reverse_name=reverse_name):
+                content = self.client.get(reverse_name).content.decode()
+                link = re.search(r'href="(\?after=[^"]+)"', content)
+                self.assertIsNotNone(link, template)
+                response = self.client.get(reverse_name + link.group(1))
+                self.assertEqual(
+                    list(response.context['page_obj']),
+                    list(
+                        self.client.get(
+                            reverse_name + '?page=2',
+                        ).context['page_obj'],
+                    ),
+                )
+
+    def test_broken_cursor_shows_first_page(self):
+        """Испорченный токен курсора открывает первую страницу."""
+        response = self.client.get(
+            reverse('posts:index'), {'after': 'не-токен'},
+        )
+        self.assertEqual(
+            len(response.context['page_obj']), settings.LIMIT_POSTS,
+        )
+        self.assertFalse(response.context['page_obj'].has_previous())
+
+    def test_page_window_is_bounded(self):
+        """Выводится окно страниц вокруг текущей, первая и последняя."""
+        paginator = CountedPaginator(
+            range(1000), settings.LIMIT_POSTS, on_each_side=2,
+        )
+        self.assertEqual(
+            paginator.get_page(50).page_window,
+            [1, None, 48, 49, 50, 51, 52, None, 100],
+        )
+        self.assertEqual(
+            paginator.get_page(1).page_window, [1, 2, 3, None, 100],
+        )
+
+    @override_settings(PAGINATOR_COUNT_LIMIT=12)
+    def test_count_stops_at_limit(self):
+        """Подсчет постов останавливается на пороге PAGINATOR_COUNT_LIMIT."""
+        response = self.client.get(reverse('posts:index'))
+        paginator = response.context['page_obj'].paginator
+        self.assertTrue(paginator.count_capped)
+        self.assertEqual(paginator.count, 12)
+        self.assertContains(response, 'много страниц')
+        self.assertNotContains(response, 'Последняя')
+
+    @override_settings(PAGINATOR_COUNT_LIMIT=5)
+    def test_pages_past_count_limit(self):
+        """Страницы за порогом подсчета открываются, а не заменяются."""
+        url = reverse('posts:index')
+        first = self.client.get(url).context['page_obj']
+        self.assertTrue(first.has_next())
+        page_obj = self.client.get(url, {'page': 2}).context['page_obj']
+        self.assertEqual(page_obj.number, 2)
+        self.assertEqual(
+            len(page_obj), self.NUMBER_OF_POSTS_SECOND_PAGE,
+        )
+        self.assertFalse(page_obj.has_next())
+        self.assertEqual(page_obj.page_window, [1, 2])
+
+
+class ConditionalGetTests(TestCase):
+    """
+    Проверка ответов 304 на условные запросы
+    к лентам и странице поста.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='test_author')
+        cls.group = mixer.blend(Group)
+        cls.post = Post.objects.create(
+            text='test_text', group=cls.group, author=cls.user,
+        )
+        cls.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=(cls.group.slug,)),
+            reverse('posts:profile', args=(cls.user.username,)),
+            reverse('posts:post_detail', args=(cls.post.pk,)),
+        )
+
+    def test_unchanged_pages_return_not_modified(self):
+        """Повторный запрос с ETag получает 304 одним SQL-запросом."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+                with self.assertNumQueries(1):
+                    response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+
+    def test_deleted_posts_change_etag(self):
+        """Удаление поста меняет ETag ленты группы и профиля."""
+        post = Post.objects.create(
+            text='удаляемый пост', group=self.group, author=self.user,
+        )
+        etags = {url: self.client.get(url)['ETag'] for url in self.urls[1:3]}
+        post.delete()
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+
+    def test_changed_pages_are_rendered(self):
+        """После редактирования поста страницы отдаются заново."""
+        etags = {url: self.client.get(url)['ETag'] for url in self.urls}
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'новый текст'
+        post.save()
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertContains(response, 'новый текст')
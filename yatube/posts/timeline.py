@@ -0,0 +1,239 @@
+import typing
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q, QuerySet
+
+from core.utils import CursorPage, decode_cursor, encode_cursor
+from posts.models import Follow, Group, Post, Profile, TimelineEntry, User
+
+# Рассылка постов с id от заданного подписчикам их автора и группы
+# одним INSERT ... SELECT; цели, у которых от TIMELINE_FANOUT_LIMIT
+# подписчиков, пропускаются.
+FAN_OUT_SQL: str = f"""
+    INSERT OR IGNORE INTO {TimelineEntry._meta.db_table}
+        (user_id, post_id, pub_date)
+    SELECT follow.user_id, post.id, post.pub_date
+    FROM {Post._meta.db_table} AS post
+    JOIN {Follow._meta.db_table} AS follow
+        ON follow.author_id = post.author_id
+    WHERE post.id >= %s AND NOT EXISTS (
+        SELECT 1 FROM {Profile._meta.db_table} AS profile
+        WHERE profile.user_id = post.author_id
+            AND profile.follower_count >= %s
+    )
+    UNION
+    SELECT follow.user_id, post.id, post.pub_date
+    FROM {Post._meta.db_table} AS post
+    JOIN {Follow._meta.db_table} AS follow
+        ON follow.group_id = post.group_id
+    WHERE post.id >= %s AND NOT EXISTS (
+        SELECT 1 FROM {Group._meta.db_table} AS target
+        WHERE target.id = post.group_id
+            AND target.follower_count >= %s
+    )
+"""
+
+Key = typing.Tuple[typing.Any, int]
+
+
+def fan_out(since: int) -> int:
+    """
+    Добавляет посты с id от since в ленты подписчиков их автора
+    и группы одним INSERT ... SELECT, без чтения списка
+    подписчиков в Python. id новых постов растут (AUTOINCREMENT),
+    поэтому since - id первого созданного поста или пачки.
+    Авторы и группы с числом подписчиков от TIMELINE_FANOUT_LIMIT
+    пропускаются, а их посты помечаются как неразосланные
+    (fanned_out=False): timeline_page читает их напрямую из Post
+    и после того, как подписчиков станет меньше порога.
+    Возвращает число неразосланных постов.
+    """
+    limit = settings.TIMELINE_FANOUT_LIMIT
+    with connection.cursor() as cursor:
+        cursor.execute(FAN_OUT_SQL, [since, limit, since, limit])
+    return Post.objects.filter(pk__gte=since).filter(
+        Q(author__profile__follower_count__gte=limit)
+        | Q(group__follower_count__gte=limit),
+    ).update(fanned_out=False)
+
+
+def _target(
+    author: typing.Optional[User], group: typing.Optional[Group],
+) -> Q:
+    return Q(author=author) if author is not None else Q(group=group)
+
+
+def follow(
+    user: User,
+    author: typing.Optional[User] = None,
+    group: typing.Optional[Group] = None,
+) -> bool:
+    """
+    Подписывает user на автора или группу и добавляет в его ленту
+    TIMELINE_BACKFILL последних разосланных постов цели:
+    неразосланные timeline_page читает из Post.
+    Возвращает False, если подписка уже была.
+    """
+    with transaction.atomic():
+        _, created = Follow.objects.get_or_create(
+            user=user, author=author, group=group,
+        )
+        if created:
+            TimelineEntry.objects.bulk_create(
+                (
+                    TimelineEntry(user=user, post_id=pk, pub_date=pub_date)
+                    for pk, pub_date in Post.objects.filter(
+                        _target(author, group), fanned_out=True,
+                    ).values_list('pk', 'pub_date')[
+                        :settings.TIMELINE_BACKFILL
+                    ]
+                ),
+                ignore_conflicts=True,
+            )
+    return created
+
+
+def move_group_follows(sources: QuerySet, target: Group) -> int:
+    """
+    Переносит подписки на группы sources на группу target;
+    подписчики, у которых подписка на target уже есть, пропускаются.
+    В ленты новых подписчиков target добавляются TIMELINE_BACKFILL
+    последних разосланных постов target, как при follow.
+    Возвращает число перенесенных подписок.
+    """
+    users = set(
+        Follow.objects.filter(group__in=sources).values_list(
+            'user_id', flat=True,
+        ),
+    ) - set(target.followers.values_list('user_id', flat=True))
+    Follow.objects.bulk_create(
+        (Follow(user_id=pk, group=target) for pk in users),
+        batch_size=settings.BULK_CHUNK_SIZE,
+        ignore_conflicts=True,
+    )
+    posts = list(
+        Post.objects.filter(group=target, fanned_out=True).values_list(
+            'pk', 'pub_date',
+        )[:settings.TIMELINE_BACKFILL],
+    )
+    TimelineEntry.objects.bulk_create(
+        (
+            TimelineEntry(user_id=user_id, post_id=pk, pub_date=pub_date)
+            for user_id in users for pk, pub_date in posts
+        ),
+        batch_size=settings.BULK_CHUNK_SIZE,
+        ignore_conflicts=True,
+    )
+    return len(users)
+
+
+def unfollow(
+    user: User,
+    author: typing.Optional[User] = None,
+    group: typing.Optional[Group] = None,
+) -> bool:
+    """
+    Отменяет подписку и убирает из ленты посты цели,
+    кроме попавших в ленту через другую подписку пользователя.
+    Возвращает False, если подписки не было.
+    """
+    follows = Follow.objects.filter(user=user)
+    with transaction.atomic():
+        deleted, _ = follows.filter(_target(author, group)).delete()
+        if not deleted:
+            return False
+        entries = TimelineEntry.objects.filter(user=user)
+        # NOT IN по подзапросу с NULL не совпадает ни с чем,
+        # поэтому подписки другого вида из подзапросов исключены.
+        if author is not None:
+            entries = entries.filter(post__author=author).exclude(
+                post__group__in=follows.exclude(
+                    group__isnull=True,
+                ).values('group'),
+            )
+        else:
+            entries = entries.filter(post__group=group).exclude(
+                post__author__in=follows.exclude(
+                    author__isnull=True,
+                ).values('author'),
+            )
+        entries.delete()
+    return True
+
+
+def _pulled_posts(user: User) -> QuerySet:
+    """
+    Неразосланные посты авторов и групп, на которые подписан user.
+    """
+    follows = Follow.objects.filter(user=user)
+    return Post.objects.filter(fanned_out=False).filter(
+        Q(author__in=follows.values('author'))
+        | Q(group__in=follows.values('group')),
+    )
+
+
+def _keys(
+    queryset: QuerySet,
+    field: str,
+    key: typing.Optional[Key],
+    forward: bool,
+    limit: int,
+) -> typing.List[Key]:
+    """
+    До limit ключей (pub_date, id поста) выборки за курсором key:
+    при forward - более старые, иначе - более новые.
+    """
+    if key is not None:
+        pub_date, pk = key
+        after = 'lt' if forward else 'gt'
+        queryset = queryset.filter(
+            Q(**{f'pub_date__{after}': pub_date})
+            | Q(pub_date=pub_date, **{f'{field}__{after}': pk}),
+        )
+    sign = '-' if forward else ''
+    return list(
+        queryset.order_by(f'{sign}pub_date', f'{sign}{field}')
+        .values_list('pub_date', field)[:limit],
+    )
+
+
+def timeline_page(
+    user: User,
+    per_page: int,
+    after: typing.Optional[str] = None,
+    before: typing.Optional[str] = None,
+) -> CursorPage:
+    """
+    Страница ленты подписок по ключу (pub_date, id поста).
+    Ключи берутся из TimelineEntry и из неразосланных постов
+    подписок, сливаются без повторов, после чего
+    посты страницы загружаются одним запросом.
+    Пост, удаленный после выборки ключей, пропускается.
+    """
+    key = decode_cursor(after or before or '')
+    forward = key is None or bool(after)
+    keys = set(_keys(
+        TimelineEntry.objects.filter(user=user),
+        'post_id', key, forward, per_page + 1,
+    ))
+    keys.update(_keys(
+        _pulled_posts(user), 'id', key, forward, per_page + 1,
+    ))
+    keys = sorted(keys, reverse=forward)
+    has_more = len(keys) > per_page
+    keys = keys[:per_page]
+    if not forward:
+        keys.reverse()
+    posts = Post.objects.for_feed().in_bulk([pk for _, pk in keys])
+    cursors = [
+        encode_cursor({'pub_date': pub_date, 'id': pk})
+        for pub_date, pk in (keys[:1] + keys[-1:] if keys else [])
+    ]
+    first, last = (cursors[0], cursors[-1]) if cursors else (None, None)
+    return CursorPage(
+        [posts[pk] for _, pk in keys if pk in posts],
+        last if keys and (has_more or not forward) else None,
+        first if keys and (key is not None if forward else has_more)
+        else None,
+    )
@@ -1,13 +1,47 @@
+import typing
+from urllib.parse import urlencode
+
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
-from django.http import HttpRequest, HttpResponse
+from django.http import (
+    FileResponse, Http404, HttpRequest, HttpResponse, StreamingHttpResponse,
+)
 from django.shortcuts import get_object_or_404, redirect, render
+from django.views.decorators.http import require_POST
 
-from core.utils import paginate
+from core.decorators import (
+    cache_anonymous_page, conditional_page, query_budget,
+)
+from core.utils import (
+    CURSOR_AFTER, CURSOR_BEFORE, ChainedFeed, CountedPaginator, paginate,
+)
+from posts.cache import GROUP_FEED, INDEX_FEED, PROFILE_FEED, SITEMAP_FEED
+from posts.conditional import (
+    FOLLOW_VERSION, group_state, index_state, post_state, profile_state,
+    sitemap_shard_state,
+)
+from posts.counters import author_profile
 from posts.forms import PostForm
-from posts.models import Group, Post, User
+from posts.models import ArchivedPost, Follow, Group, Post, User
+from posts.search import SearchResults
+from posts.sitemaps import (
+    INDEX_FILENAME, SECTIONS, pregenerated_path, render_index, shard_filename,
+)
+from posts.timeline import follow, timeline_page, unfollow
+
+SITEMAP_CONTENT_TYPE = 'application/xml; charset=utf-8'
+
+
+def is_following(request: HttpRequest, **target: typing.Any) -> bool:
+    """Подписан ли текущий пользователь на автора или группу."""
+    return request.user.is_authenticated and Follow.objects.filter(
+        user=request.user, **target,
+    ).exists()
 
 
+@query_budget(5)
+@cache_anonymous_page(INDEX_FEED)
+@conditional_page(index_state)
 def index(request: HttpRequest) -> HttpResponse:
     """
     Отрисовка главной страницы с 10 последними статьями.
@@ -15,7 +49,7 @@ def index(request: HttpRequest) -> HttpResponse:
     html страницу с данными.
     """
     page_obj = paginate(
-        Post.objects.select_related('author', 'group'),
+        Post.objects.for_feed(),
         request,
         settings.LIMIT_POSTS,
     )
@@ -28,37 +62,59 @@ def index(request: HttpRequest) -> HttpResponse:
     )
 
 
+@query_budget(7)
+@cache_anonymous_page(GROUP_FEED)
+@conditional_page(group_state)
 def group_posts(request: HttpRequest, slug: str) -> HttpResponse:
     """
     Отрисовка страницы группы с 10 последними статьями данной группы.
     Принимает WSGIRequest, наименование группы в формате slug
     и возвращает подготовленную html страницу с данными.
+    За последним постом основной таблицы лента продолжается
+    в архиве; страница на границе стоит двух запросов.
     """
     group = get_object_or_404(Group, slug=slug)
     page_obj = paginate(
-        group.posts.select_related('group'),
+        ChainedFeed(
+            group.posts.for_feed(),
+            group.archived_posts.for_feed(),
+            group.post_count - group.archived_count,
+        ),
         request,
         settings.LIMIT_POSTS,
+        group.post_count,
     )
     return render(
         request,
         'posts/group_list.html',
         {
             'group': group, 'page_obj': page_obj,
+            'following': is_following(request, group=group),
         },
     )
 
 
+@query_budget(7)
+@cache_anonymous_page(PROFILE_FEED)
+@conditional_page(profile_state)
 def profile(request: HttpRequest, username: str) -> HttpResponse:
     """
     Отрисовка страницы профиля пользователя с информацией
-    обо всех постах данного пользователя.
+    обо всех постах данного пользователя, включая архив.
     """
-    author = get_object_or_404(User, username=username)
+    author = get_object_or_404(
+        User.objects.select_related('profile'), username=username,
+    )
+    counts = author_profile(author)
     page_obj = paginate(
-        author.posts.select_related('author'),
+        ChainedFeed(
+            author.posts.for_profile(),
+            author.archived_posts.for_profile(),
+            counts.post_count - counts.archived_count,
+        ),
         request,
         settings.LIMIT_POSTS,
+        counts.post_count,
     )
     return render(
         request,
@@ -66,15 +122,21 @@ def profile(request: HttpRequest, username: str) -> HttpResponse:
         {
             'page_obj': page_obj,
             'author': author,
+            'following': is_following(request, author=author),
         },
     )
 
 
+@query_budget(4)
+@conditional_page(post_state)
 def post_detail(request: HttpRequest, post_id: int) -> HttpResponse:
     """
     Отрисовка страницы с описанием конкретного выбранного поста.
+    Пост архива читается из архива: где искать пост,
+    определяет post_state.
     """
-    post = get_object_or_404(Post, pk=post_id)
+    model = ArchivedPost if getattr(request, 'post_archived', False) else Post
+    post = get_object_or_404(model.objects.for_detail(), pk=post_id)
     return render(
         request,
         'posts/post_detail.html',
@@ -84,7 +146,30 @@ def post_detail(request: HttpRequest, post_id: int) -> HttpResponse:
     )
 
 
+@query_budget(5)
+def search(request: HttpRequest) -> HttpResponse:
+    """
+    Отрисовка страницы полнотекстового поиска по текстам постов.
+    Результаты упорядочены по релевантности,
+    найденные слова выделены во фрагментах текста.
+    """
+    query = request.GET.get('q', '').strip()
+    page_obj = CountedPaginator(
+        SearchResults(query), settings.LIMIT_POSTS,
+    ).get_page(request.GET.get('page'))
+    return render(
+        request,
+        'posts/search.html',
+        {
+            'query': query,
+            'page_obj': page_obj,
+            'page_query': urlencode({'q': query}) + '&',
+        },
+    )
+
+
 @login_required
+@query_budget(11)
 def post_create(request: HttpRequest) -> HttpResponse:
     """
     Отрисовка страницы с окном создания поста.
@@ -108,6 +193,7 @@ def post_create(request: HttpRequest) -> HttpResponse:
 
 
 @login_required
+@query_budget(11)
 def post_edit(request: HttpRequest, post_id: int) -> HttpResponse:
     """
     Отрисовка страницы для редактирования уже созданного поста.
@@ -115,7 +201,7 @@ def post_edit(request: HttpRequest, post_id: int) -> HttpResponse:
     Редактировать можно только свои посты.
     """
     post = get_object_or_404(Post, pk=post_id)
-    if post.author != request.user:
+    if post.author_id != request.user.pk:
         return redirect('posts:post_detail', post_id)
 
     form = PostForm(request.POST or None, instance=post)
@@ -126,3 +212,129 @@ def post_edit(request: HttpRequest, post_id: int) -> HttpResponse:
     return render(
         request, 'posts/create_post.html', {'form': form, 'is_edit': True},
     )
+
+
+@login_required
+@query_budget(6)
+def follow_index(request: HttpRequest) -> HttpResponse:
+    """
+    Лента постов авторов и групп, на которые подписан пользователь.
+    Читается из материализованной ленты (TimelineEntry)
+    курсорной пагинацией, посты авторов и групп с большим
+    числом подписчиков дочитываются из Post.
+    """
+    page_obj = timeline_page(
+        request.user,
+        settings.LIMIT_POSTS,
+        request.GET.get(CURSOR_AFTER),
+        request.GET.get(CURSOR_BEFORE),
+    )
+    return render(
+        request,
+        'posts/follow.html',
+        {
+            'page_obj': page_obj,
+        },
+    )
+
+
+def change_follow(
+    request: HttpRequest, subscribe: bool, **target: typing.Any,
+) -> None:
+    """
+    Подписывает или отписывает пользователя и меняет версию
+    его подписок, чтобы сбросить ETag страниц с кнопками подписки.
+    """
+    if (follow if subscribe else unfollow)(request.user, **target):
+        request.session[FOLLOW_VERSION] = (
+            request.session.get(FOLLOW_VERSION, 0) + 1
+        )
+
+
+@login_required
+@require_POST
+def profile_follow(request: HttpRequest, username: str) -> HttpResponse:
+    """Подписка на автора; на себя подписаться нельзя."""
+    author = get_object_or_404(
+        User.objects.select_related('profile'), username=username,
+    )
+    if author != request.user:
+        change_follow(request, True, author=author)
+    return redirect('posts:profile', username)
+
+
+@login_required
+@require_POST
+def profile_unfollow(request: HttpRequest, username: str) -> HttpResponse:
+    """Отписка от автора."""
+    author = get_object_or_404(User, username=username)
+    change_follow(request, False, author=author)
+    return redirect('posts:profile', username)
+
+
+@login_required
+@require_POST
+def group_follow(request: HttpRequest, slug: str) -> HttpResponse:
+    """Подписка на группу."""
+    group = get_object_or_404(Group, slug=slug)
+    change_follow(request, True, group=group)
+    return redirect('posts:group_list', slug)
+
+
+@login_required
+@require_POST
+def group_unfollow(request: HttpRequest, slug: str) -> HttpResponse:
+    """Отписка от группы."""
+    group = get_object_or_404(Group, slug=slug)
+    change_follow(request, False, group=group)
+    return redirect('posts:group_list', slug)
+
+
+def sitemap_file(path: str) -> FileResponse:
+    """Отдает собранную заранее часть карты сайта с диска."""
+    return FileResponse(
+        open(path, 'rb'), content_type=SITEMAP_CONTENT_TYPE,
+    )
+
+
+@query_budget(4)
+@cache_anonymous_page(SITEMAP_FEED)
+def sitemap_index(request: HttpRequest) -> HttpResponse:
+    """
+    Индекс карты сайта со ссылками на части разделов.
+    Собранный заранее индекс отдается с диска,
+    иначе строится четырьмя запросами - по одному на раздел -
+    и кэшируется до изменения постов, групп или авторов.
+    """
+    path = pregenerated_path(INDEX_FILENAME)
+    if path is not None:
+        return sitemap_file(path)
+    return HttpResponse(
+        ''.join(render_index(request.build_absolute_uri('/')[:-1])),
+        content_type=SITEMAP_CONTENT_TYPE,
+    )
+
+
+@query_budget(1)
+@conditional_page(sitemap_shard_state)
+def sitemap_shard(
+    request: HttpRequest, section: str, number: int,
+) -> HttpResponse:
+    """
+    Часть карты сайта: до SITEMAP_SHARD_SIZE адресов с lastmod.
+    Собранная заранее часть отдается с диска, иначе
+    формируется потоком по пачкам без списка всех адресов в памяти.
+    """
+    path = pregenerated_path(shard_filename(section, number))
+    if path is not None:
+        return sitemap_file(path)
+    if request.page_state == (None, None):
+        raise Http404
+    return StreamingHttpResponse(
+        (
+            chunk.encode() for chunk in SECTIONS[section].render(
+                request.build_absolute_uri('/')[:-1], number,
+            )
+        ),
+        content_type=SITEMAP_CONTENT_TYPE,
+    )
@@ -2,6 +2,38 @@ import os
 
 LIMIT_POSTS = 10
 
+# Число постов, дальше которого паджинатор не считает записи.
+PAGINATOR_COUNT_LIMIT = 10000
+
+# Число ссылок на страницы по обе стороны от текущей.
+PAGINATOR_ON_EACH_SIDE = 2
+
+# Число записей, дальше которого списки админки не считают записи.
+ADMIN_COUNT_LIMIT = 10000
+
+# Число постов, обрабатываемых одним запросом в массовых действиях админки.
+BULK_CHUNK_SIZE = 1000
+
+# Авторы и группы с таким числом подписчиков и больше не рассылают
+# посты в ленты подписок, их посты дочитываются при чтении ленты.
+TIMELINE_FANOUT_LIMIT = 1000
+
+# Сколько последних постов автора или группы попадает
+# в ленту подписок при подписке.
+TIMELINE_BACKFILL = 50
+
+# Через сколько дней команда archive_posts переносит посты в архив.
+ARCHIVE_AFTER_DAYS = 365
+
+# Число постов, читаемых одним запросом при выгрузке.
+EXPORT_CHUNK_SIZE = 2000
+
+# Число последних постов в лентах RSS и Atom.
+SYNDICATION_ITEMS = 20
+
+# Число адресов в одной части карты сайта (ограничение протокола - 50000).
+SITEMAP_SHARD_SIZE = 50000
+
 LENGTH_POST = 15
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -26,21 +58,34 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
 
     'about.apps.AboutConfig',
+    'api.apps.ApiConfig',
     'core.apps.CoreConfig',
     'posts.apps.PostsConfig',
     'users.apps.UsersConfig',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.ServerTimingMiddleware',
+    'core.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.QueryBudgetMiddleware',
+    'core.middleware.ViewTimingMiddleware',
+    'core.middleware.SlowQueryMiddleware',
 ]
 
+# Проверка бюджетов SQL-запросов view-функций (core.decorators.query_budget).
+QUERY_BUDGETS_ENABLED = DEBUG
+
+# Выбрасывать исключение при превышении бюджета вместо записи в лог.
+QUERY_BUDGET_RAISE = False
+
 ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
@@ -68,9 +113,50 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        # Постоянные соединения: профиль SQLITE_PRAGMAS применяется
+        # один раз на соединение, а не на каждый запрос.
+        'CONN_MAX_AGE': 60,
     },
 }
 
+# Профиль SQLite, применяется к каждому новому соединению
+# (core.db.configure_sqlite). WAL позволяет читать во время записи,
+# synchronous=normal в режиме WAL не теряет согласованность базы,
+# cache_size < 0 - размер кэша в КиБ, busy_timeout - в мс.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+    'temp_store': 'memory',
+    'busy_timeout': 5000,
+}
+
+# Повторы записи, не дождавшейся блокировки (core.db.retry_on_lock):
+# число повторов и начальная пауза в секундах.
+SQLITE_LOCK_RETRIES = 5
+SQLITE_LOCK_RETRY_DELAY = 0.05
+
+# Реплики для чтения: файлы SQLite через запятую в переменной
+# окружения DATABASE_REPLICAS, например
+# replica1.sqlite3,replica2.sqlite3. Реплики обновляет команда replicate.
+DATABASE_REPLICAS = []
+for number, name in enumerate(
+    filter(None, os.environ.get('DATABASE_REPLICAS', '').split(',')), 1,
+):
+    DATABASE_REPLICAS.append(f'replica{number}')
+    DATABASES[f'replica{number}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, name),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['core.routers.PrimaryReplicaRouter']
+
+# Сколько секунд после записи пользователь читает из основной базы.
+# Должно быть больше отставания реплик (интервала replicate).
+REPLICA_STICKY_SECONDS = 10
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -102,6 +188,92 @@ STATIC_URL = '/static/'
 
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 
+# Страницы лент и карточки постов хранятся в памяти процесса:
+# их ключи включают версию ленты или поста. Версии лент
+# (core.cache.VERSION_CACHE) лежат в общем для всех рабочих
+# процессов кэше, поэтому запись в одном процессе сбрасывает
+# страницы лент во всех.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'feed_versions': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get(
+            'FEED_VERSIONS_DIR', os.path.join(BASE_DIR, 'feed_versions'),
+        ),
+    },
+}
+
+# Тесты выполняются с настройками core.testing.TEST_SETTINGS.
+TEST_RUNNER = 'core.testing.TestRunner'
+
+# Время жизни закэшированных карточек постов, в секундах.
+POST_CARD_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Время жизни страниц лент для неавторизованных пользователей, в секундах.
+# Страницы сбрасываются при каждой записи в ленту.
+PAGE_CACHE_TIMEOUT = 60 * 60
+
+# Доля запросов, для которых замеряется время view, SQL и шаблонов
+# (заголовок Server-Timing и лог core.timing); 0 - замеры выключены.
+SERVER_TIMING_SAMPLE_RATE = 1.0 if DEBUG else 0.01
+
+# Метрики в формате Prometheus (core.metrics, адрес /metrics).
+METRICS_ENABLED = True
+
+# Каталог снимков метрик процессов: при нескольких рабочих процессах
+# каждый сохраняет в нем свои метрики, а /metrics их складывает.
+# Пустое значение - метрики только текущего процесса.
+# Например, METRICS_DIR=metrics (относительно каталога запуска).
+METRICS_DIR = os.environ.get('METRICS_DIR', '')
+
+# Как часто процесс сохраняет снимок метрик, в секундах.
+METRICS_FLUSH_INTERVAL = 5
+
+# Токен доступа к /metrics: Prometheus передает его в заголовке
+# Authorization: Bearer <токен>. Пустое значение - /metrics недоступен.
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# Порог журнала медленных SQL-запросов, в миллисекундах;
+# None - журнал выключен. Сводка: manage.py slowqueries.
+SLOW_QUERY_THRESHOLD_MS = 100
+
+# Файл журнала медленных SQL-запросов, строка JSON на запрос.
+SLOW_QUERY_LOG = os.path.join(BASE_DIR, 'slow_queries.log')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+        'slow_queries': {
+            'class': 'logging.FileHandler',
+            'filename': SLOW_QUERY_LOG,
+            'formatter': 'message',
+            'delay': True,
+        },
+    },
+    'loggers': {
+        'core.timing': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'core.slowqueries': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+
+# Каталог заранее собранных частей карты сайта (команда build_sitemaps).
+SITEMAP_ROOT = os.path.join(BASE_DIR, 'sitemaps')
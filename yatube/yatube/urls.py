@@ -2,6 +2,8 @@ from django.contrib import admin
 from django.urls import include, path
 
 from about.apps import AboutConfig
+from api.apps import ApiConfig
+from core.views import metrics_view
 from posts.apps import PostsConfig
 from users.apps import UsersConfig
 
@@ -9,6 +11,8 @@ urlpatterns = [
     path('', include('posts.urls', namespace=PostsConfig.name)),
     path('about/', include('about.urls', namespace=AboutConfig.name)),
     path('admin/', admin.site.urls),
+    path('api/', include('api.urls', namespace=ApiConfig.name)),
     path('auth/', include('users.urls', namespace=UsersConfig.name)),
     path('auth/', include('django.contrib.auth.urls')),
+    path('metrics', metrics_view, name='metrics'),
 ]